@@ -2,24 +2,254 @@
 Markdown to Word 文档转换应用
 Flask Web 服务入口
 """
+import json
 import os
-import uuid
 import tempfile
+import time
+import uuid
 from flask import Flask, render_template, request, send_file, jsonify
-from converter.docx_builder import convert_markdown_to_docx
 from urllib.parse import quote
+from werkzeug.wsgi import wrap_file
+
+from artifact_store import create_store
+from singleflight import SingleFlight, conversion_key
+from static_assets import StaticAssets
+
+
+def _env_flag(name, default=False):
+    """读取布尔型环境变量（空字符串或 0 视为关闭，未设置时返回 default）"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value not in ('', '0')
+
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+# 低内存模式：转换时边消费边释放中间结果（MDFORWORD_LOW_MEMORY=1 开启），
+# 峰值内存实测只降低约 4%（见 README）
+app.config['LOW_MEMORY'] = _env_flag('MDFORWORD_LOW_MEMORY')
+# 转换结果的保留时间（秒）。下载不会删除文件，以支持断点续传和下载工具重试，
+# 过期文件由定期清理删除
+app.config['DOWNLOAD_RETENTION'] = int(os.environ.get('MDFORWORD_DOWNLOAD_RETENTION', 3600))
+# 由前端服务器发送文件：Apache/lighttpd 使用 X-Sendfile，
+# nginx 设置 internal location 前缀后使用 X-Accel-Redirect
+app.config['USE_X_SENDFILE'] = _env_flag('MDFORWORD_X_SENDFILE')
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('MDFORWORD_X_ACCEL_PREFIX', '')
+# 设置后对每次转换进行性能分析，报告写入该目录下的 <download_id>.profile.json
+app.config['PROFILE_DIR'] = os.environ.get('MDFORWORD_PROFILE_DIR', '')
+# 相同转换跨进程合并使用的锁目录，同一主机上的所有工作进程须使用同一目录
+app.config['COALESCE_DIR'] = os.environ.get(
+    'MDFORWORD_COALESCE_DIR', os.path.join(tempfile.gettempdir(), 'mdforword-inflight')
+)
+# 分卷预算：超出后在标题处拆分为多个 .docx 并打包为 ZIP（0 表示不分卷），
+# 请求中的 max_paragraphs / max_bytes 优先
+app.config['VOLUME_MAX_PARAGRAPHS'] = int(os.environ.get('MDFORWORD_VOLUME_PARAGRAPHS', 0))
+app.config['VOLUME_MAX_BYTES'] = int(os.environ.get('MDFORWORD_VOLUME_BYTES', 0))
+# 确定性输出：相同的文档与选项总是得到逐字节相同的结果（MDFORWORD_DETERMINISTIC=0 关闭）
+app.config['DETERMINISTIC'] = _env_flag('MDFORWORD_DETERMINISTIC', default=True)
+
+DOCX_MIMETYPE = ('application/vnd.openxmlformats-officedocument'
+                 '.wordprocessingml.document')
+ZIP_MIMETYPE = 'application/zip'
+# Flat OPC（整个包为一个 XML 文档），请求 Accept 为以下类型时 /convert 直接返回
+FLAT_OPC_MIMETYPE = 'application/xml'
+FLAT_OPC_ACCEPT = ('application/xml', 'text/xml')
+
+# 下载的强 ETag：结果内容 SHA-256 的前 ETAG_LENGTH 位十六进制
+ETAG_LENGTH = 32
+
+# 转换结果存储（MDFORWORD_STORE 选择 local / shared / sqlite 后端）
+store = create_store()
+
+# 内容与样式方案相同的并发转换只执行一次，其余请求共享结果
+flight = SingleFlight(app.config['COALESCE_DIR'])
+
+# 静态资源清单（首次使用时按 app.static_folder 建立，桌面版会在启动前修改该目录）
+_static_assets = None
+
+# 过期文件清理的最小间隔（秒）
+PURGE_INTERVAL = 60
+_last_purge = 0.0
+
+
+def purge_expired_downloads(force=False):
+    """删除超过保留时间的转换结果（默认每 PURGE_INTERVAL 秒最多执行一次）"""
+    global _last_purge
+    now = time.time()
+    if not force and now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    store.purge(now - app.config['DOWNLOAD_RETENTION'])
+    if flight.host is not None:
+        flight.host.purge(now - app.config['DOWNLOAD_RETENTION'])
+
+
+def sanitize_filename(filename):
+    """清理用户提供的文件名，只保留安全字符，并确保以 .docx 结尾"""
+    safe_filename = "".join(
+        c for c in filename
+        if c.isalnum() or c in (' ', '-', '_', '.', '（', '）')
+        or '\u4e00' <= c <= '\u9fff'
+    ).strip() or '文档'
+
+    if not safe_filename.endswith('.docx'):
+        safe_filename += '.docx'
+    return safe_filename
+
+
+def volume_budgets(data):
+    """
+    请求的分卷预算，未提供时使用服务配置
+
+    Returns:
+        (max_paragraphs, max_bytes)，0 表示不限
+
+    Raises:
+        ValueError: 预算不是非负整数
+    """
+    budgets = []
+    for field, config in (('max_paragraphs', 'VOLUME_MAX_PARAGRAPHS'),
+                          ('max_bytes', 'VOLUME_MAX_BYTES')):
+        value = data.get(field)
+        if value is None:
+            value = app.config[config]
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise ValueError(f'{field} 必须是非负整数')
+        budgets.append(value)
+    return tuple(budgets)
+
+
+def volume_options(budgets, stem):
+    """影响输出的分卷选项（用于合并相同转换的 key），不分卷时返回 None"""
+    if not any(budgets):
+        return None
+    max_paragraphs, max_bytes = budgets
+    return {'max_paragraphs': max_paragraphs, 'max_bytes': max_bytes, 'stem': stem}
+
+
+def result_filename(safe_filename, volumes):
+    """分为多卷时下载 ZIP：文档.docx → 文档.zip"""
+    if volumes > 1:
+        return safe_filename[:-len('.docx')] + '.zip'
+    return safe_filename
+
+
+def download_mimetype(filename):
+    """下载的内容类型：分卷输出为 ZIP，Flat OPC 为 XML，其余为 .docx"""
+    name = filename.lower()
+    if name.endswith('.zip'):
+        return ZIP_MIMETYPE
+    if name.endswith('.xml'):
+        return FLAT_OPC_MIMETYPE
+    return DOCX_MIMETYPE
+
+
+def _media_quality(weights, media_type):
+    """Accept 中与 media_type 匹配的最具体一项的 q 值"""
+    major = media_type.split('/')[0]
+    for candidate in (media_type, f'{major}/*', '*/*'):
+        if candidate in weights:
+            return weights[candidate]
+    return 0.0
+
+
+def accepts_flat_opc(accept):
+    """
+    /convert 的内容协商：Accept 中 XML（FLAT_OPC_ACCEPT）的 q 值高于 JSON 时
+    直接返回 Flat OPC 文档，否则（包括未提供 Accept、*/*）返回带下载链接的 JSON
+    """
+    weights = {}
+    for item in (accept or '').split(','):
+        media_type, *params = item.split(';')
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[media_type] = q
+    xml_q = max(_media_quality(weights, media_type) for media_type in FLAT_OPC_ACCEPT)
+    return xml_q > _media_quality(weights, 'application/json')
+
+
+def conversion_options(budgets, stem, flat_opc):
+    """影响输出的选项（用于合并相同转换的 key）：Flat OPC 输出不分卷"""
+    if flat_opc:
+        return {'format': 'flat-opc'}
+    return volume_options(budgets, stem)
+
+
+def content_etag(download_id):
+    """
+    由结果内容的摘要得到强 ETag（不含引号），结果不存在时返回 None
+
+    摘要由存储在写入结果时计算并保存，下载时不再读取文件内容。
+    确定性输出时相同的转换即使 download_id 不同也得到相同的 ETag，
+    浏览器、CDN 和去重存储可以识别重复的结果。
+    """
+    digest = store.digest(download_id)
+    return digest[:ETAG_LENGTH] if digest else None
+
+
+def new_profiler(requested):
+    """请求中要求或配置了 PROFILE_DIR 时返回性能分析器，否则返回 None"""
+    if not requested and not app.config['PROFILE_DIR']:
+        return None
+    from converter.profiling import ConversionProfiler
+    return ConversionProfiler()
+
+
+def save_profile(download_id, report):
+    """配置了 PROFILE_DIR 时将分析报告写入 <download_id>.profile.json"""
+    profile_dir = app.config['PROFILE_DIR']
+    if not profile_dir:
+        return
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f'{download_id}.profile.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def get_static_assets(reload=False):
+    """返回静态资源清单：内容哈希与预压缩的 gzip / brotli 版本"""
+    global _static_assets
+    if _static_assets is None or reload:
+        _static_assets = StaticAssets(app.static_folder)
+    return _static_assets
 
-# 临时文件目录
-TEMP_DIR = os.path.join(tempfile.gettempdir(), 'mdforword')
-os.makedirs(TEMP_DIR, exist_ok=True)
+
+@app.template_global()
+def asset_url(name):
+    """模板中引用静态资源：返回带内容哈希、可长期缓存的地址"""
+    return get_static_assets().url(name)
+
+
+def serve_static(filename):
+    """发送静态资源（替换 Flask 默认的 static 视图），按 Accept-Encoding 选择压缩版本"""
+    result = get_static_assets().serve(
+        filename, request.headers.get('Accept-Encoding'), request.headers.get('If-None-Match')
+    )
+    if result is None:
+        return jsonify({'error': '文件不存在'}), 404
+    status, headers, body = result
+    return app.response_class(body, status=status, headers=headers)
+
+
+app.view_functions['static'] = serve_static
 
 
 @app.route('/')
 def index():
     """渲染主页面"""
+    if app.debug:
+        # 调试时修改静态文件无需重启服务
+        get_static_assets(reload=True)
     return render_template('index.html')
 
 
@@ -27,8 +257,14 @@ def index():
 def convert():
     """
     转换 Markdown 为 Word 文档
-    接收 JSON: { "markdown": "..." , "filename": "..." }
-    返回 JSON: { "download_id": "...", "filename": "..." }
+    接收 JSON: { "markdown": "..." , "filename": "...", "profile": "...", "profiling": false,
+               "max_paragraphs": 0, "max_bytes": 0 }
+    返回 JSON: { "download_id": "...", "filename": "...", "volumes": 1 }
+    profiling 为 true 时响应中额外包含 "profiling" 性能分析报告；
+    超出分卷预算分为多卷时 volumes 大于 1，filename 以 .zip 结尾
+
+    请求头 Accept 优先 application/xml（或 text/xml）时不返回 JSON，而是直接返回
+    Flat OPC 文档（不分卷），响应头 X-Download-Id 为存储中的结果 id
     """
     try:
         data = request.get_json()
@@ -37,38 +273,112 @@ def convert():
 
         markdown_text = data['markdown']
         filename = data.get('filename', '文档') or '文档'
+        profile = data.get('profile') or None
 
         if not markdown_text.strip():
             return jsonify({'error': 'Markdown 文本不能为空'}), 400
 
-        # 转换
-        docx_buffer = convert_markdown_to_docx(markdown_text)
+        from converter.styles import profile_names
+        if profile and profile not in profile_names():
+            return jsonify({'error': f'未知的样式方案: {profile}'}), 400
+
+        try:
+            budgets = volume_budgets(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         # 清理文件名
-        safe_filename = "".join(
-            c for c in filename
-            if c.isalnum() or c in (' ', '-', '_', '.', '（', '）')
-            or '\u4e00' <= c <= '\u9fff'
-        ).strip() or '文档'
-
-        if not safe_filename.endswith('.docx'):
-            safe_filename += '.docx'
-
-        # 保存到临时文件
-        download_id = str(uuid.uuid4())
-        temp_path = os.path.join(TEMP_DIR, f'{download_id}.docx')
-        with open(temp_path, 'wb') as f:
-            f.write(docx_buffer.read())
-
-        return jsonify({
-            'download_id': download_id,
-            'filename': safe_filename
-        })
+        safe_filename = sanitize_filename(filename)
+        stem = safe_filename[:-len('.docx')]
+
+        purge_expired_downloads()
+
+        # 转换并直接写入存储（延迟导入，加快服务启动；桌面版会在后台预热）
+        from converter.docx_builder import (
+            OUTPUT_FLAT_OPC, convert_markdown_to_docx, convert_markdown_to_volumes,
+        )
+        profiling = bool(data.get('profiling'))
+        profiler = new_profiler(profiling)
+        flat_opc = accepts_flat_opc(request.headers.get('Accept'))
+
+        def build():
+            download_id = str(uuid.uuid4())
+            with store.writer(download_id) as f:
+                if flat_opc:
+                    convert_markdown_to_docx(
+                        markdown_text, f, profile=profile,
+                        low_memory=app.config['LOW_MEMORY'], profiler=profiler,
+                        deterministic=app.config['DETERMINISTIC'], output_format=OUTPUT_FLAT_OPC,
+                    )
+                    volumes = 1
+                else:
+                    _, volumes = convert_markdown_to_volumes(
+                        markdown_text, f, profile=profile, max_paragraphs=budgets[0],
+                        max_bytes=budgets[1], stem=stem,
+                        low_memory=app.config['LOW_MEMORY'], profiler=profiler,
+                        deterministic=app.config['DETERMINISTIC'],
+                    )
+            if profiler is not None:
+                save_profile(download_id, profiler.report())
+            return {'download_id': download_id, 'volumes': volumes}
+
+        if profiling:
+            # 要求性能分析的请求单独转换，报告只对应这一次转换
+            built = build()
+        else:
+            # 同时到达的相同文档共享同一次转换（同一个 download_id）
+            key = conversion_key(markdown_text, profile,
+                                 conversion_options(budgets, stem, flat_opc))
+            built, _ = flight.do(key, build)
+
+        if flat_opc:
+            return flat_opc_response(built['download_id'])
+
+        result = {
+            'download_id': built['download_id'],
+            'filename': result_filename(safe_filename, built['volumes']),
+            'volumes': built['volumes'],
+        }
+        if profiling:
+            result['profiling'] = profiler.report()
+        response = jsonify(result)
+        response.vary.add('Accept')
+        return response
 
     except Exception as e:
         return jsonify({'error': f'转换失败: {str(e)}'}), 500
 
 
+def flat_opc_response(download_id):
+    """以 Flat OPC 文档作为 /convert 的响应体，从存储中流式读取"""
+    info = store.stat(download_id)
+    fileobj = store.open(download_id) if info is not None else None
+    if fileobj is None:
+        return jsonify({'error': '文件不存在或已过期'}), 404
+    response = app.response_class(
+        wrap_file(request.environ, fileobj),
+        mimetype=FLAT_OPC_MIMETYPE,
+        direct_passthrough=True,
+    )
+    response.content_length = info[0]
+    response.headers['X-Download-Id'] = download_id
+    response.vary.add('Accept')
+    return response
+
+
+@app.route('/profiles')
+def profiles():
+    """列出可用的样式方案"""
+    from converter.styles import profile_names
+    return jsonify({'profiles': profile_names()})
+
+
+@app.route('/metrics')
+def metrics():
+    """运行统计（按进程）：实际转换次数与合并到进行中转换的请求数"""
+    return jsonify({'conversions': flight.metrics()})
+
+
 @app.route('/download/<download_id>')
 def download(download_id):
     """
@@ -82,29 +392,65 @@ def download(download_id):
         return jsonify({'error': '无效的下载链接'}), 400
 
     filename = request.args.get('name', '文档.docx')
-    temp_path = os.path.join(TEMP_DIR, f'{download_id}.docx')
+    mimetype = download_mimetype(filename)
 
-    if not os.path.exists(temp_path):
+    purge_expired_downloads()
+    info = store.stat(download_id)
+    if info is None or info[1] < time.time() - app.config['DOWNLOAD_RETENTION']:
         return jsonify({'error': '文件不存在或已过期'}), 404
+    size, mtime = info
+    etag = content_etag(download_id)
+    if etag is None:
+        return jsonify({'error': '文件不存在或已过期'}), 404
+    local_path = store.local_path(download_id)
 
-    response = send_file(
-        temp_path,
-        mimetype='application/vnd.openxmlformats-officedocument'
-                 '.wordprocessingml.document',
-        as_attachment=True,
-        download_name=filename,
-    )
-
-    # 下载后删除临时文件（延迟删除，让 send_file 完成）
-    @response.call_on_close
-    def cleanup():
-        try:
-            os.remove(temp_path)
-        except OSError:
-            pass
+    # 交由 nginx 发送文件（X-Accel-Redirect），应用只返回响应头
+    accel_prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix and local_path:
+        response = app.response_class(mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{download_id}.docx"
+        response.headers['Content-Disposition'] = (
+            f"attachment; filename*=UTF-8''{quote(filename)}"
+        )
+        return response
 
+    if local_path:
+        # conditional=True 时支持 Range 断点续传与 If-None-Match（ETag 为内容摘要）；
+        # WSGI 服务器提供 wsgi.file_wrapper 时（如 gunicorn）由系统 sendfile 发送
+        response = send_file(
+            local_path,
+            mimetype=mimetype,
+            as_attachment=True,
+            download_name=filename,
+            conditional=True,
+            etag=etag,
+            max_age=0,
+        )
+    else:
+        # 非文件后端：流式读取，同样支持 Range 与 ETag
+        fileobj = store.open(download_id)
+        if fileobj is None:
+            return jsonify({'error': '文件不存在或已过期'}), 404
+        response = app.response_class(
+            wrap_file(request.environ, fileobj),
+            mimetype=mimetype,
+            direct_passthrough=True,
+        )
+        response.headers['Content-Disposition'] = (
+            f"attachment; filename*=UTF-8''{quote(filename)}"
+        )
+        response.content_length = size
+        response.last_modified = mtime
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = 0
+        response = response.make_conditional(
+            request, accept_ranges=True, complete_length=size
+        )
+    response.cache_control.private = True
     return response
 
 
 if __name__ == '__main__':
+    purge_expired_downloads(force=True)
     app.run(debug=True, host='0.0.0.0', port=5001)
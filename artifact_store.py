@@ -0,0 +1,328 @@
+"""
+转换结果存储模块
+为 Web 服务和桌面应用提供统一的转换结果（.docx）存取接口，支持以下后端：
+
+- local:  节点本地临时目录（默认）
+- shared: 多个实例共同挂载的共享目录（NFS 等），原子写入并落盘
+- sqlite: 内嵌 SQLite 数据库，以 BLOB 保存文件内容
+
+通过环境变量选择:
+    MDFORWORD_STORE       后端类型（local / shared / sqlite）
+    MDFORWORD_STORE_PATH  共享目录路径或 SQLite 数据库文件路径
+"""
+import hashlib
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# 计算内容摘要时每次读取的大小
+DIGEST_CHUNK_SIZE = 256 * 1024
+
+
+def _sha256(fileobj):
+    """从文件对象当前位置读到末尾，返回内容的 SHA-256（十六进制）"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(DIGEST_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def atomic_writer(path, durable=False, mode=0o666):
+    """
+    原子写入 path：返回同目录下临时文件的二进制文件对象（可读写），
+    正常退出时重命名为 path，异常时删除，其他进程不会读到写了一半的文件
+
+    Args:
+        path: 目标文件路径
+        durable: 重命名前是否 fsync
+        mode: 新文件的权限，与 open() 新建文件一样受 umask 限制。默认的 0o666 使
+              nginx / Apache 等以其他用户运行的前端服务器可以读取（X-Accel-Redirect）；
+              tempfile.mkstemp 固定为 0o600，因此这里自己创建临时文件
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f'.{name}.{os.urandom(8).hex()}.tmp')
+    fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0),
+                 mode)
+    try:
+        with os.fdopen(fd, 'w+b') as f:
+            yield f
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FileSystemStore:
+    """
+    以目录保存转换结果，每个结果对应一个 <id>.docx 文件，
+    内容的 SHA-256 在写入时计算一次，保存在同名的 <id>.sha256 文件中
+
+    写入时先写同目录下的临时文件再重命名，其他进程或节点
+    永远不会读到写了一半的文件；摘要文件先于结果文件就位。
+    """
+
+    def __init__(self, directory, durable=False):
+        """
+        Args:
+            directory: 存储目录
+            durable: 重命名前是否 fsync（共享目录建议开启）
+        """
+        self.directory = directory
+        self.durable = durable
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, artifact_id):
+        return os.path.join(self.directory, f'{artifact_id}.docx')
+
+    def _digest_path(self, artifact_id):
+        return os.path.join(self.directory, f'{artifact_id}.sha256')
+
+    @contextmanager
+    def writer(self, artifact_id):
+        """返回用于写入结果的二进制文件对象，正常退出时提交，异常时丢弃"""
+        with atomic_writer(self._path(artifact_id), self.durable) as f:
+            yield f
+            # 写入过程中可能回退改写（如 ZIP 的本地文件头），摘要在写完后读一遍计算
+            f.seek(0)
+            digest = _sha256(f)
+            with atomic_writer(self._digest_path(artifact_id), self.durable) as d:
+                d.write(digest.encode('ascii'))
+
+    def stat(self, artifact_id):
+        """返回 (大小, 修改时间)，不存在时返回 None"""
+        try:
+            st = os.stat(self._path(artifact_id))
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime
+
+    def digest(self, artifact_id):
+        """返回写入时记录的内容 SHA-256（十六进制），不存在时返回 None"""
+        try:
+            with open(self._digest_path(artifact_id), 'rb') as f:
+                return f.read().decode('ascii') or None
+        except OSError:
+            return None
+
+    def local_path(self, artifact_id):
+        """返回结果的本地文件路径（可用于 sendfile 等零拷贝发送）"""
+        path = self._path(artifact_id)
+        return path if os.path.exists(path) else None
+
+    def open(self, artifact_id):
+        """以二进制只读方式打开结果，不存在时返回 None"""
+        try:
+            return open(self._path(artifact_id), 'rb')
+        except OSError:
+            return None
+
+    def delete(self, artifact_id):
+        for path in (self._path(artifact_id), self._digest_path(artifact_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def purge(self, older_than):
+        """删除修改时间早于 older_than（时间戳）的结果、摘要及遗留的临时文件"""
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.name.endswith(('.docx', '.sha256', '.tmp')):
+                continue
+            try:
+                if entry.stat().st_mtime < older_than:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class _BlobReader(io.RawIOBase):
+    """SQLite BLOB 的只读文件对象，关闭时一并关闭数据库连接"""
+
+    def __init__(self, conn, blob):
+        self._conn = conn
+        self._blob = blob
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._blob.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._blob.seek(offset, whence)
+        return self._blob.tell()
+
+    def tell(self):
+        return self._blob.tell()
+
+    def close(self):
+        if not self.closed:
+            self._blob.close()
+            self._conn.close()
+        super().close()
+
+
+class SQLiteStore:
+    """
+    以 SQLite 数据库保存转换结果
+
+    同一主机上的多个工作进程可共享同一个数据库文件；
+    读取时使用增量 BLOB I/O，不会把整个文件读入内存。
+    内容的 SHA-256 在写入时计算一次，与结果保存在同一行。
+    """
+
+    # 写入缓冲超过该大小时溢写到临时文件
+    SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS artifacts ('
+                ' id TEXT PRIMARY KEY,'
+                ' created REAL NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' data BLOB NOT NULL,'
+                ' digest TEXT)'
+            )
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(artifacts)')}
+            if 'digest' not in columns:
+                # 旧版本创建的数据库补上摘要列
+                conn.execute('ALTER TABLE artifacts ADD COLUMN digest TEXT')
+
+    def _connect(self, check_same_thread=True):
+        return sqlite3.connect(self.db_path, timeout=30, check_same_thread=check_same_thread)
+
+    def _conn(self):
+        """每个线程复用一个连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def writer(self, artifact_id):
+        """返回用于写入结果的二进制文件对象，正常退出时写入数据库"""
+        with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as buffer:
+            yield buffer
+            size = buffer.seek(0, io.SEEK_END)
+            buffer.seek(0)
+            digest = _sha256(buffer)
+            buffer.seek(0)
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO artifacts (id, created, size, data, digest)'
+                    ' VALUES (?, ?, ?, zeroblob(?), ?)',
+                    (artifact_id, time.time(), size, size, digest),
+                )
+                rowid = conn.execute(
+                    'SELECT rowid FROM artifacts WHERE id = ?', (artifact_id,)
+                ).fetchone()[0]
+                if hasattr(conn, 'blobopen'):
+                    with conn.blobopen('artifacts', 'data', rowid) as blob:
+                        while True:
+                            chunk = buffer.read(1024 * 1024)
+                            if not chunk:
+                                break
+                            blob.write(chunk)
+                else:
+                    conn.execute(
+                        'UPDATE artifacts SET data = ? WHERE rowid = ?',
+                        (buffer.read(), rowid),
+                    )
+
+    def stat(self, artifact_id):
+        row = self._conn().execute(
+            'SELECT size, created FROM artifacts WHERE id = ?', (artifact_id,)
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def digest(self, artifact_id):
+        row = self._conn().execute(
+            'SELECT digest FROM artifacts WHERE id = ?', (artifact_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def local_path(self, artifact_id):
+        """数据库后端没有独立文件"""
+        return None
+
+    def open(self, artifact_id):
+        # 返回的文件对象可能在其他线程中读取和关闭（如异步服务的线程池），
+        # 连接只由该文件对象顺序使用
+        conn = self._connect(check_same_thread=False)
+        row = conn.execute(
+            'SELECT rowid FROM artifacts WHERE id = ?', (artifact_id,)
+        ).fetchone()
+        if row is None:
+            conn.close()
+            return None
+        if hasattr(conn, 'blobopen'):
+            return io.BufferedReader(
+                _BlobReader(conn, conn.blobopen('artifacts', 'data', row[0], readonly=True))
+            )
+        data = conn.execute(
+            'SELECT data FROM artifacts WHERE rowid = ?', (row[0],)
+        ).fetchone()[0]
+        conn.close()
+        return io.BytesIO(data)
+
+    def delete(self, artifact_id):
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM artifacts WHERE id = ?', (artifact_id,))
+
+    def purge(self, older_than):
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM artifacts WHERE created < ?', (older_than,))
+
+
+def create_store(kind=None, path=None):
+    """
+    按配置创建存储后端
+
+    Args:
+        kind: local / shared / sqlite，默认读取 MDFORWORD_STORE（缺省为 local）
+        path: 目录或数据库路径，默认读取 MDFORWORD_STORE_PATH
+
+    Returns:
+        FileSystemStore 或 SQLiteStore 实例
+    """
+    kind = (kind or os.environ.get('MDFORWORD_STORE') or 'local').lower()
+    path = path or os.environ.get('MDFORWORD_STORE_PATH')
+
+    if kind == 'local':
+        return FileSystemStore(path or os.path.join(tempfile.gettempdir(), 'mdforword'))
+    if kind == 'shared':
+        if not path:
+            raise ValueError('shared 存储需要通过 MDFORWORD_STORE_PATH 指定共享目录')
+        return FileSystemStore(path, durable=True)
+    if kind == 'sqlite':
+        return SQLiteStore(path or os.path.join(tempfile.gettempdir(), 'mdforword.db'))
+    raise ValueError(f'未知的存储类型: {kind}')
@@ -0,0 +1,399 @@
+"""
+Markdown to Word 文档转换应用
+ASGI 服务入口（Starlette），路由与 app.py 相同
+
+请求的接收与文件下载均为异步处理，CPU 密集的转换交给共享进程池，
+单个节点即可同时保持大量连接并让所有 CPU 核心参与转换。
+在关闭 GIL 的自由线程 Python 上默认改用线程池（见 MDFORWORD_EXECUTOR）。
+
+运行方式:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5001
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import quote
+
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+from app import (
+    app as flask_app, store, sanitize_filename, purge_expired_downloads, save_profile,
+    flight, get_static_assets, asset_url, volume_budgets, conversion_options, result_filename,
+    download_mimetype, content_etag, accepts_flat_opc, FLAT_OPC_MIMETYPE,
+)
+from converter.api import gil_enabled
+from singleflight import conversion_key
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 转换进程池大小（MDFORWORD_WORKERS 可覆盖，默认等于 CPU 核心数）
+WORKERS = int(os.environ.get('MDFORWORD_WORKERS', 0)) or (os.cpu_count() or 1)
+# 转换执行器：process（进程池）、thread（线程池，需要自由线程构建才能用满多核）、
+# auto（默认：GIL 关闭时使用线程池，否则使用进程池）
+EXECUTOR = os.environ.get('MDFORWORD_EXECUTOR', 'auto').lower()
+
+# 流式下载的分块大小
+CHUNK_SIZE = 256 * 1024
+
+templates = Jinja2Templates(directory=os.path.join(BASE_DIR, 'templates'))
+templates.env.globals['asset_url'] = asset_url
+_pool = None
+
+# 子进程内复用的存储实例
+_worker_store = None
+
+
+def _in_thread(func, *args):
+    """在事件循环的默认线程池中执行阻塞调用（asyncio.to_thread 需要 Python 3.9）"""
+    return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def _convert_job(download_id, markdown_text, profile, low_memory, profiling=False,
+                 budgets=(0, 0), stem='文档', deterministic=False, flat_opc=False):
+    """
+    在执行器中运行：转换并直接写入存储，只把卷数与分析报告传回主进程
+
+    Returns:
+        (卷数, 性能分析报告)；profiling 为 False 时报告为 None
+    """
+    global _worker_store
+    from artifact_store import create_store
+    from converter.docx_builder import (
+        OUTPUT_FLAT_OPC, convert_markdown_to_docx, convert_markdown_to_volumes,
+    )
+
+    profiler = None
+    if profiling:
+        from converter.profiling import ConversionProfiler
+        profiler = ConversionProfiler()
+
+    if _worker_store is None:
+        _worker_store = create_store()
+    with _worker_store.writer(download_id) as f:
+        if flat_opc:
+            convert_markdown_to_docx(
+                markdown_text, f, profile=profile, low_memory=low_memory, profiler=profiler,
+                deterministic=deterministic, output_format=OUTPUT_FLAT_OPC,
+            )
+            volumes = 1
+        else:
+            _, volumes = convert_markdown_to_volumes(
+                markdown_text, f, profile=profile, max_paragraphs=budgets[0],
+                max_bytes=budgets[1], stem=stem, low_memory=low_memory, profiler=profiler,
+                deterministic=deterministic,
+            )
+    return volumes, (profiler.report() if profiler is not None else None)
+
+
+def _warm_worker():
+    """进程池预热：提前导入转换器"""
+    from converter.docx_builder import warm_up
+    warm_up()
+
+
+def _create_pool():
+    """按 EXECUTOR 创建转换执行器"""
+    kind = EXECUTOR
+    if kind == 'auto':
+        kind = 'process' if gil_enabled() else 'thread'
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers=WORKERS)
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='mdforword')
+    raise ValueError(f'未知的执行器类型: {EXECUTOR}')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _pool, _worker_store
+    _pool = _create_pool()
+    if isinstance(_pool, ThreadPoolExecutor):
+        # 线程与主进程共用存储实例
+        _worker_store = store
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(_pool, _warm_worker) for _ in range(WORKERS)))
+    purge_expired_downloads(force=True)
+    # 启动时完成静态资源的哈希与预压缩
+    get_static_assets()
+    try:
+        yield
+    finally:
+        if sys.version_info >= (3, 9):
+            _pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+async def index(request):
+    """渲染主页面"""
+    return templates.TemplateResponse(request, 'index.html')
+
+
+async def _read_body(request, limit):
+    """异步读取请求体，超过 limit 字节时返回 None"""
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+async def convert(request):
+    """
+    转换 Markdown 为 Word 文档
+    接收 JSON: { "markdown": "..." , "filename": "...", "profile": "...", "profiling": false,
+               "max_paragraphs": 0, "max_bytes": 0 }
+    返回 JSON: { "download_id": "...", "filename": "...", "volumes": 1 }
+    profiling 为 true 时响应中额外包含 "profiling" 性能分析报告；
+    超出分卷预算分为多卷时 volumes 大于 1，filename 以 .zip 结尾
+
+    请求头 Accept 优先 application/xml（或 text/xml）时直接返回 Flat OPC 文档（见 app.py）
+    """
+    try:
+        body = await _read_body(request, flask_app.config['MAX_CONTENT_LENGTH'])
+        if body is None:
+            return JSONResponse({'error': '请求内容过大'}, status_code=413)
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or 'markdown' not in data:
+            return JSONResponse({'error': '请提供 Markdown 文本'}, status_code=400)
+
+        markdown_text = data['markdown']
+        filename = data.get('filename', '文档') or '文档'
+        profile = data.get('profile') or None
+
+        if not markdown_text.strip():
+            return JSONResponse({'error': 'Markdown 文本不能为空'}, status_code=400)
+
+        from converter.styles import profile_names
+        if profile and profile not in profile_names():
+            return JSONResponse({'error': f'未知的样式方案: {profile}'}, status_code=400)
+
+        try:
+            budgets = volume_budgets(data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        safe_filename = sanitize_filename(filename)
+        stem = safe_filename[:-len('.docx')]
+
+        await _in_thread(purge_expired_downloads)
+
+        profiling = bool(data.get('profiling'))
+        flat_opc = accepts_flat_opc(request.headers.get('accept'))
+        loop = asyncio.get_running_loop()
+        report = None
+
+        async def build():
+            nonlocal report
+            download_id = str(uuid.uuid4())
+            volumes, report = await loop.run_in_executor(
+                _pool, _convert_job, download_id, markdown_text, profile,
+                flask_app.config['LOW_MEMORY'],
+                profiling or bool(flask_app.config['PROFILE_DIR']), budgets, stem,
+                flask_app.config['DETERMINISTIC'], flat_opc,
+            )
+            if report is not None:
+                await _in_thread(save_profile, download_id, report)
+            return {'download_id': download_id, 'volumes': volumes}
+
+        if profiling:
+            # 要求性能分析的请求单独转换，报告只对应这一次转换
+            built = await build()
+        else:
+            # 同时到达的相同文档共享同一次转换（同一个 download_id）
+            key = conversion_key(markdown_text, profile,
+                                 conversion_options(budgets, stem, flat_opc))
+            built, _ = await flight.do_async(key, build)
+
+        if flat_opc:
+            return await _flat_opc_response(built['download_id'])
+
+        result = {
+            'download_id': built['download_id'],
+            'filename': result_filename(safe_filename, built['volumes']),
+            'volumes': built['volumes'],
+        }
+        if profiling:
+            result['profiling'] = report
+        return JSONResponse(result, headers={'Vary': 'Accept'})
+
+    except Exception as e:
+        return JSONResponse({'error': f'转换失败: {str(e)}'}, status_code=500)
+
+
+async def _flat_opc_response(download_id):
+    """以 Flat OPC 文档作为 /convert 的响应体，从存储中流式读取"""
+    info = await _in_thread(store.stat, download_id)
+    fileobj = await _in_thread(store.open, download_id) if info is not None else None
+    if fileobj is None:
+        return JSONResponse({'error': '文件不存在或已过期'}, status_code=404)
+    headers = {
+        'Content-Length': str(info[0]),
+        'X-Download-Id': download_id,
+        'Vary': 'Accept',
+    }
+    return StreamingResponse(
+        _iter_file(fileobj, 0, info[0]), media_type=FLAT_OPC_MIMETYPE, headers=headers,
+    )
+
+
+async def metrics(request):
+    """运行统计（按进程）：实际转换次数与合并到进行中转换的请求数"""
+    return JSONResponse({'conversions': flight.metrics()})
+
+
+async def static(request):
+    """发送静态资源：带哈希的地址长期缓存，按 Accept-Encoding 选择预压缩版本"""
+    result = get_static_assets().serve(
+        request.path_params['path'],
+        request.headers.get('accept-encoding'),
+        request.headers.get('if-none-match'),
+    )
+    if result is None:
+        return JSONResponse({'error': '文件不存在'}, status_code=404)
+    status, headers, body = result
+    return Response(body, status_code=status, headers=headers)
+
+
+async def profiles(request):
+    """列出可用的样式方案"""
+    from converter.styles import profile_names
+    return JSONResponse({'profiles': profile_names()})
+
+
+def _parse_range(header, size):
+    """解析单个 bytes=start-end 区间，返回 (start, end) 或 None"""
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    start, _, end = header[6:].strip().partition('-')
+    try:
+        if start:
+            first = int(start)
+            last = int(end) if end else size - 1
+        else:
+            # 后缀区间 bytes=-N：N 超过文件大小时返回整个文件（RFC 9110 14.1.2）
+            first = max(size - int(end), 0)
+            last = size - 1
+    except ValueError:
+        return None
+    if first < 0 or first > last or first >= size:
+        return None
+    return first, min(last, size - 1)
+
+
+async def _iter_file(fileobj, start, length):
+    """在线程池中分块读取文件，避免阻塞事件循环"""
+    try:
+        await _in_thread(fileobj.seek, start)
+        remaining = length
+        while remaining > 0:
+            chunk = await _in_thread(fileobj.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
+
+
+async def download(request):
+    """
+    下载已转换的文件
+    支持 Range 断点续传与 If-None-Match（强 ETag 为内容摘要）；文件由保留策略统一清理
+    """
+    download_id = request.path_params['download_id']
+    # 安全检查 — 只允许 UUID 格式
+    try:
+        uuid.UUID(download_id)
+    except ValueError:
+        return JSONResponse({'error': '无效的下载链接'}, status_code=400)
+
+    filename = request.query_params.get('name', '文档.docx')
+    media_type = download_mimetype(filename)
+
+    # 清理（目录扫描与删除）和 stat（SQLite 后端为一次查询）都在线程池中执行，
+    # 不阻塞事件循环上的其他请求
+    await _in_thread(purge_expired_downloads)
+    info = await _in_thread(store.stat, download_id)
+    if info is None or info[1] < time.time() - flask_app.config['DOWNLOAD_RETENTION']:
+        return JSONResponse({'error': '文件不存在或已过期'}, status_code=404)
+    size, mtime = info
+
+    digest = await _in_thread(content_etag, download_id)
+    if digest is None:
+        return JSONResponse({'error': '文件不存在或已过期'}, status_code=404)
+    etag = f'"{digest}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache, max-age=0',
+        'Accept-Ranges': 'bytes',
+    }
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+
+    disposition = f"attachment; filename*=UTF-8''{quote(filename)}"
+    local_path = store.local_path(download_id)
+
+    accel_prefix = flask_app.config['X_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix and local_path:
+        headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{download_id}.docx"
+        headers['Content-Disposition'] = disposition
+        return Response(media_type=media_type, headers=headers)
+
+    if local_path:
+        # FileResponse 自行处理 Range，并在服务器支持时使用 sendfile
+        return FileResponse(
+            local_path, media_type=media_type, filename=filename, headers=headers,
+        )
+
+    fileobj = await _in_thread(store.open, download_id)
+    if fileobj is None:
+        return JSONResponse({'error': '文件不存在或已过期'}, status_code=404)
+
+    headers['Content-Disposition'] = disposition
+    byte_range = _parse_range(request.headers.get('range'), size)
+    if byte_range:
+        start, end = byte_range
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(end - start + 1)
+        return StreamingResponse(
+            _iter_file(fileobj, start, end - start + 1),
+            status_code=206, media_type=media_type, headers=headers,
+        )
+    headers['Content-Length'] = str(size)
+    return StreamingResponse(
+        _iter_file(fileobj, 0, size), media_type=media_type, headers=headers,
+    )
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/convert', convert, methods=['POST']),
+        Route('/profiles', profiles),
+        Route('/metrics', metrics),
+        Route('/download/{download_id}', download),
+        Route('/static/{path:path}', static, name='static'),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5001)
@@ -0,0 +1,154 @@
+"""
+基准测试用的 Markdown 语料生成器
+所有生成器都是确定性的，便于多次运行之间对比
+"""
+
+_PARAGRAPH = (
+    '这是一段用于性能测试的正文，包含 **粗体**、*斜体*、`行内代码` '
+    '和 [链接](https://example.com)。The quick brown fox jumps over the lazy dog.\n\n'
+)
+
+_LIST = (
+    '- 第一项 **重点**\n'
+    '- 第二项\n'
+    '  - 嵌套项\n'
+    '1. 有序项\n'
+    '2. 有序项\n\n'
+)
+
+_TABLE_HEADER = '| 编号 | 名称 | 说明 |\n|------|------|------|\n'
+
+_CODE = '```python\ndef f(x):\n    return x * 2\n```\n\n'
+
+_FORMULA = '公式 $\\alpha + \\beta = \\frac{1}{2}$ 与 $x^2 + y_1 \\leq \\sqrt{z}$。\n\n'
+
+
+def _repeat_until(parts, target_bytes):
+    """循环拼接片段，直到 UTF-8 长度达到 target_bytes"""
+    chunks = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        chunk = parts[i % len(parts)]
+        if callable(chunk):
+            chunk = chunk(i)
+        chunks.append(chunk)
+        size += len(chunk.encode('utf-8'))
+        i += 1
+    return ''.join(chunks)
+
+
+def _heading(i):
+    return f'## 第 {i} 节\n\n'
+
+
+def _table(i, rows=10):
+    body = ''.join(f'| {i}-{r} | 项目 {r} | 说明文字 {r} |\n' for r in range(rows))
+    return _TABLE_HEADER + body + '\n'
+
+
+def mixed_document(target_bytes):
+    """混合各类块级元素的文档"""
+    return _repeat_until(
+        [_heading, _PARAGRAPH, _LIST, _PARAGRAPH, _table, _CODE, _FORMULA],
+        target_bytes,
+    )
+
+
+_CJK_PARAGRAPH = (
+    '在实际使用中，从网页或对话工具复制的中文文本通常带有大量换行，\n'
+    '每一行都会被拆成独立的片段；其中还夹杂着**重点内容**、*强调*、\n'
+    '全角标点（！？；：）以及 $\\frac{1}{2}$ 这样的公式和 1 < 2 之类的符号。\n'
+    '这些片段格式相同时应当合并为同一个 run，以减少文档体积。\n\n'
+)
+
+
+def cjk_document(target_bytes):
+    """以中文为主、包含大量软换行和行内格式的文档"""
+    return _repeat_until([_heading, _CJK_PARAGRAPH, _CJK_PARAGRAPH, _LIST], target_bytes)
+
+
+_NOTE = (
+    '# 会议记录\n\n'
+    '- 时间：周一上午\n'
+    '- 参会：产品、研发、测试\n\n'
+    '本周重点是**发布准备**，请各位在周三前完成自测。\n'
+)
+
+_FORMULA_PARAGRAPH = (
+    '设 $f(x) = \\frac{x^2 + 1}{\\sqrt{x}}$，则当 $x \\geq 1$ 时有 '
+    '$\\sum_{i=1}^{n} \\alpha_i \\leq \\frac{\\pi}{2}$。\n\n'
+    '$$\n\\int_0^1 \\frac{1}{1 + x^2} dx = \\frac{\\pi}{4}\n$$\n\n'
+)
+
+
+def note_document():
+    """短小的笔记（约 150 字节），模拟日常的小文档"""
+    return _NOTE
+
+
+def formula_document(target_bytes):
+    """公式密集的文档"""
+    return _repeat_until([_heading, _FORMULA_PARAGRAPH, _FORMULA], target_bytes)
+
+
+def table_document(target_bytes, rows_per_table=500):
+    """由超长表格组成的文档"""
+    return _repeat_until([lambda i: _table(i, rows_per_table)], target_bytes)
+
+
+def _list_block(i):
+    """十个项目符号项（含嵌套）加十个有序项"""
+    bullets = ''.join(
+        f'- 第 {i}-{n} 项 **要点**\n' + (f'  - 嵌套 {n}\n' if n % 3 == 0 else '')
+        for n in range(7)
+    )
+    ordered = ''.join(f'{n}. 步骤 {n}：执行操作\n' for n in range(1, 11))
+    return bullets + '\n' + ordered + '\n'
+
+
+def list_document(target_bytes):
+    """由大量列表项组成的文档（无序、嵌套与有序列表交替）"""
+    return _repeat_until([_list_block], target_bytes)
+
+
+# 病态输入：公式定界符与花括号的最坏情况。
+# 每个生成器接收重复次数 n，文本长度与 n 成正比，转换耗时也应与 n 成正比
+PATHOLOGICAL_CASES = {
+    # 大量没有结束的 $$ 段落
+    'unclosed_display': lambda n: '$$ 没有结束的展示公式\n\n' * n,
+    # 每个列表项都以没有结束的 $$ 开头
+    'list_dollars': lambda n: '- $$a\n' * n,
+    # 未放进代码块的 shell 脚本
+    'shell_script': lambda n: 'export PATH=$HOME/bin:$PATH && echo "$1 ${USER} $$"\n' * n,
+    # 金额、转义与成对不成对的 $ 混杂在同一段
+    'dollar_soup': lambda n: '$5 和 $10 $x$1 $$y$$2 \\$z$ $$$ ' * n,
+    # 一个开始的 $ 之后跟着大量转义的 \$
+    'escaped_dollars': lambda n: '$a' + ' \\$b' * n,
+    # 单个公式中层层嵌套的花括号
+    'nested_braces': lambda n: '$' + '{' * n + 'x' + '}' * n + '$',
+    # 单个超长公式
+    'long_formula': lambda n: '$' + '\\alpha + ' * n + 'x$',
+    # 大量恰好处在嵌套层数上限的分数
+    'deep_fractions': lambda n: ('$' + '\\frac{' * 12 + 'x' + '}{y}' * 12 + '$ ') * n,
+}
+
+
+def pathological_document(name, n):
+    """生成 PATHOLOGICAL_CASES 中名为 name 的输入，重复 n 次"""
+    return PATHOLOGICAL_CASES[name](n)
+
+
+def _log_section(i, lines=50):
+    """一节日志：标题加 lines 条以空行分隔的日志行（每行一个段落）"""
+    entries = ''.join(
+        f'2024-05-{i % 28 + 1:02d} 12:{n // 60 % 60:02d}:{n % 60:02d} INFO worker-{i % 8} '
+        f'处理请求 /api/items/{n} 耗时 {n % 97} ms\n\n'
+        for n in range(lines)
+    )
+    return f'## 日志片段 {i}\n\n' + entries
+
+
+def log_document(target_bytes, lines_per_section=50):
+    """由大量日志行组成的超长文档，每 lines_per_section 行一个标题"""
+    return _repeat_until([lambda i: _log_section(i, lines_per_section)], target_bytes)
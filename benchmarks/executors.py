@@ -0,0 +1,82 @@
+"""
+执行器扩展性基准测试
+分别用线程池和进程池并发转换同一批文档，比较不同并发数下的吞吐量。
+
+普通 CPython 中线程受 GIL 限制，吞吐量基本不随线程数增长；
+在关闭 GIL 的自由线程构建（如 python3.13t -X gil=0）上运行可以看到线程池的扩展效果。
+
+使用方法:
+    python3 benchmarks/executors.py                          # 1 / 2 / 4 并发，各 16 篇
+    python3.13t -X gil=0 benchmarks/executors.py --workers 1 4 8 --docs 64 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import mixed_document  # noqa: E402
+from converter.api import gil_enabled  # noqa: E402
+
+
+def _warm():
+    from converter.docx_builder import warm_up
+    warm_up()
+
+
+def _convert(text):
+    """转换一篇文档，返回 .docx 大小（只回传整数，避免进程池传输结果的开销）"""
+    from converter.docx_builder import convert_markdown_to_docx
+    return convert_markdown_to_docx(text).getbuffer().nbytes
+
+
+def run_case(kind, workers, text, docs):
+    """用 workers 个线程或进程转换 docs 篇文档，返回结果字典"""
+    executor_class = ThreadPoolExecutor if kind == 'thread' else ProcessPoolExecutor
+    with executor_class(max_workers=workers) as pool:
+        # 预热每个工作线程 / 进程，不计入耗时
+        for future in [pool.submit(_warm) for _ in range(workers)]:
+            future.result()
+        started = time.perf_counter()
+        list(pool.map(_convert, [text] * docs))
+        elapsed = time.perf_counter() - started
+    return {
+        'executor': kind,
+        'workers': workers,
+        'docs': docs,
+        'seconds': round(elapsed, 2),
+        'docs_per_second': round(docs / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 线程池与进程池扩展性对比')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='并发数')
+    parser.add_argument('--docs', type=int, default=16, help='每种配置转换的文档数')
+    parser.add_argument('--kb', type=int, default=16, help='文档大小（KB）')
+    parser.add_argument('--executors', nargs='+', default=['thread', 'process'],
+                        choices=['thread', 'process'], help='参与对比的执行器')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    text = mixed_document(args.kb * 1024)
+    results = [run_case(kind, workers, text, args.docs)
+               for kind in args.executors for workers in args.workers]
+
+    if args.json:
+        print(json.dumps({'gil_enabled': gil_enabled(), 'results': results}, indent=2))
+        return
+
+    print(f"GIL: {'开启' if gil_enabled() else '关闭'}，CPU 核心数: {os.cpu_count()}")
+    print(f"{'执行器':>8} {'并发':>6} {'耗时':>10} {'吞吐量':>12}")
+    for r in results:
+        print(f"{r['executor']:>8} {r['workers']:>6} {r['seconds']:>9.2f}s "
+              f"{r['docs_per_second']:>9.2f}篇/s")
+
+
+if __name__ == '__main__':
+    main()
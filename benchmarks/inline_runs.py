@@ -0,0 +1,62 @@
+"""
+行内 run 基准测试
+统计中文为主的文档生成的 run 数量与渲染耗时
+
+使用方法:
+    python3 benchmarks/inline_runs.py               # 默认 64KB 文档，运行 3 次
+    python3 benchmarks/inline_runs.py --kb 256 --runs 5 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import cjk_document  # noqa: E402
+from converter.docx_builder import DocxBuilder, warm_up  # noqa: E402
+from converter.doc_tree import build_tree  # noqa: E402
+from converter.md_parser import parse_markdown  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 行内 run 基准测试')
+    parser.add_argument('--kb', type=int, default=64, help='文档大小（KB）')
+    parser.add_argument('--runs', type=int, default=3, help='重复次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    warm_up()
+    text = cjk_document(args.kb * 1024)
+    tokens = parse_markdown(text)
+
+    timings = []
+    for _ in range(args.runs):
+        tree = build_tree(tokens)
+        builder = DocxBuilder()
+        started = time.perf_counter()
+        buffer = builder.render(tree)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    document_xml = zipfile.ZipFile(buffer).read('word/document.xml')
+    report = {
+        'input_kb': args.kb,
+        'paragraphs': document_xml.count(b'<w:p>') + document_xml.count(b'<w:p '),
+        'runs': document_xml.count(b'<w:r>') + document_xml.count(b'<w:r '),
+        'document_xml_bytes': len(document_xml),
+        'render_ms_median': round(statistics.median(timings), 1),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f'{key:<20} {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+公式识别与转换的病态输入测试
+对 corpus.PATHOLOGICAL_CASES 中的每种最坏情况，分别以 n、2n、4n 次重复，
+测量解析（md_parser 中的 dollarmath 规则与 bounded_math_block）和完整转换的耗时，
+由耗时随输入增长的倍数估计增长阶数（线性约为 1，平方约为 2）。
+
+任何一种输入的解析或转换增长阶数超过 --max-exponent 时以退出码 1 结束。
+
+使用方法:
+    python3 benchmarks/latex_worst_case.py                  # 每种输入 500 / 1000 / 2000 次重复
+    python3 benchmarks/latex_worst_case.py --n 1000 --cases list_dollars nested_braces --json
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import PATHOLOGICAL_CASES, pathological_document  # noqa: E402
+from converter.docx_builder import convert_markdown_to_docx, warm_up  # noqa: E402
+from converter.md_parser import parse_markdown  # noqa: E402
+from converter.latex_converter import (  # noqa: E402
+    MAX_FORMULA_DEPTH, MAX_FORMULA_LENGTH, MAX_FORMULA_WORK,
+)
+
+SCALES = (1, 2, 4)
+
+
+def _median_ms(func, text, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func(text)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _exponent(sizes, timings):
+    return math.log(timings[-1] / timings[0]) / math.log(sizes[-1] / sizes[0])
+
+
+def run_case(name, n, runs):
+    """以 n × SCALES 次重复解析并转换一种病态输入，返回结果字典"""
+    sizes = []
+    parse_ms = []
+    convert_ms = []
+    for scale in SCALES:
+        text = pathological_document(name, n * scale)
+        sizes.append(len(text))
+        parse_ms.append(_median_ms(parse_markdown, text, runs))
+        convert_ms.append(_median_ms(convert_markdown_to_docx, text, runs))
+    return {
+        'case': name,
+        'chars': sizes,
+        'parse_ms': [round(ms, 1) for ms in parse_ms],
+        'convert_ms': [round(ms, 1) for ms in convert_ms],
+        'parse_exponent': round(_exponent(sizes, parse_ms), 2),
+        'exponent': round(_exponent(sizes, convert_ms), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 公式识别与转换病态输入测试')
+    parser.add_argument('--n', type=int, default=500, help='最小规模的重复次数')
+    parser.add_argument('--runs', type=int, default=3, help='每种规模的重复转换次数（取中位数）')
+    parser.add_argument('--cases', nargs='+', default=list(PATHOLOGICAL_CASES),
+                        choices=list(PATHOLOGICAL_CASES), help='参与测试的输入')
+    parser.add_argument('--max-exponent', type=float, default=1.5,
+                        help='允许的最大增长阶数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    warm_up()
+    results = [run_case(name, args.n, args.runs) for name in args.cases]
+    failed = [r['case'] for r in results
+              if max(r['parse_exponent'], r['exponent']) > args.max_exponent]
+
+    if args.json:
+        print(json.dumps({'results': results, 'failed': failed}, indent=2))
+    else:
+        print(f'单个公式上限：{MAX_FORMULA_LENGTH} 字符，{MAX_FORMULA_DEPTH} 层花括号，'
+              f'工作量 {MAX_FORMULA_WORK} 字符')
+        print(f"{'输入':>18} {'字符数':>20} {'解析 (ms)':>24} {'阶数':>6} "
+              f"{'完整转换 (ms)':>26} {'阶数':>6}")
+        for r in results:
+            chars = ' / '.join(str(c) for c in r['chars'])
+            parse = ' / '.join(f'{m:.1f}' for m in r['parse_ms'])
+            convert = ' / '.join(f'{m:.1f}' for m in r['convert_ms'])
+            print(f"{r['case']:>18} {chars:>20} {parse:>24} {r['parse_exponent']:>6.2f} "
+                  f"{convert:>26} {r['exponent']:>6.2f}")
+        if failed:
+            print(f'  增长阶数超过 {args.max_exponent}: {", ".join(failed)}')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+长列表基准测试
+统计由数千个列表项组成的文档的渲染耗时、document.xml 与 .docx 体积，
+以及段落级缩进（w:ind）和间距（w:spacing）元素的数量
+
+使用方法:
+    python3 benchmarks/lists.py                      # 默认 2000 / 10000 项，运行 3 次
+    python3 benchmarks/lists.py --items 50000 --runs 1 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import _list_block  # noqa: E402
+from converter.docx_builder import DocxBuilder, warm_up  # noqa: E402
+from converter.doc_tree import build_tree, ListItem  # noqa: E402
+from converter.md_parser import parse_markdown  # noqa: E402
+
+# _list_block 每块包含的列表项数
+ITEMS_PER_BLOCK = 20
+
+
+def run_case(items, runs):
+    """渲染约 items 个列表项 runs 次，返回结果字典"""
+    blocks = max(1, items // ITEMS_PER_BLOCK)
+    tokens = parse_markdown(''.join(_list_block(i) for i in range(blocks)))
+
+    timings = []
+    for _ in range(runs):
+        tree = build_tree(tokens)
+        builder = DocxBuilder()
+        started = time.perf_counter()
+        buffer = builder.render(tree)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    document_xml = zipfile.ZipFile(buffer).read('word/document.xml')
+    return {
+        'items': sum(1 for node in tree if type(node) is ListItem),
+        'para_ind': document_xml.count(b'<w:ind '),
+        'para_spacing': document_xml.count(b'<w:spacing '),
+        'document_xml_kb': round(len(document_xml) / 1024, 1),
+        'docx_kb': round(buffer.getbuffer().nbytes / 1024, 1),
+        'render_ms_median': round(statistics.median(timings), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 长列表基准测试')
+    parser.add_argument('--items', type=int, nargs='+', default=[2000, 10000],
+                        help='列表项数量')
+    parser.add_argument('--runs', type=int, default=3, help='重复次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    warm_up()
+    results = [run_case(items, args.runs) for items in args.items]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'列表项':>8} {'w:ind':>8} {'w:spacing':>10} "
+          f"{'document.xml':>14} {'docx':>10} {'渲染':>10}")
+    for r in results:
+        print(f"{r['items']:>8} {r['para_ind']:>8} {r['para_spacing']:>10} "
+              f"{r['document_xml_kb']:>12.1f}KB {r['docx_kb']:>8.1f}KB "
+              f"{r['render_ms_median']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
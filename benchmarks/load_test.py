@@ -0,0 +1,307 @@
+"""
+HTTP 压力测试
+在本地启动 Web 服务（Flask 或 ASGI），以指定并发反复执行 /convert + /download，
+报告吞吐量、p50/p95/p99 延迟和错误率
+
+语料按权重混合三类文档：短笔记（note）、公式密集页面（formula）、超长表格（table）。
+每个请求的正文末尾附加一行序号，内容各不相同，服务端不会把并发请求合并为一次转换。
+
+使用方法:
+    python3 benchmarks/load_test.py                         # Flask，并发 4，共 40 次
+    python3 benchmarks/load_test.py --server asgi -c 16 -n 200 --json
+    python3 benchmarks/load_test.py --url http://10.0.0.5:5001 --duration 60
+    python3 benchmarks/load_test.py --mix note=8,formula=1,table=1 --table-kb 512
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import formula_document, note_document, table_document  # noqa: E402
+
+DEFAULT_MIX = 'note=6,formula=3,table=1'
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _start_server(kind, port, workers):
+    """在子进程中启动服务，返回 Popen 对象"""
+    env = dict(os.environ)
+    if workers:
+        env['MDFORWORD_WORKERS'] = str(workers)
+    if kind == 'asgi':
+        cmd = [sys.executable, '-m', 'uvicorn', 'asgi_app:app',
+               '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning']
+    else:
+        cmd = [sys.executable, '-m', 'flask', '--app', 'app', 'run',
+               '--host', '127.0.0.1', '--port', str(port), '--with-threads']
+    return subprocess.Popen(cmd, cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _wait_for_server(url, timeout=60.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'{url}/profiles', timeout=2).read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _parse_mix(spec):
+    """解析 'note=6,formula=3,table=1' 形式的权重"""
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ('note', 'formula', 'table'):
+            raise ValueError(f'未知的语料类型: {name}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def build_corpus(formula_kb, table_kb):
+    """按类型生成一次语料，所有请求复用"""
+    return {
+        'note': note_document(),
+        'formula': formula_document(formula_kb * 1024),
+        'table': table_document(table_kb * 1024),
+    }
+
+
+def _percentile(sorted_values, pct):
+    """最近秩法求百分位"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summary(samples, elapsed):
+    """samples: [(latency_ms, ok)] → 统计字典"""
+    latencies = sorted(ms for ms, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    count = len(samples)
+
+    def rounded(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        'requests': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': rounded(sum(latencies) / count) if count else None,
+        'p50_ms': rounded(_percentile(latencies, 50)),
+        'p95_ms': rounded(_percentile(latencies, 95)),
+        'p99_ms': rounded(_percentile(latencies, 99)),
+        'max_ms': rounded(latencies[-1]) if latencies else None,
+    }
+
+
+class LoadRunner:
+    """以固定并发执行请求并收集每次请求的延迟与结果"""
+
+    def __init__(self, url, corpus, weights, timeout=300.0, download=True, seed=0):
+        self.url = url.rstrip('/')
+        self.corpus = corpus
+        self.kinds = list(weights)
+        self.weights = [weights[k] for k in self.kinds]
+        self.timeout = timeout
+        self.download = download
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.samples = {'convert': [], 'download': []}
+        self.by_kind = {kind: [] for kind in self.kinds}
+        self.error_messages = {}
+        self._sequence = 0
+
+    def _pick(self):
+        """选择文档类型，返回 (类型, 本次请求的序号)"""
+        with self._lock:
+            self._sequence += 1
+            return self._random.choices(self.kinds, self.weights)[0], self._sequence
+
+    def _record(self, endpoint, started, ok, kind=None, error=None):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.samples[endpoint].append((elapsed, ok))
+            if kind is not None:
+                self.by_kind[kind].append((elapsed, ok))
+            if error:
+                key = f'{endpoint}: {error}'
+                self.error_messages[key] = self.error_messages.get(key, 0) + 1
+
+    def _request(self, req):
+        """执行请求，返回 (响应体, 错误描述)"""
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                return resp.read(), None
+        except urllib.error.HTTPError as e:
+            return None, f'HTTP {e.code}'
+        except OSError as e:
+            return None, type(e).__name__
+
+    def one_iteration(self):
+        """执行一次 /convert，成功后下载结果"""
+        kind, sequence = self._pick()
+        # 末尾的序号使每个请求的内容不同，测得的是实际转换而不是合并后的等待
+        markdown = f'{self.corpus[kind]}\n\n请求 {sequence}\n'
+        body = json.dumps({'markdown': markdown, 'filename': kind}).encode('utf-8')
+        req = urllib.request.Request(
+            f'{self.url}/convert', data=body,
+            headers={'Content-Type': 'application/json'},
+        )
+        started = time.perf_counter()
+        data, error = self._request(req)
+        download_id = None
+        if data is not None:
+            try:
+                download_id = json.loads(data)['download_id']
+            except (ValueError, KeyError):
+                error = 'invalid response'
+        self._record('convert', started, download_id is not None, kind, error)
+
+        if download_id is None or not self.download:
+            return
+        started = time.perf_counter()
+        data, error = self._request(
+            f'{self.url}/download/{download_id}?name={quote(kind + ".docx")}'
+        )
+        if data is not None and not data.startswith(b'PK'):
+            data, error = None, 'not a docx'
+        self._record('download', started, data is not None, error=error)
+
+    def run(self, concurrency, total=None, duration=None):
+        """运行 total 次迭代或持续 duration 秒，返回实际耗时（秒）"""
+        deadline = time.perf_counter() + duration if duration else None
+        remaining = [total or 0]
+
+        def claim():
+            with self._lock:
+                if deadline is not None:
+                    return time.perf_counter() < deadline
+                if remaining[0] <= 0:
+                    return False
+                remaining[0] -= 1
+                return True
+
+        def worker():
+            while claim():
+                self.one_iteration()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker) for _ in range(concurrency)]:
+                future.result()
+        return time.perf_counter() - started
+
+    def report(self, elapsed):
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'endpoints': {
+                name: _summary(samples, elapsed)
+                for name, samples in self.samples.items() if samples
+            },
+            'convert_by_corpus': {
+                kind: _summary(samples, elapsed)
+                for kind, samples in self.by_kind.items() if samples
+            },
+            'errors': self.error_messages,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word HTTP 压力测试')
+    parser.add_argument('--server', choices=('flask', 'asgi'), default='flask',
+                        help='在本地启动的服务类型')
+    parser.add_argument('--url', help='压测已运行的服务（不再启动本地服务）')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='ASGI 服务的进程池大小（MDFORWORD_WORKERS）')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='并发客户端数')
+    parser.add_argument('-n', '--requests', type=int, default=40, help='转换请求总数')
+    parser.add_argument('--duration', type=float, help='按时长运行（秒），优先于 -n')
+    parser.add_argument('--warmup', type=int, default=2, help='不计入统计的预热请求数')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'语料权重，默认 {DEFAULT_MIX}')
+    parser.add_argument('--formula-kb', type=int, default=16, help='公式页面大小（KB）')
+    parser.add_argument('--table-kb', type=int, default=256, help='超长表格文档大小（KB）')
+    parser.add_argument('--timeout', type=float, default=300.0, help='单个请求超时（秒）')
+    parser.add_argument('--no-download', action='store_true', help='只测试 /convert')
+    parser.add_argument('--seed', type=int, default=0, help='语料抽样的随机种子')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    weights = _parse_mix(args.mix)
+    corpus = build_corpus(args.formula_kb, args.table_kb)
+
+    server = None
+    url = args.url
+    if not url:
+        port = _free_port()
+        url = f'http://127.0.0.1:{port}'
+        server = _start_server(args.server, port, args.workers)
+    try:
+        if not _wait_for_server(url):
+            sys.exit(f'服务未能在 {url} 启动')
+
+        if args.warmup:
+            warm = LoadRunner(url, corpus, {'note': 1}, args.timeout, not args.no_download)
+            warm.run(1, total=args.warmup)
+
+        runner = LoadRunner(url, corpus, weights, args.timeout,
+                            not args.no_download, args.seed)
+        elapsed = runner.run(args.concurrency, total=args.requests, duration=args.duration)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    report = {
+        'server': 'external' if args.url else args.server,
+        'url': url,
+        'concurrency': args.concurrency,
+        'mix': weights,
+        'corpus_bytes': {k: len(v.encode('utf-8')) for k, v in corpus.items() if k in weights},
+        **runner.report(elapsed),
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"服务: {report['server']} ({url})  并发: {args.concurrency}  "
+          f"耗时: {report['elapsed_s']}s")
+    print(f"{'':<16} {'请求':>6} {'错误率':>8} {'吞吐(rps)':>10} "
+          f"{'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = list(report['endpoints'].items()) + [
+        (f'convert[{k}]', v) for k, v in report['convert_by_corpus'].items()
+    ]
+    for name, s in rows:
+        print(f"{name:<16} {s['requests']:>6} {s['error_rate']:>8.2%} "
+              f"{s['throughput_rps']:>10.2f} {s['p50_ms']:>7.1f}ms "
+              f"{s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms")
+    for message, count in report['errors'].items():
+        print(f'错误 {message}: {count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+转换内存基准测试
+在独立子进程中转换不同大小的文档，报告峰值 RSS 及每 MB 输入对应的峰值内存
+
+使用方法:
+    python3 benchmarks/memory.py                    # 默认 1 / 4 / 16 MB，普通与低内存模式
+    python3 benchmarks/memory.py --sizes 2 8 --json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _max_rss_mb():
+    """当前进程的峰值 RSS（MB）"""
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _child(input_path, low_memory, to_file):
+    """子进程：预热后转换一次，输出 JSON 结果"""
+    from converter.docx_builder import convert_markdown_to_docx, warm_up
+
+    warm_up()
+    with open(input_path, encoding='utf-8') as f:
+        text = f.read()
+    baseline = _max_rss_mb()
+
+    if to_file:
+        fd, out_path = tempfile.mkstemp(suffix='.docx')
+        os.close(fd)
+        convert_markdown_to_docx(text, out_path, low_memory=low_memory)
+        os.remove(out_path)
+    else:
+        buffer = convert_markdown_to_docx(text, low_memory=low_memory)
+        buffer.close()
+
+    print(json.dumps({'baseline_mb': baseline, 'peak_mb': _max_rss_mb()}))
+
+
+def run_case(input_path, input_mb, low_memory, to_file):
+    """运行一个测试用例，返回结果字典"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', input_path]
+    if low_memory:
+        cmd.append('--low-memory')
+    if to_file:
+        cmd.append('--to-file')
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    growth = result['peak_mb'] - result['baseline_mb']
+    return {
+        'input_mb': input_mb,
+        'mode': 'low_memory' if low_memory else 'default',
+        'output': 'file' if to_file else 'buffer',
+        'peak_rss_mb': round(result['peak_mb'], 1),
+        'growth_mb': round(growth, 1),
+        'peak_per_input_mb': round(growth / input_mb, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 转换内存基准测试')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 16],
+                        help='输入大小（MB）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--low-memory', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--to-file', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.low_memory, args.to_file)
+        return
+
+    from benchmarks.corpus import mixed_document
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            input_path = os.path.join(tmp, f'{size}mb.md')
+            with open(input_path, 'w', encoding='utf-8') as f:
+                f.write(mixed_document(int(size * 1024 * 1024)))
+            for low_memory, to_file in ((False, False), (True, False), (True, True)):
+                results.append(run_case(input_path, size, low_memory, to_file))
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'输入':>8} {'模式':<12} {'输出':<8} {'峰值RSS':>10} {'增长':>10} {'每MB输入':>10}")
+        for r in results:
+            print(f"{r['input_mb']:>6.2f}MB {r['mode']:<12} {r['output']:<8} "
+                  f"{r['peak_rss_mb']:>8.1f}MB {r['growth_mb']:>8.1f}MB "
+                  f"{r['peak_per_input_mb']:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
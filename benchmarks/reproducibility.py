@@ -0,0 +1,96 @@
+"""
+输出可复现性测试
+在多个独立子进程中（不同的 PYTHONHASHSEED，启动时刻错开超过一秒）以确定性输出
+转换同一批文档，比较各进程输出的 SHA-256：整篇 .docx 与分卷 ZIP 都应逐字节相同。
+
+任何文档的输出不一致时以退出码 1 结束。
+
+使用方法:
+    python3 benchmarks/reproducibility.py                    # 3 个进程
+    python3 benchmarks/reproducibility.py --processes 5 --kb 64 --json
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 分卷用例的每卷段落数预算
+VOLUME_PARAGRAPHS = 200
+
+
+def _documents(kb):
+    from benchmarks.corpus import (
+        cjk_document, formula_document, list_document, mixed_document, table_document,
+    )
+    return {
+        'mixed': mixed_document(kb * 1024),
+        'cjk': cjk_document(kb * 1024),
+        'formula': formula_document(kb * 1024),
+        'table': table_document(kb * 1024, rows_per_table=50),
+        'list': list_document(kb * 1024),
+    }
+
+
+def _child(kb):
+    """子进程：转换各文档，输出 {用例: SHA-256}"""
+    from converter.docx_builder import convert_markdown_to_docx, convert_markdown_to_volumes
+
+    digests = {}
+    for name, text in _documents(kb).items():
+        data = convert_markdown_to_docx(text, deterministic=True).getvalue()
+        digests[name] = hashlib.sha256(data).hexdigest()
+        output, _ = convert_markdown_to_volumes(text, max_paragraphs=VOLUME_PARAGRAPHS,
+                                                deterministic=True)
+        digests[f'{name}/volumes'] = hashlib.sha256(output.getvalue()).hexdigest()
+    print(json.dumps(digests))
+
+
+def run_process(index, kb):
+    """以 PYTHONHASHSEED=index 运行一个子进程，返回 {用例: SHA-256}"""
+    env = dict(os.environ, PYTHONHASHSEED=str(index))
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', '--kb', str(kb)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 输出可复现性测试')
+    parser.add_argument('--processes', type=int, default=3, help='子进程数')
+    parser.add_argument('--kb', type=int, default=16, help='文档大小（KB）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.kb)
+        return
+
+    runs = []
+    for index in range(args.processes):
+        if index:
+            # 错开保存时刻，时间戳进入输出时能被发现
+            time.sleep(1.1)
+        runs.append(run_process(index, args.kb))
+
+    cases = {name: sorted({run[name] for run in runs}) for name in runs[0]}
+    differing = sorted(name for name, digests in cases.items() if len(digests) > 1)
+
+    if args.json:
+        print(json.dumps({'processes': args.processes, 'digests': cases,
+                          'differing': differing}, indent=2))
+    else:
+        print(f'{args.processes} 个进程，{len(cases)} 个用例')
+        for name, digests in cases.items():
+            status = '一致' if len(digests) == 1 else f'{len(digests)} 种输出'
+            print(f'  {name:>16}  {digests[0][:16]}  {status}')
+    sys.exit(1 if differing else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+保存耗时基准测试
+对比 python-docx 的 Document.save 与复用模板压缩数据的 save_package，
+在小文档上两者差异最明显；另列出不经过 ZIP 压缩的 Flat OPC 输出（save_flat_package）
+
+使用方法:
+    python3 benchmarks/save.py                      # 默认 1 / 8 / 64 KB，每种 50 次
+    python3 benchmarks/save.py --kb 2 32 --runs 200 --json
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import mixed_document  # noqa: E402
+from converter.docx_builder import DocxBuilder, warm_up  # noqa: E402
+from converter.doc_tree import build_tree  # noqa: E402
+from converter.md_parser import parse_markdown  # noqa: E402
+from converter.package_writer import save_flat_package, save_package  # noqa: E402
+
+
+def _median_ms(func, runs):
+    timings = []
+    for _ in range(runs):
+        buffer = io.BytesIO()
+        started = time.perf_counter()
+        func(buffer)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), buffer.getbuffer().nbytes
+
+
+def run_case(kb, runs):
+    builder = DocxBuilder()
+    builder.render(build_tree(parse_markdown(mixed_document(kb * 1024))))
+
+    full_ms, full_size = _median_ms(builder.doc.save, runs)
+    fast_ms, fast_size = _median_ms(
+        lambda buffer: save_package(builder.doc, buffer, builder._template), runs
+    )
+    flat_ms, flat_size = _median_ms(
+        lambda buffer: save_flat_package(builder.doc, buffer, builder._template), runs
+    )
+    return {
+        'input_kb': kb,
+        'document_save_ms': round(full_ms, 2),
+        'save_package_ms': round(fast_ms, 2),
+        'flat_opc_ms': round(flat_ms, 2),
+        'speedup': round(full_ms / fast_ms, 2),
+        'document_save_bytes': full_size,
+        'save_package_bytes': fast_size,
+        'flat_opc_bytes': flat_size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 保存耗时基准测试')
+    parser.add_argument('--kb', type=int, nargs='+', default=[1, 8, 64], help='文档大小（KB）')
+    parser.add_argument('--runs', type=int, default=50, help='每种方式的重复次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    warm_up()
+    results = [run_case(kb, args.runs) for kb in args.kb]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'输入':>8} {'Document.save':>14} {'save_package':>14} {'加速':>8} "
+          f"{'Flat OPC':>12} {'Flat OPC 大小':>14}")
+    for r in results:
+        print(f"{r['input_kb']:>6}KB {r['document_save_ms']:>12.2f}ms "
+              f"{r['save_package_ms']:>12.2f}ms {r['speedup']:>7.2f}x "
+              f"{r['flat_opc_ms']:>10.2f}ms {r['flat_opc_bytes'] / 1024:>12.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
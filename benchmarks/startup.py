@@ -0,0 +1,113 @@
+"""
+桌面应用启动基准测试
+测量 time-to-window（窗口出现）和 time-to-first-conversion（首次转换完成）
+
+使用方法:
+    python3 benchmarks/startup.py                 # 开发目录布局（python3 run_app.py）
+    python3 benchmarks/startup.py --bundle        # py2app 打包产物（dist/MD to Word.app）
+    python3 benchmarks/startup.py --runs 10 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLE_EXECUTABLE = os.path.join(
+    ROOT, 'dist', 'MD to Word.app', 'Contents', 'MacOS', 'MD to Word'
+)
+SERVER_URL = 'http://127.0.0.1:5001'
+SAMPLE_MARKDOWN = '# 标题\n\n正文 **粗体** $\\frac{1}{2}$\n\n- 列表\n\n| a | b |\n|---|---|\n| 1 | 2 |\n'
+
+
+def _post_convert():
+    """发送一次转换请求，返回是否成功"""
+    body = json.dumps({'markdown': SAMPLE_MARKDOWN, 'filename': 'bench'}).encode('utf-8')
+    req = urllib.request.Request(
+        f'{SERVER_URL}/convert', data=body,
+        headers={'Content-Type': 'application/json'},
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.status == 200
+
+
+def run_once(command, timeout=60.0):
+    """启动一次应用，返回各阶段耗时（毫秒）"""
+    env = dict(os.environ, MDFORWORD_STARTUP_TRACE='1')
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        command, cwd=ROOT, env=env,
+        stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, text=True,
+    )
+    events = {}
+    try:
+        deadline = started + timeout
+        while 'server_ready' not in events or 'window_shown' not in events:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f'启动超时，已记录事件: {events}')
+            line = proc.stderr.readline()
+            if not line:
+                raise RuntimeError(f'进程提前退出，已记录事件: {events}')
+            if line.startswith('[startup] '):
+                _, name, _ = line.split()
+                # 以外部时钟为准，包含解释器自身的启动时间
+                events[name] = (time.perf_counter() - started) * 1000
+
+        _post_convert()
+        events['first_conversion'] = (time.perf_counter() - started) * 1000
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 桌面应用启动基准测试')
+    parser.add_argument('--bundle', action='store_true', help='测试 py2app 打包产物')
+    parser.add_argument('--runs', type=int, default=5, help='重复次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    if args.bundle:
+        if not os.path.exists(BUNDLE_EXECUTABLE):
+            sys.exit(f'未找到打包产物: {BUNDLE_EXECUTABLE}（请先执行 python3 setup_app.py py2app）')
+        command = [BUNDLE_EXECUTABLE]
+    else:
+        command = [sys.executable, os.path.join(ROOT, 'run_app.py')]
+
+    samples = [run_once(command) for _ in range(args.runs)]
+    report = {
+        'layout': 'bundle' if args.bundle else 'dev',
+        'runs': args.runs,
+    }
+    for key in ('window_shown', 'server_ready', 'first_conversion'):
+        values = [s[key] for s in samples if key in s]
+        if values:
+            report[f'{key}_ms'] = {
+                'median': round(statistics.median(values), 1),
+                'min': round(min(values), 1),
+                'max': round(max(values), 1),
+            }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"布局: {report['layout']}，运行 {args.runs} 次")
+        for key, label in (('window_shown', '窗口出现'),
+                           ('server_ready', '服务就绪'),
+                           ('first_conversion', '首次转换完成')):
+            stats = report.get(f'{key}_ms')
+            if stats:
+                print(f"  {label:<8} 中位数 {stats['median']:>8.1f} ms  "
+                      f"(min {stats['min']:.1f} / max {stats['max']:.1f})")
+
+
+if __name__ == '__main__':
+    main()
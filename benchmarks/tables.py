@@ -0,0 +1,75 @@
+"""
+大表格基准测试
+统计由超长表格组成的文档的渲染耗时、document.xml 与 .docx 体积，
+以及单元格级底色（w:shd）和内边距（w:tcMar）元素的数量
+
+使用方法:
+    python3 benchmarks/tables.py                     # 默认 1000 / 5000 行，运行 3 次
+    python3 benchmarks/tables.py --rows 20000 --runs 1 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import _table  # noqa: E402
+from converter.docx_builder import DocxBuilder, warm_up  # noqa: E402
+from converter.doc_tree import build_tree  # noqa: E402
+from converter.md_parser import parse_markdown  # noqa: E402
+
+
+def run_case(rows, runs):
+    """渲染一张 rows 行的表格 runs 次，返回结果字典"""
+    tokens = parse_markdown(_table(0, rows))
+
+    timings = []
+    for _ in range(runs):
+        tree = build_tree(tokens)
+        builder = DocxBuilder()
+        started = time.perf_counter()
+        buffer = builder.render(tree)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    document_xml = zipfile.ZipFile(buffer).read('word/document.xml')
+    return {
+        'rows': rows,
+        'cells': (rows + 1) * 3,
+        'cell_shd': document_xml.count(b'<w:shd '),
+        'cell_tcMar': document_xml.count(b'<w:tcMar>') + document_xml.count(b'<w:tcMar '),
+        'document_xml_kb': round(len(document_xml) / 1024, 1),
+        'docx_kb': round(buffer.getbuffer().nbytes / 1024, 1),
+        'render_ms_median': round(statistics.median(timings), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 大表格基准测试')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000],
+                        help='表格数据行数')
+    parser.add_argument('--runs', type=int, default=3, help='重复次数')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    warm_up()
+    results = [run_case(rows, args.runs) for rows in args.rows]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'行数':>8} {'单元格':>8} {'w:shd':>8} {'w:tcMar':>8} "
+          f"{'document.xml':>14} {'docx':>10} {'渲染':>10}")
+    for r in results:
+        print(f"{r['rows']:>8} {r['cells']:>8} {r['cell_shd']:>8} {r['cell_tcMar']:>8} "
+              f"{r['document_xml_kb']:>12.1f}KB {r['docx_kb']:>8.1f}KB "
+              f"{r['render_ms_median']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+线程安全压力测试
+在冷启动的进程中用线程池同时转换多种文档（首次使用时的延迟初始化也处于并发之下），
+再逐个单线程转换作为参照，检查每次并发转换的输出是否与参照完全一致。
+
+转换使用确定性输出，逐字节比较；不一致时报告内容不同的部件，并以退出码 1 结束。
+
+使用方法:
+    python3 benchmarks/thread_safety.py                     # 8 线程，每种文档 20 次
+    python3 benchmarks/thread_safety.py --threads 32 --rounds 50 --json
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import (  # noqa: E402
+    cjk_document, formula_document, mixed_document, note_document, table_document,
+)
+
+
+def _documents(kb):
+    """各类文档：覆盖列表、引用、代码、表格、公式与 CJK 文本"""
+    return {
+        'note': note_document(),
+        'mixed': mixed_document(kb * 1024),
+        'cjk': cjk_document(kb * 1024),
+        'formula': formula_document(kb * 1024),
+        'table': table_document(kb * 1024, rows_per_table=50),
+    }
+
+
+def _parts(data):
+    """.docx 字节 → {部件名: 内容}"""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {info.filename: zf.read(info) for info in zf.infolist()}
+
+
+def _convert(text, low_memory):
+    from converter.docx_builder import convert_markdown_to_docx
+
+    buffer = io.BytesIO()
+    convert_markdown_to_docx(text, buffer, low_memory=low_memory, deterministic=True)
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 线程安全压力测试')
+    parser.add_argument('--threads', type=int, default=8, help='并发线程数')
+    parser.add_argument('--rounds', type=int, default=20, help='每种文档的转换次数')
+    parser.add_argument('--kb', type=int, default=8, help='文档大小（KB）')
+    parser.add_argument('--seed', type=int, default=0, help='打乱任务顺序的随机种子')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    documents = _documents(args.kb)
+    jobs = [(name, i % 2 == 1) for name in documents for i in range(args.rounds)]
+    random.Random(args.seed).shuffle(jobs)
+
+    # 先并发（冷启动），再取单线程参照
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        outputs = list(pool.map(lambda job: _convert(documents[job[0]], job[1]), jobs))
+    concurrent_s = time.perf_counter() - started
+
+    references = {name: _convert(text, False) for name, text in documents.items()}
+
+    mismatches = {}
+    for (name, _), data in zip(jobs, outputs):
+        if data == references[name]:
+            continue
+        parts = _parts(data)
+        reference = _parts(references[name])
+        # 部件内容都相同时差异在 ZIP 条目的元数据（时间、顺序等）
+        differing = sorted(n for n in parts.keys() | reference.keys()
+                           if parts.get(n) != reference.get(n)) or ['<ZIP 元数据>']
+        mismatches.setdefault(name, set()).update(differing)
+
+    report = {
+        'threads': args.threads,
+        'conversions': len(jobs),
+        'concurrent_seconds': round(concurrent_s, 2),
+        'mismatched': {name: sorted(parts) for name, parts in mismatches.items()},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['conversions']} 次转换，{args.threads} 线程，"
+              f"耗时 {report['concurrent_seconds']:.2f}s")
+        if mismatches:
+            for name, parts in report['mismatched'].items():
+                print(f'  不一致: {name}: {", ".join(parts)}')
+        else:
+            print('  全部输出与单线程参照一致')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
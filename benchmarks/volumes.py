@@ -0,0 +1,128 @@
+"""
+分卷输出基准测试
+在独立子进程中转换超长日志文档：整篇输出一个 .docx 与按段落数预算分卷输出 ZIP，
+报告卷数、耗时、输出大小、峰值 RSS 以及最大一卷的段落数。
+
+使用方法:
+    python3 benchmarks/volumes.py                                  # 4 MB 日志，不分卷 / 每卷 5000 段
+    python3 benchmarks/volumes.py --mb 8 --max-paragraphs 0 2000 10000 --json
+"""
+import argparse
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def _max_rss_mb():
+    """当前进程的峰值 RSS（MB）"""
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _paragraph_counts(path, volumes):
+    """各卷 document.xml 中的段落数"""
+    def count(docx):
+        with zipfile.ZipFile(docx) as zf:
+            return len(re.findall(rb'<w:p[ >]', zf.read('word/document.xml')))
+
+    if volumes == 1:
+        return [count(path)]
+    with zipfile.ZipFile(path) as zf:
+        return [count(io.BytesIO(zf.read(info))) for info in zf.infolist()]
+
+
+def _child(input_path, max_paragraphs):
+    """子进程：预热后转换一次，输出 JSON 结果"""
+    from converter.docx_builder import convert_markdown_to_volumes, warm_up
+
+    warm_up()
+    with open(input_path, encoding='utf-8') as f:
+        text = f.read()
+    baseline = _max_rss_mb()
+
+    fd, out_path = tempfile.mkstemp(suffix='.out')
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        _, volumes = convert_markdown_to_volumes(text, out_path, max_paragraphs=max_paragraphs,
+                                                 low_memory=True)
+        elapsed = time.perf_counter() - started
+        peak = _max_rss_mb()
+        size = os.path.getsize(out_path)
+        paragraphs = _paragraph_counts(out_path, volumes)
+    finally:
+        os.remove(out_path)
+
+    print(json.dumps({
+        'volumes': volumes,
+        'seconds': elapsed,
+        'output_bytes': size,
+        'largest_volume_paragraphs': max(paragraphs),
+        'baseline_mb': baseline,
+        'peak_mb': peak,
+    }))
+
+
+def run_case(input_path, max_paragraphs):
+    """运行一个测试用例，返回结果字典"""
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', input_path,
+           '--max-paragraphs', str(max_paragraphs)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    return {
+        'max_paragraphs': max_paragraphs,
+        'volumes': result['volumes'],
+        'seconds': round(result['seconds'], 2),
+        'output_mb': round(result['output_bytes'] / (1024 * 1024), 2),
+        'largest_volume_paragraphs': result['largest_volume_paragraphs'],
+        'peak_growth_mb': round(result['peak_mb'] - result['baseline_mb'], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MD → Word 分卷输出基准测试')
+    parser.add_argument('--mb', type=float, default=4, help='日志文档大小（MB）')
+    parser.add_argument('--max-paragraphs', type=int, nargs='+', default=[0, 5000],
+                        help='每卷段落数预算（0 表示不分卷）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.max_paragraphs[0])
+        return
+
+    from benchmarks.corpus import log_document
+
+    fd, input_path = tempfile.mkstemp(suffix='.md')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(log_document(int(args.mb * 1024 * 1024)))
+    try:
+        results = [run_case(input_path, budget) for budget in args.max_paragraphs]
+    finally:
+        os.remove(input_path)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'每卷预算':>8} {'卷数':>6} {'耗时':>9} {'输出':>9} {'最大卷段落':>10} {'峰值增长':>10}")
+    for r in results:
+        budget = r['max_paragraphs'] or '不分卷'
+        print(f"{budget:>8} {r['volumes']:>6} {r['seconds']:>8.2f}s {r['output_mb']:>7.2f}MB "
+              f"{r['largest_volume_paragraphs']:>10} {r['peak_growth_mb']:>8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,2 @@
 # Markdown to Word converter package
+from .api import convert, convert_async, ConversionStats  # noqa: F401
@@ -0,0 +1,195 @@
+"""
+转换库接口
+面向嵌入其他服务的调用方：输入可以是文本、路径、文本流或分块迭代器，
+输出可以是路径或任意二进制文件对象；同时提供 asyncio 版本并返回转换统计。
+
+    from converter import convert, convert_async
+
+    stats = convert(Path('in.md'), 'out.docx')
+    stats = await convert_async(request_stream, response_body, profile='corporate')
+
+转换器可在多个线程中并发调用。普通 CPython 中线程受 GIL 限制，CPU 密集的转换
+需要进程池才能用满多核；在关闭 GIL 的自由线程构建（python3.13t 等）上，
+线程池即可随核心数扩展。
+"""
+import asyncio
+import codecs
+import functools
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+
+def gil_enabled():
+    """当前解释器是否启用了 GIL（自由线程构建关闭 GIL 时返回 False）"""
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else is_enabled()
+
+
+# 异步接口默认使用的线程池大小（MDFORWORD_WORKERS 可覆盖）；
+# 没有 GIL 时线程可以并行转换，默认用满所有核心
+DEFAULT_WORKERS = int(os.environ.get('MDFORWORD_WORKERS', 0)) or (
+    min(4, os.cpu_count() or 1) if gil_enabled() else (os.cpu_count() or 1)
+)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ConversionStats:
+    """单次转换的统计信息"""
+    __slots__ = ('input_chars', 'tokens', 'blocks', 'tables', 'runs',
+                 'parse_ms', 'render_ms', 'total_ms')
+
+    def __init__(self):
+        self.input_chars = 0
+        self.tokens = 0
+        self.blocks = 0
+        self.tables = 0
+        self.runs = 0
+        self.parse_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f'ConversionStats({self.as_dict()})'
+
+
+def _no_phase(name):
+    return nullcontext()
+
+
+def _join_chunks(chunks, encoding='utf-8'):
+    """拼接 str / bytes 分块；bytes 分块经增量解码，跨块的多字节字符也能正确解码"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = [decoder.decode(c) if isinstance(c, bytes) else c for c in chunks]
+    parts.append(decoder.decode(b'', final=True))
+    return ''.join(parts)
+
+
+def _read_source(source, encoding='utf-8'):
+    """
+    将各种输入形式读取为 Markdown 文本
+
+    - str: Markdown 文本本身
+    - os.PathLike（如 pathlib.Path）: 文件路径
+    - 具有 read() 的对象: 文本流或二进制流
+    - 其他可迭代对象: str 或 bytes 分块
+    """
+    if isinstance(source, str):
+        return source
+    if isinstance(source, os.PathLike):
+        with open(source, encoding=encoding) as f:
+            return f.read()
+    if hasattr(source, 'read'):
+        data = source.read()
+        return data.decode(encoding) if isinstance(data, bytes) else data
+    # 分块迭代器 — Markdown 解析需要完整文本，这里只做一次拼接
+    return _join_chunks(source, encoding)
+
+
+def convert(source, output, profile=None, low_memory=False, encoding='utf-8',
+            profiler=None, deterministic=False, output_format='docx'):
+    """
+    将 Markdown 转换为 Word 文档并写入 output
+
+    Args:
+        source: Markdown 文本、路径（os.PathLike）、文本/二进制流或分块迭代器
+        output: 目标路径或可写的二进制文件对象
+        profile: 样式方案名称
+        low_memory: 低内存模式（见 DocxBuilder.build）
+        encoding: 读取路径、二进制流或 bytes 分块时使用的编码
+        profiler: 可选的 profiling.ConversionProfiler，记录分阶段与按类型的耗时
+        deterministic: 确定性输出，相同的输入与选项总是得到逐字节相同的 .docx
+        output_format: 'docx' 或 'flat-opc'（单个 XML 文档，见 docx_builder.OUTPUT_FORMATS）
+
+    Returns:
+        ConversionStats
+    """
+    from .docx_builder import DocxBuilder
+    from .doc_tree import build_tree, Table
+    from .md_parser import parse_markdown
+
+    stats = ConversionStats()
+    started = time.perf_counter()
+
+    phase = profiler.phase if profiler is not None else _no_phase
+
+    text = _read_source(source, encoding)
+    stats.input_chars = len(text)
+    with phase('parse'):
+        tokens = parse_markdown(text)
+    del text
+    stats.tokens = len(tokens)
+    if profiler is not None:
+        profiler.count_tokens(tokens)
+    with phase('tree'):
+        tree = build_tree(tokens, release=low_memory)
+    del tokens
+    stats.blocks = len(tree)
+    stats.tables = sum(1 for node in tree if type(node) is Table)
+    parsed = time.perf_counter()
+
+    builder = DocxBuilder(profile, profiler, deterministic, output_format)
+    builder.render(tree, output, low_memory)
+    stats.runs = builder.run_count()
+    finished = time.perf_counter()
+
+    stats.parse_ms = (parsed - started) * 1000
+    stats.render_ms = (finished - parsed) * 1000
+    stats.total_ms = (finished - started) * 1000
+    return stats
+
+
+def get_executor():
+    """返回异步接口共用的线程池（首次调用时创建）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DEFAULT_WORKERS, thread_name_prefix='mdforword'
+            )
+        return _executor
+
+
+def shutdown_executor(wait=True):
+    """关闭共用线程池（如在服务退出时调用）"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+async def convert_async(source, output, profile=None, low_memory=False,
+                        encoding='utf-8', executor=None, profiler=None,
+                        deterministic=False, output_format='docx'):
+    """
+    convert 的 asyncio 版本：转换在执行器中运行，不阻塞事件循环
+
+    source 额外支持异步迭代器（如 aiohttp / Starlette 的请求体流），
+    分块在事件循环中收集完毕后再交给执行器。
+
+    Args:
+        executor: 自定义执行器；默认使用 get_executor() 返回的线程池。
+                  传入进程池时 source 和 output 必须可序列化（文本或路径）
+
+    Returns:
+        ConversionStats
+    """
+    if hasattr(source, '__aiter__'):
+        chunks = []
+        async for chunk in source:
+            chunks.append(chunk)
+        source = _join_chunks(chunks, encoding)
+
+    loop = asyncio.get_running_loop()
+    call = functools.partial(convert, source, output, profile, low_memory, encoding,
+                             profiler, deterministic, output_format)
+    return await loop.run_in_executor(executor or get_executor(), call)
@@ -0,0 +1,357 @@
+"""
+文档中间表示模块
+将 markdown-it-py 的 Token 流一次性整理为紧凑的块级节点树，
+渲染器按节点类型分派处理，无需再在渲染过程中维护列表、引用、表格等状态。
+
+节点类均使用 __slots__，体积小，且可直接 pickle，便于缓存或跨进程传递。
+每个块级节点的 lines 记录其在源文本中的行范围（markdown-it 的 Token.map，
+[起始行, 结束行)，从 0 开始），供性能分析定位慢块。
+"""
+
+# 渲染器会处理的行内 Token 类型，其余类型在建树时直接丢弃
+INLINE_TYPES = frozenset({
+    'text', 'code_inline',
+    'strong_open', 'strong_close',
+    'em_open', 'em_close',
+    's_open', 's_close',
+    'link_open', 'link_close',
+    'softbreak', 'hardbreak',
+    'image',
+    'math_inline', 'math_inline_double',
+})
+
+
+class Inline:
+    """行内片段（对应 inline Token 的一个子节点）"""
+    __slots__ = ('type', 'content', 'attrs')
+
+    def __init__(self, type, content='', attrs=None):
+        self.type = type
+        self.content = content
+        self.attrs = attrs  # 仅链接和图片保留属性字典，其余为 None
+
+    def __repr__(self):
+        return f'Inline({self.type!r}, {self.content!r})'
+
+
+class Block:
+    """块级节点基类"""
+    __slots__ = ('lines',)
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Heading(Block):
+    """标题"""
+    __slots__ = ('level', 'inlines', 'text')
+
+    def __init__(self, level, inlines, text):
+        self.level = level
+        self.inlines = inlines  # Inline 元组；为空时使用 text
+        self.text = text
+
+
+class Paragraph(Block):
+    """普通段落，也用作表格单元格内容"""
+    __slots__ = ('inlines', 'text')
+
+    def __init__(self, inlines, text):
+        self.inlines = inlines
+        self.text = text
+
+
+class ListItem(Block):
+    """列表项段落"""
+    __slots__ = ('inlines', 'text', 'level', 'ordered', 'number', 'continued')
+
+    def __init__(self, inlines, text, level, ordered, number, continued=False):
+        self.inlines = inlines
+        self.text = text
+        self.level = level      # 嵌套层级，从 1 开始
+        self.ordered = ordered
+        self.number = number    # 有序列表序号（无序列表为 0）
+        self.continued = continued  # 同一列表项中第一段之后的段落，不带编号
+
+
+class Quote(Block):
+    """引用块段落"""
+    __slots__ = ('inlines', 'text')
+
+    def __init__(self, inlines, text):
+        self.inlines = inlines
+        self.text = text
+
+
+class CodeBlock(Block):
+    """代码块"""
+    __slots__ = ('code', 'language')
+
+    def __init__(self, code, language):
+        self.code = code
+        self.language = language
+
+
+class Table(Block):
+    """表格：rows 为行列表，每个单元格是 Paragraph 元组"""
+    __slots__ = ('rows',)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+
+class MathBlock(Block):
+    """独立成段的公式（$$...$$），latex 为未转换的公式内容"""
+    __slots__ = ('latex',)
+
+    def __init__(self, latex):
+        self.latex = latex
+
+
+class Rule(Block):
+    """水平线"""
+    __slots__ = ()
+
+
+def _lines(token):
+    """Token.map → (起始行, 结束行) 元组，无位置信息时为 None"""
+    return tuple(token.map) if token.map else None
+
+
+def _inline_content(token):
+    """提取 inline Token 的内容，返回 (Inline 元组, 原始文本)"""
+    children = token.children
+    if not children:
+        return (), token.content
+    inlines = tuple(
+        Inline(c.type, c.content, dict(c.attrs) if c.attrs else None)
+        for c in children
+        if c.type in INLINE_TYPES
+    )
+    return inlines, ''
+
+
+def build_tree(tokens, release=False):
+    """
+    将 Token 流转换为块级节点列表
+
+    Args:
+        tokens: markdown-it-py 解析出的 Token 列表
+        release: 为 True 时在消费后将列表中的 Token 置为 None，
+                 使其尽早被回收（低内存模式）
+
+    Returns:
+        Block 节点列表
+    """
+    blocks = []
+
+    # 建树过程中的状态
+    list_level = 0
+    ordered_list = False
+    list_counter = {}  # 用于跟踪有序列表计数
+    item_started = False  # 当前列表项的第一段尚未出现
+    in_blockquote = False
+    table_rows = []
+    table_lines = None
+    current_row = []
+    current_cell = []
+
+    count = len(tokens)
+    i = 0
+    while i < count:
+        token = tokens[i]
+        token_type = token.type
+        if release:
+            # 标题和段落会向后读取 inline Token，一并在下面释放
+            tokens[i] = None
+
+        # ---- 标题 ----
+        if token_type == 'heading_open':
+            i += 1
+            inlines, text = _inline_content(tokens[i])
+            node = Heading(int(token.tag[1]), inlines, text)
+            node.lines = _lines(token)
+            blocks.append(node)
+            if release:
+                tokens[i] = None
+            i += 1  # 跳过 heading_close
+
+        # ---- 段落 ----
+        elif token_type == 'paragraph_open':
+            i += 1
+            if i >= count:
+                break
+            inlines, text = _inline_content(tokens[i])
+            if release:
+                tokens[i] = None
+            if list_level > 0:
+                number = list_counter.get(list_level, 0) if ordered_list else 0
+                node = ListItem(inlines, text, list_level, ordered_list, number,
+                                not item_started)
+                item_started = False
+            elif in_blockquote:
+                node = Quote(inlines, text)
+            else:
+                node = Paragraph(inlines, text)
+            node.lines = _lines(token)
+            blocks.append(node)
+            i += 1  # 跳过 paragraph_close
+
+        # ---- 代码块 ----
+        elif token_type == 'fence' or token_type == 'code_block':
+            language = token.info.strip() if token.info else ""
+            node = CodeBlock(token.content.rstrip('\n'), language)
+            node.lines = _lines(token)
+            blocks.append(node)
+
+        # ---- 块级公式 ----
+        elif token_type == 'math_block' or token_type == 'math_block_label':
+            node = MathBlock(token.content.strip())
+            node.lines = _lines(token)
+            blocks.append(node)
+
+        # ---- 无序列表 ----
+        elif token_type == 'bullet_list_open':
+            list_level += 1
+            ordered_list = False
+
+        elif token_type == 'bullet_list_close':
+            list_level -= 1
+            # 回到外层列表：list_counter 中只有有序列表的层级
+            ordered_list = list_level in list_counter
+
+        # ---- 有序列表 ----
+        elif token_type == 'ordered_list_open':
+            list_level += 1
+            ordered_list = True
+            list_counter[list_level] = 0
+
+        elif token_type == 'ordered_list_close':
+            list_counter.pop(list_level, None)
+            list_level -= 1
+            ordered_list = list_level in list_counter
+
+        # ---- 列表项 ----
+        elif token_type == 'list_item_open':
+            item_started = True
+            if ordered_list and list_level in list_counter:
+                list_counter[list_level] += 1
+
+        # ---- 引用块 ----
+        elif token_type == 'blockquote_open':
+            in_blockquote = True
+
+        elif token_type == 'blockquote_close':
+            in_blockquote = False
+
+        # ---- 表格 ----
+        elif token_type == 'table_open':
+            table_rows = []
+            table_lines = _lines(token)
+
+        elif token_type == 'tr_open':
+            current_row = []
+
+        elif token_type == 'tr_close':
+            table_rows.append(current_row)
+
+        elif token_type == 'th_open' or token_type == 'td_open':
+            current_cell = []
+
+        elif token_type == 'th_close' or token_type == 'td_close':
+            current_row.append(tuple(current_cell))
+
+        elif token_type == 'inline':
+            # 表格单元格内容
+            cell = Paragraph(*_inline_content(token))
+            cell.lines = _lines(token)
+            current_cell.append(cell)
+
+        elif token_type == 'table_close':
+            if table_rows:
+                node = Table(table_rows)
+                node.lines = table_lines
+                blocks.append(node)
+            table_rows = []
+            current_row = []
+
+        # ---- 水平线 ----
+        elif token_type == 'hr':
+            node = Rule()
+            node.lines = _lines(token)
+            blocks.append(node)
+
+        i += 1
+
+    return blocks
+
+
+def _inlines_bytes(inlines, text):
+    if not inlines:
+        return len(text.encode('utf-8'))
+    return sum(len(inline.content.encode('utf-8')) for inline in inlines)
+
+
+def node_size(node):
+    """
+    估算块级节点渲染后的规模，用于分卷
+
+    Returns:
+        (Word 段落数, 文本的 UTF-8 字节数)；表格的每个单元格计一个段落
+    """
+    node_type = type(node)
+    if node_type is Table:
+        paragraphs = 0
+        size = 0
+        columns = max(len(row) for row in node.rows)
+        for row in node.rows:
+            paragraphs += columns
+            for cell in row:
+                for para in cell:
+                    size += _inlines_bytes(para.inlines, para.text)
+        return paragraphs, size
+    if node_type is CodeBlock:
+        return node.code.count('\n') + (2 if node.language else 1), len(node.code.encode('utf-8'))
+    if node_type is MathBlock:
+        return 1, len(node.latex.encode('utf-8'))
+    if node_type is Rule:
+        return 1, 0
+    return 1, _inlines_bytes(node.inlines, node.text)
+
+
+def split_volumes(tree, max_paragraphs=None, max_bytes=None):
+    """
+    按段落数与文本字节数预算，将节点列表划分为多卷
+
+    当前卷达到任一预算后，在下一个标题处开始新卷；超过预算两倍仍没有遇到标题时
+    （如不含标题的日志），在下一个块处开始新卷。单个块（如超长表格）不拆分。
+
+    Args:
+        tree: build_tree 生成的块级节点列表
+        max_paragraphs: 每卷的段落数预算，None 或 0 表示不限
+        max_bytes: 每卷的文本字节数预算，None 或 0 表示不限
+
+    Returns:
+        各卷第一个节点在 tree 中的下标列表（第一卷总是 0）
+    """
+    starts = [0]
+    if not max_paragraphs and not max_bytes:
+        return starts
+    max_paragraphs = max_paragraphs or float('inf')
+    max_bytes = max_bytes or float('inf')
+
+    paragraphs = 0
+    size = 0
+    for index, node in enumerate(tree):
+        if paragraphs or size:
+            full = paragraphs >= max_paragraphs or size >= max_bytes
+            overflow = paragraphs >= 2 * max_paragraphs or size >= 2 * max_bytes
+            if (full and type(node) is Heading) or overflow:
+                starts.append(index)
+                paragraphs = 0
+                size = 0
+        node_paragraphs, node_bytes = node_size(node)
+        paragraphs += node_paragraphs
+        size += node_bytes
+    return starts
@@ -2,8 +2,15 @@
 Word 文档生成模块
 将 markdown-it-py 解析的 Token 流转换为格式化的 Word 文档
 """
+import gc
 import io
 import re
+import tempfile
+import zipfile
+from copy import deepcopy
+from datetime import datetime, timezone
+from functools import lru_cache
+from time import perf_counter
 from docx import Document
 from docx.shared import Pt, Cm, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -11,7 +18,15 @@ from docx.enum.table import WD_TABLE_ALIGNMENT
 from docx.oxml.ns import qn, nsdecls
 from docx.oxml import parse_xml
 
-from .styles import Fonts, FontSizes, Colors, Spacing, PageLayout
+from .styles import get_profile
+from .latex_converter import FRAC_PLACEHOLDER_PATTERN, convert_latex
+from .package_writer import (
+    FIXED_DATE_TIME, PrecompressedTemplate, save_flat_package, save_package,
+)
+from .doc_tree import (
+    build_tree, split_volumes,
+    Heading, Paragraph, ListItem, Quote, CodeBlock, Table, MathBlock, Rule,
+)
 
 
 def _rgb_hex(color):
@@ -19,16 +34,16 @@ def _rgb_hex(color):
     return f'{color[0]:02X}{color[1]:02X}{color[2]:02X}'
 
 
+# XML 不兼容的控制字符（保留 \t(0x09), \n(0x0A), \r(0x0D)）
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+
+
 def _clean_text(text):
     """清理文本中 XML 不兼容的控制字符"""
     if not text:
         return text
-    # 保留 \t(0x09), \n(0x0A), \r(0x0D)，移除其他控制字符
-    return re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]', '', text)
-
+    return _CONTROL_CHARS.sub('', text)
 
-# 分数占位符正则
-FRAC_PATTERN = re.compile(r'⟦FRAC:(.+?):(.+?)⟧')
 
 # Office Math ML 命名空间
 MATH_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/math'
@@ -86,83 +101,304 @@ def _insert_omml_fraction(paragraph, numerator, denominator):
     paragraph._element.append(oMath)
 
 
-def _add_text_with_fractions(paragraph, text, set_run_fn=None):
+# 合并后的行内片段类型
+SEG_TEXT = 'text'
+SEG_CODE = 'code'
+SEG_IMAGE = 'image'
+
+
+def coalesce_inlines(children):
     """
-    处理含有分数占位符的文本，将普通文本添加为 run，
-    分数占位符替换为 OMML 数学分数。
+    将行内片段合并为尽量少的 run 片段
+
+    相邻且格式（粗体、斜体、删除线、链接）完全相同的文本合并为一段，
+    软换行和硬换行作为 '\n' 并入相邻文本；相邻的行内代码同样合并。
+    行内公式在这里由 LaTeX 转换为 Unicode 文本（分数为占位符），与普通文本一样合并。
 
     Args:
-        paragraph: 目标段落
-        text: 可能包含分数占位符的文本
-        set_run_fn: 可选的 run 样式设置函数 fn(run)
+        children: doc_tree.Inline 片段序列
 
     Returns:
-        是否包含分数（True/False）
+        [(片段类型, 文本, (粗体, 斜体, 删除线), 链接地址), ...]
     """
-    if not FRAC_PATTERN.search(text):
-        return False
-
-    parts = FRAC_PATTERN.split(text)
-    # parts 结构: [前文, 分子1, 分母1, 中间文本, 分子2, 分母2, ...]
-    i = 0
-    while i < len(parts):
-        if i % 3 == 0:
-            # 普通文本部分
-            if parts[i]:
-                run = paragraph.add_run(_clean_text(parts[i]))
-                if set_run_fn:
-                    set_run_fn(run)
-        elif i % 3 == 1:
-            # 分子，下一个是分母
-            numerator = parts[i]
-            denominator = parts[i + 1] if i + 1 < len(parts) else ''
-            _insert_omml_fraction(paragraph, numerator, denominator)
-            i += 1  # 跳过分母
-        i += 1
+    segments = []
+    bold = False
+    italic = False
+    strikethrough = False
+    link_url = None
+
+    # 当前正在累积的片段
+    kind = None
+    parts = []
+    fmt = None
+    link = None
+
+    for child in children:
+        child_type = child.type
+
+        if child_type == 'text' or child_type == 'softbreak' or child_type == 'hardbreak':
+            new_kind = SEG_TEXT
+            text = child.content if child_type == 'text' else '\n'
+            new_fmt = (bold, italic, strikethrough)
+        elif child_type == 'math_inline' or child_type == 'math_inline_double':
+            new_kind = SEG_TEXT
+            text = convert_latex(child.content)
+            new_fmt = (bold, italic, strikethrough)
+        elif child_type == 'code_inline':
+            new_kind = SEG_CODE
+            text = child.content
+            new_fmt = None
+        elif child_type == 'image':
+            # 图片只显示 alt 文字，单独成段
+            alt = child.attrs.get('alt', '') if child.attrs else ''
+            src = child.attrs.get('src', '') if child.attrs else ''
+            new_kind = SEG_IMAGE
+            text = f"[图片: {alt or src}]"
+            new_fmt = None
+        else:
+            if child_type == 'strong_open':
+                bold = True
+            elif child_type == 'strong_close':
+                bold = False
+            elif child_type == 'em_open':
+                italic = True
+            elif child_type == 'em_close':
+                italic = False
+            elif child_type == 's_open':
+                strikethrough = True
+            elif child_type == 's_close':
+                strikethrough = False
+            elif child_type == 'link_open':
+                link_url = child.attrs.get('href', '') if child.attrs else ''
+            elif child_type == 'link_close':
+                link_url = None
+            continue
+
+        if not text:
+            continue
+        if new_kind == kind and new_kind != SEG_IMAGE and new_fmt == fmt and link_url == link:
+            parts.append(text)
+            continue
+        if kind is not None:
+            segments.append((kind, ''.join(parts), fmt, link))
+        kind, parts, fmt, link = new_kind, [text], new_fmt, link_url
+
+    if kind is not None:
+        segments.append((kind, ''.join(parts), fmt, link))
+    return segments
+
+
+# 低内存模式下输出缓冲在内存中的上限，超出后溢写到临时文件
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+# 已编译模板的缓存上限（按样式方案名称，最近最少使用淘汰）
+TEMPLATE_CACHE_SIZE = 16
+
+# 模板中的表格样式：基于 Table Grid，表头底色与隔行底色由条件格式提供
+TABLE_STYLE_ID = 'MDTable'
+
+# 列表：段落样式（列表项间距）与编号定义。项目符号列表共用一个编号实例，
+# 每个有序列表各自新建一个编号实例，从 1 开始计数
+LIST_STYLE_ID = 'MDListParagraph'
+BULLET_ABSTRACT_ID = 20
+ORDERED_ABSTRACT_ID = 21
+BULLET_NUM_ID = 20
+ORDERED_NUM_BASE = 21
+# 编号定义的级数（Word 最多 9 级），更深的嵌套使用最后一级
+LIST_LEVELS = 9
+LIST_BULLETS = ('•', '◦', '▪', '▸')
+NUMBERING_PARTNAME = '/word/numbering.xml'
+CORE_PROPERTIES_PARTNAME = '/docProps/core.xml'
+
+# 输出格式：docx（ZIP 包）或 flat-opc（整个包写成一个 XML 文档，供处理 XML 的下游工具使用）
+OUTPUT_DOCX = 'docx'
+OUTPUT_FLAT_OPC = 'flat-opc'
+OUTPUT_FORMATS = (OUTPUT_DOCX, OUTPUT_FLAT_OPC)
+
+# 分卷输出时 ZIP 中各卷的文件名；.docx 本身已经压缩，在 ZIP 中直接存储
+VOLUME_NAME = '{stem}-{index:02d}.docx'
+
+# 表格级单元格内边距（单位：twips），对整张表只写一次。
+# 保存为字符串、每张表解析一次：lxml 不建议在多个线程之间共享同一个元素
+TABLE_CELL_MARGINS_XML = (
+    f'<w:tblCellMar {nsdecls("w")}>'
+    f'<w:top w:w="60" w:type="dxa"/>'
+    f'<w:left w:w="100" w:type="dxa"/>'
+    f'<w:bottom w:w="60" w:type="dxa"/>'
+    f'<w:right w:w="100" w:type="dxa"/>'
+    f'</w:tblCellMar>'
+)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compiled_template(profile_name):
+    """
+    将样式方案编译为模板文档（页面布局 + 默认样式），返回 PrecompressedTemplate
 
-    return True
+    每个方案只编译一次，之后的转换直接从字节加载，不再重复设置样式；
+    保存时模板中的静态部件直接复用已压缩的数据。
+    """
+    builder = DocxBuilder.__new__(DocxBuilder)
+    builder._apply_profile(get_profile(profile_name))
+    builder.doc = Document()
+    builder._setup_page()
+    builder._setup_default_style()
+    builder._setup_table_style()
+    builder._setup_list_numbering()
+    # 文档属性固定，不取决于 python-docx 自带模板；确定性输出时原样复用，
+    # 否则保存时改为当前时间（见 DocxBuilder._stamp_core_properties）
+    core = builder.doc.core_properties
+    core.created = core.modified = datetime(*FIXED_DATE_TIME)
+    core.revision = 1
+    buffer = io.BytesIO()
+    builder.doc.save(buffer)
+    return PrecompressedTemplate(buffer.getvalue())
 
 
 class DocxBuilder:
-    """将 Markdown Token 流转换为 Word 文档"""
-
-    def __init__(self):
-        self.doc = Document()
-        self._setup_page()
-        self._setup_default_style()
-        # 状态变量
-        self._list_level = 0
-        self._ordered_list = False
-        self._list_counter = {}  # 用于跟踪有序列表计数
-        self._in_blockquote = False
-        self._table_data = []
-        self._current_row = []
-        self._current_cell_content = []
-        self._in_table_header = False
-        self._link_url = None
+    """
+    将文档节点树（由 Markdown Token 流构建）渲染为 Word 文档
+
+    一个实例只用于一次转换，渲染状态都保存在实例上；模块级的数据（已编译模板、
+    LaTeX 映射表、正则表达式）创建后只读，多个线程可以同时各自转换。
+    """
+
+    def __init__(self, profile=None, profiler=None, deterministic=False,
+                 output_format=OUTPUT_DOCX):
+        """
+        Args:
+            profile: 样式方案名称，默认为 default（见 styles.get_profile）
+            profiler: 可选的 profiling.ConversionProfiler，传入时记录各类块与
+                      行内片段的渲染耗时；为 None 时不做任何计时
+            deterministic: 确定性输出，ZIP 条目与文档属性使用固定时间，
+                           相同的输入总是得到逐字节相同的 .docx；
+                           否则文档的创建 / 修改时间为保存时刻
+            output_format: 输出格式，OUTPUT_FORMATS 之一
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'未知的输出格式: {output_format}')
+        self.profiler = profiler
+        self.deterministic = deterministic
+        self.output_format = output_format
+        self._apply_profile(get_profile(profile))
+        self._template = _compiled_template(self.profile.name)
+        self.doc = Document(io.BytesIO(self._template.data))
+        self._numbering = None      # numbering.xml 根元素（首个有序列表出现时获取）
+        self._next_num_id = ORDERED_NUM_BASE
+        self._ordered_num_ids = {}  # 列表层级 → 当前有序列表的编号实例 id
+        self._list_pprs = {}        # (级别, 编号实例 id) → 列表项段落属性
+
+    def _apply_profile(self, profile):
+        """绑定样式方案的各个分组"""
+        self.profile = profile
+        self.fonts = profile.fonts
+        self.font_sizes = profile.font_sizes
+        self.colors = profile.colors
+        self.spacing = profile.spacing
+        self.page_layout = profile.page_layout
 
     def _setup_page(self):
         """设置页面布局"""
         section = self.doc.sections[0]
-        section.top_margin = PageLayout.TOP_MARGIN
-        section.bottom_margin = PageLayout.BOTTOM_MARGIN
-        section.left_margin = PageLayout.LEFT_MARGIN
-        section.right_margin = PageLayout.RIGHT_MARGIN
+        section.top_margin = self.page_layout.TOP_MARGIN
+        section.bottom_margin = self.page_layout.BOTTOM_MARGIN
+        section.left_margin = self.page_layout.LEFT_MARGIN
+        section.right_margin = self.page_layout.RIGHT_MARGIN
 
     def _setup_default_style(self):
         """设置全局默认样式"""
         style = self.doc.styles['Normal']
         font = style.font
-        font.name = Fonts.EN_BODY
-        font.size = FontSizes.BODY
-        font.color.rgb = Colors.BODY
+        font.name = self.fonts.EN_BODY
+        font.size = self.font_sizes.BODY
+        font.color.rgb = self.colors.BODY
         # 设置中文字体
-        style.element.rPr.rFonts.set(qn('w:eastAsia'), Fonts.CN_BODY)
+        style.element.rPr.rFonts.set(qn('w:eastAsia'), self.fonts.CN_BODY)
         # 段落格式
         pf = style.paragraph_format
-        pf.space_before = Spacing.BODY_BEFORE
-        pf.space_after = Spacing.BODY_AFTER
-        pf.line_spacing = Spacing.LINE_SPACING
+        pf.space_before = self.spacing.BODY_BEFORE
+        pf.space_after = self.spacing.BODY_AFTER
+        pf.line_spacing = self.spacing.LINE_SPACING
+
+    def _setup_table_style(self):
+        """
+        添加表格样式：表头行（firstRow）和偶数数据行（band2Horz）的底色
+        由表格样式的条件格式统一给出，单元格本身不再逐个设置底色
+        """
+        style = parse_xml(
+            f'<w:style {nsdecls("w")} w:type="table" w:customStyle="1"'
+            f' w:styleId="{TABLE_STYLE_ID}">'
+            f'<w:name w:val="MD Table"/>'
+            f'<w:basedOn w:val="TableGrid"/>'
+            f'<w:uiPriority w:val="59"/>'
+            f'<w:tblPr><w:tblStyleRowBandSize w:val="1"/></w:tblPr>'
+            f'<w:tblStylePr w:type="firstRow"><w:tcPr>'
+            f'<w:shd w:val="clear" w:color="auto"'
+            f' w:fill="{_rgb_hex(self.colors.TABLE_HEADER_BG)}"/>'
+            f'</w:tcPr></w:tblStylePr>'
+            f'<w:tblStylePr w:type="band2Horz"><w:tcPr>'
+            f'<w:shd w:val="clear" w:color="auto"'
+            f' w:fill="{_rgb_hex(self.colors.TABLE_ALT_BG)}"/>'
+            f'</w:tcPr></w:tblStylePr>'
+            f'</w:style>'
+        )
+        self.doc.styles.element.append(style)
+
+    def _list_level_xml(self, ilvl, ordered):
+        """编号定义中的一级：编号格式、缩进与编号字体"""
+        if ordered:
+            num_fmt, text = 'decimal', f'%{ilvl + 1}.'
+        else:
+            num_fmt, text = 'bullet', LIST_BULLETS[min(ilvl, len(LIST_BULLETS) - 1)]
+        return (
+            f'<w:lvl w:ilvl="{ilvl}">'
+            f'<w:start w:val="1"/>'
+            f'<w:numFmt w:val="{num_fmt}"/>'
+            f'<w:lvlText w:val="{text}"/>'
+            f'<w:lvlJc w:val="left"/>'
+            f'<w:pPr><w:ind w:left="{Cm(1.27 * (ilvl + 1)).twips}"'
+            f' w:hanging="{Cm(0.63).twips}"/></w:pPr>'
+            f'<w:rPr><w:rFonts w:ascii="{self.fonts.EN_BODY}" w:hAnsi="{self.fonts.EN_BODY}"'
+            f' w:eastAsia="{self.fonts.CN_BODY}"/>'
+            f'<w:color w:val="{_rgb_hex(self.colors.BODY)}"/>'
+            f'<w:sz w:val="{int(self.font_sizes.BODY.pt * 2)}"/></w:rPr>'
+            f'</w:lvl>'
+        )
+
+    def _setup_list_numbering(self):
+        """
+        添加列表样式与编号定义：项目符号和有序编号各一个多级 abstractNum，
+        缩进与编号字体在各级定义中给出，列表项段落只引用样式、编号实例和级别
+        """
+        style = parse_xml(
+            f'<w:style {nsdecls("w")} w:type="paragraph" w:customStyle="1"'
+            f' w:styleId="{LIST_STYLE_ID}">'
+            f'<w:name w:val="MD List Paragraph"/>'
+            f'<w:basedOn w:val="Normal"/>'
+            f'<w:qFormat/>'
+            f'<w:pPr><w:spacing w:before="{self.spacing.LIST_BEFORE.twips}"'
+            f' w:after="{self.spacing.LIST_AFTER.twips}"/></w:pPr>'
+            f'</w:style>'
+        )
+        self.doc.styles.element.append(style)
+
+        numbering = self.doc.part.numbering_part.element
+        first_num = numbering.find(qn('w:num'))
+        for abstract_id, ordered in ((BULLET_ABSTRACT_ID, False), (ORDERED_ABSTRACT_ID, True)):
+            levels = ''.join(self._list_level_xml(i, ordered) for i in range(LIST_LEVELS))
+            abstract = parse_xml(
+                f'<w:abstractNum {nsdecls("w")} w:abstractNumId="{abstract_id}">'
+                f'<w:multiLevelType w:val="hybridMultilevel"/>{levels}</w:abstractNum>'
+            )
+            # abstractNum 必须位于所有 num 之前
+            if first_num is not None:
+                first_num.addprevious(abstract)
+            else:
+                numbering.append(abstract)
+        numbering.append(parse_xml(
+            f'<w:num {nsdecls("w")} w:numId="{BULLET_NUM_ID}">'
+            f'<w:abstractNumId w:val="{BULLET_ABSTRACT_ID}"/></w:num>'
+        ))
 
     def _set_run_font(self, run, font_name_en=None, font_name_cn=None,
                       size=None, bold=False, italic=False, color=None, underline=False):
@@ -180,125 +416,113 @@ class DocxBuilder:
             font.color.rgb = color
         font.underline = underline
 
-    def build(self, tokens: list) -> io.BytesIO:
+    def build(self, tokens: list, output=None, low_memory=False):
         """
         将 Token 流转换为 Word 文档
 
         Args:
             tokens: markdown-it-py 解析出的 Token 列表
+            output: 可选的目标文件路径或二进制文件对象，提供时直接写入
+            low_memory: 低内存模式，边消费边释放 Token 与节点，
+                        未提供 output 时输出到 SpooledTemporaryFile。输出与普通模式
+                        逐字节相同；峰值内存主要是 document.xml 的 lxml 树，
+                        实测只降低约 4%（1MB 输入：457x → 440x，benchmarks/memory.py）
 
         Returns:
-            包含 .docx 文件内容的 BytesIO 对象
+            包含 .docx 文件内容的 BytesIO 对象（低内存模式下为
+            SpooledTemporaryFile）；提供 output 时返回 output
         """
-        i = 0
-        while i < len(tokens):
-            token = tokens[i]
-            i = self._process_token(token, tokens, i)
-            i += 1
-
-        # 保存到内存
-        buffer = io.BytesIO()
-        self.doc.save(buffer)
-        buffer.seek(0)
-        return buffer
-
-    def _process_token(self, token, tokens, index):
-        """处理单个 Token，返回新的索引位置"""
-        token_type = token.type
-
-        # ---- 标题 ----
-        if token_type == 'heading_open':
-            level = int(token.tag[1])  # h1 -> 1
-            index = self._handle_heading(tokens, index, level)
-
-        # ---- 段落 ----
-        elif token_type == 'paragraph_open':
-            index = self._handle_paragraph(tokens, index)
-
-        # ---- 代码块 ----
-        elif token_type == 'fence' or token_type == 'code_block':
-            self._handle_code_block(token)
-
-        # ---- 无序列表 ----
-        elif token_type == 'bullet_list_open':
-            self._list_level += 1
-            self._ordered_list = False
-
-        elif token_type == 'bullet_list_close':
-            self._list_level -= 1
-            if self._list_level == 0:
-                self._ordered_list = False
-
-        # ---- 有序列表 ----
-        elif token_type == 'ordered_list_open':
-            self._list_level += 1
-            self._ordered_list = True
-            self._list_counter[self._list_level] = 0
-
-        elif token_type == 'ordered_list_close':
-            if self._list_level in self._list_counter:
-                del self._list_counter[self._list_level]
-            self._list_level -= 1
-            if self._list_level == 0:
-                self._ordered_list = False
-
-        # ---- 列表项 ----
-        elif token_type == 'list_item_open':
-            if self._ordered_list and self._list_level in self._list_counter:
-                self._list_counter[self._list_level] += 1
-
-        # ---- 引用块 ----
-        elif token_type == 'blockquote_open':
-            self._in_blockquote = True
-
-        elif token_type == 'blockquote_close':
-            self._in_blockquote = False
-
-        # ---- 表格 ----
-        elif token_type == 'table_open':
-            self._table_data = []
-
-        elif token_type == 'thead_open':
-            self._in_table_header = True
-
-        elif token_type == 'thead_close':
-            self._in_table_header = False
+        profiler = self.profiler
+        if profiler is None:
+            return self.render(build_tree(tokens, release=low_memory), output, low_memory)
 
-        elif token_type == 'tr_open':
-            self._current_row = []
+        profiler.count_tokens(tokens)
+        with profiler.phase('tree'):
+            tree = build_tree(tokens, release=low_memory)
+        return self.render(tree, output, low_memory)
 
-        elif token_type == 'tr_close':
-            self._table_data.append(self._current_row)
-
-        elif token_type == 'th_open' or token_type == 'td_open':
-            self._current_cell_content = []
-
-        elif token_type == 'th_close' or token_type == 'td_close':
-            self._current_row.append(self._current_cell_content)
-
-        elif token_type == 'inline' and self._current_row is not None and (
-                len(self._table_data) > 0 or self._in_table_header or self._current_row is not None):
-            # 如果在表格中，收集单元格内容
-            if hasattr(self, '_current_cell_content') and isinstance(self._current_cell_content, list):
-                self._current_cell_content.append(token)
+    def render(self, tree, output=None, low_memory=False):
+        """
+        将文档节点树渲染为 Word 文档
 
-        elif token_type == 'table_close':
-            self._handle_table()
-            self._table_data = []
-            self._current_row = []
+        Args:
+            tree: doc_tree.build_tree 生成的块级节点列表（可缓存复用）
+            output: 可选的目标文件路径或二进制文件对象，提供时直接写入
+            low_memory: 低内存模式，渲染后立即释放列表中的节点（会清空 tree）
 
-        # ---- 水平线 ----
-        elif token_type == 'hr':
-            self._handle_hr()
+        Returns:
+            包含 .docx 文件内容的 BytesIO 对象（低内存模式下为
+            SpooledTemporaryFile）；提供 output 时返回 output
+        """
+        handlers = self._BLOCK_HANDLERS
+        profiler = self.profiler
+        if profiler is None:
+            for index, node in enumerate(tree):
+                if low_memory:
+                    tree[index] = None
+                handlers[type(node)](self, node)
+        else:
+            with profiler.phase('render'):
+                for index, node in enumerate(tree):
+                    if low_memory:
+                        tree[index] = None
+                    started = perf_counter()
+                    handlers[type(node)](self, node)
+                    profiler.add_block(node, perf_counter() - started)
+
+        if profiler is not None:
+            with profiler.phase('save'):
+                return self._save(output, low_memory)
+        return self._save(output, low_memory)
+
+    def _save(self, output, low_memory):
+        """保存文档到 output，或新建的内存 / 临时文件缓冲"""
+        if output is not None:
+            self._write_package(output)
+            return output
+
+        if low_memory:
+            buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        else:
+            # 保存到内存
+            buffer = io.BytesIO()
+        self._write_package(buffer)
+        buffer.seek(0)
+        return buffer
 
-        return index
+    def _write_package(self, output):
+        """按输出格式写出文档包"""
+        self._stamp_core_properties()
+        if self.output_format == OUTPUT_FLAT_OPC:
+            save_flat_package(self.doc, output, self._template, self._modified_parts())
+            return
+        date_time = FIXED_DATE_TIME if self.deterministic else None
+        save_package(self.doc, output, self._template, self._modified_parts(), date_time)
 
-    def _handle_heading(self, tokens, index, level):
+    def _stamp_core_properties(self):
+        """非确定性输出时将文档的创建 / 修改时间设为当前时间（UTC）"""
+        if self.deterministic:
+            return
+        core = self.doc.core_properties
+        now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+        core.created = core.modified = now
+
+    def _modified_parts(self):
+        """除 document.xml 外本次渲染修改过的模板部件"""
+        parts = []
+        if self._numbering is not None:
+            parts.append(NUMBERING_PARTNAME)
+        if not self.deterministic:
+            parts.append(CORE_PROPERTIES_PARTNAME)
+        return tuple(parts)
+
+    def run_count(self):
+        """统计文档正文中的 run 数量（用于转换统计）"""
+        return len(self.doc.element.body.xpath('.//w:r'))
+
+    def _handle_heading(self, node):
         """处理标题"""
-        # 查找 inline Token（标题内容）
-        index += 1
-        inline_token = tokens[index]
-
+        level = node.level
         heading = self.doc.add_heading(level=level)
         heading.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
@@ -306,93 +530,95 @@ class DocxBuilder:
         heading.clear()
 
         # 处理行内内容
-        if inline_token.children:
-            self._render_inline_runs(heading, inline_token.children, is_heading=True, heading_level=level)
+        if node.inlines:
+            self._render_inline_runs(heading, node.inlines, is_heading=True, heading_level=level)
         else:
-            run = heading.add_run(_clean_text(inline_token.content))
+            run = heading.add_run(_clean_text(node.text))
             self._style_heading_run(run, level)
 
         # 设置段落间距
         pf = heading.paragraph_format
-        pf.space_before = Spacing.HEADING_BEFORE
-        pf.space_after = Spacing.HEADING_AFTER
-
-        # 跳过 heading_close
-        index += 1
-        return index
+        pf.space_before = self.spacing.HEADING_BEFORE
+        pf.space_after = self.spacing.HEADING_AFTER
 
     def _style_heading_run(self, run, level):
         """为标题 run 设置样式"""
-        size = FontSizes.HEADING_MAP.get(level, FontSizes.BODY)
+        size = self.font_sizes.HEADING_MAP.get(level, self.font_sizes.BODY)
         self._set_run_font(
             run,
-            font_name_en=Fonts.EN_HEADING,
-            font_name_cn=Fonts.CN_HEADING,
+            font_name_en=self.fonts.EN_HEADING,
+            font_name_cn=self.fonts.CN_HEADING,
             size=size,
             bold=True,
-            color=Colors.HEADING,
+            color=self.colors.HEADING,
         )
 
-    def _handle_paragraph(self, tokens, index):
+    def _handle_paragraph(self, node):
         """处理段落"""
-        # 下一个 Token 应该是 inline
-        index += 1
-        if index >= len(tokens):
-            return index
-
-        inline_token = tokens[index]
-
-        # 检查是否在列表中
-        if self._list_level > 0:
-            self._handle_list_item(inline_token)
-        elif self._in_blockquote:
-            self._handle_blockquote(inline_token)
-        else:
-            # 检查是否在表格中 - 如果有 _current_row 且 _table_data 正在收集
-            para = self.doc.add_paragraph()
-            if inline_token.children:
-                self._render_inline_runs(para, inline_token.children)
-            else:
-                run = para.add_run(_clean_text(inline_token.content))
-                self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY)
-
-        # 跳过 paragraph_close
-        index += 1
-        return index
-
-    def _handle_list_item(self, inline_token):
-        """处理列表项"""
-        indent_level = self._list_level - 1
-        prefix = ""
-
-        if self._ordered_list:
-            counter = self._list_counter.get(self._list_level, 0)
-            prefix = f"{counter}. "
+        para = self.doc.add_paragraph()
+        if node.inlines:
+            self._render_inline_runs(para, node.inlines)
         else:
-            bullets = ["•", "◦", "▪", "▸"]
-            bullet_char = bullets[min(indent_level, len(bullets) - 1)]
-            prefix = f"{bullet_char} "
+            run = para.add_run(_clean_text(node.text))
+            self._set_run_font(run, self.fonts.EN_BODY, self.fonts.CN_BODY, self.font_sizes.BODY)
 
+    def _ordered_num_id(self, ilvl, number):
+        """
+        有序列表的编号实例 id：每个列表的第一项新建一个从 1 开始的实例；
+        分卷时从列表中间开始的卷从该项的序号继续编号
+        """
+        num_id = self._ordered_num_ids.get(ilvl)
+        if num_id is None or number == 1:
+            if self._numbering is None:
+                self._numbering = self.doc.part.numbering_part.element
+            num_id = self._next_num_id
+            self._next_num_id += 1
+            self._numbering.append(parse_xml(
+                f'<w:num {nsdecls("w")} w:numId="{num_id}">'
+                f'<w:abstractNumId w:val="{ORDERED_ABSTRACT_ID}"/>'
+                f'<w:lvlOverride w:ilvl="{ilvl}"><w:startOverride w:val="{number}"/></w:lvlOverride>'
+                f'</w:num>'
+            ))
+            self._ordered_num_ids[ilvl] = num_id
+        return num_id
+
+    def _list_ppr(self, level, num_id):
+        """
+        列表项的段落属性（样式 + 编号引用）；同一组合只解析一次，之后复制
+        num_id 为 None 时表示列表项中的后续段落：不带编号，与该项文字对齐
+        """
+        key = (level, num_id)
+        ppr = self._list_pprs.get(key)
+        if ppr is None:
+            if num_id is None:
+                body = f'<w:ind w:left="{Cm(1.27 * level).twips}"/>'
+            else:
+                body = (f'<w:numPr><w:ilvl w:val="{level}"/>'
+                        f'<w:numId w:val="{num_id}"/></w:numPr>')
+            ppr = self._list_pprs[key] = parse_xml(
+                f'<w:pPr {nsdecls("w")}><w:pStyle w:val="{LIST_STYLE_ID}"/>{body}</w:pPr>'
+            )
+        return deepcopy(ppr)
+
+    def _handle_list_item(self, node):
+        """处理列表项：编号、缩进和间距都来自列表样式与编号定义"""
         para = self.doc.add_paragraph()
-        # 设置缩进
-        pf = para.paragraph_format
-        pf.left_indent = Cm(1.27 * self._list_level)
-        pf.first_line_indent = Cm(-0.63)
-        pf.space_before = Spacing.LIST_BEFORE
-        pf.space_after = Spacing.LIST_AFTER
-
-        # 添加列表符号
-        run = para.add_run(prefix)
-        self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY, color=Colors.BODY)
+        if node.continued:
+            ppr = self._list_ppr(node.level, None)
+        else:
+            ilvl = min(node.level, LIST_LEVELS) - 1
+            num_id = self._ordered_num_id(ilvl, node.number) if node.ordered else BULLET_NUM_ID
+            ppr = self._list_ppr(ilvl, num_id)
+        para._p.insert(0, ppr)
 
         # 添加内容
-        if inline_token.children:
-            self._render_inline_runs(para, inline_token.children)
+        if node.inlines:
+            self._render_inline_runs(para, node.inlines)
         else:
-            run = para.add_run(_clean_text(inline_token.content))
-            self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY)
+            run = para.add_run(_clean_text(node.text))
+            self._set_run_font(run, self.fonts.EN_BODY, self.fonts.CN_BODY, self.font_sizes.BODY)
 
-    def _handle_blockquote(self, inline_token):
+    def _handle_blockquote(self, node):
         """处理引用块"""
         para = self.doc.add_paragraph()
 
@@ -406,36 +632,38 @@ class DocxBuilder:
         pPr = para._element.get_or_add_pPr()
         pBdr = parse_xml(
             f'<w:pBdr {nsdecls("w")}>'
-            f'  <w:left w:val="single" w:sz="12" w:space="8" w:color="{_rgb_hex(Colors.QUOTE_BORDER)}"/>'
+            f'  <w:left w:val="single" w:sz="12" w:space="8"'
+            f' w:color="{_rgb_hex(self.colors.QUOTE_BORDER)}"/>'
             f'</w:pBdr>'
         )
         pPr.append(pBdr)
 
         # 添加内容
-        if inline_token.children:
-            self._render_inline_runs(para, inline_token.children, default_color=Colors.QUOTE_TEXT)
+        if node.inlines:
+            self._render_inline_runs(para, node.inlines, default_color=self.colors.QUOTE_TEXT)
         else:
-            run = para.add_run(_clean_text(inline_token.content))
-            self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY,
-                               italic=True, color=Colors.QUOTE_TEXT)
+            run = para.add_run(_clean_text(node.text))
+            self._set_run_font(run, self.fonts.EN_BODY, self.fonts.CN_BODY, self.font_sizes.BODY,
+                               italic=True, color=self.colors.QUOTE_TEXT)
 
-    def _handle_code_block(self, token):
+    def _handle_code_block(self, node):
         """处理代码块"""
-        code = token.content.rstrip('\n')
-        language = token.info.strip() if token.info else ""
+        code = node.code
+        language = node.language
 
         # 添加语言标签（如果有）
         if language:
             lang_para = self.doc.add_paragraph()
             lang_run = lang_para.add_run(f"  {language}")
-            self._set_run_font(lang_run, Fonts.EN_CODE, Fonts.CN_CODE, FontSizes.SMALL,
+            self._set_run_font(lang_run, self.fonts.EN_CODE, self.fonts.CN_CODE,
+                               self.font_sizes.SMALL,
                                color=RGBColor(0x99, 0x99, 0x99))
             pf = lang_para.paragraph_format
-            pf.space_before = Spacing.CODE_BLOCK_BEFORE
+            pf.space_before = self.spacing.CODE_BLOCK_BEFORE
             pf.space_after = Pt(0)
 
             # 添加底部灰色背景
-            self._set_paragraph_shading(lang_para, Colors.CODE_BLOCK_BG)
+            self._set_paragraph_shading(lang_para, self.colors.CODE_BLOCK_BG)
 
         lines = code.split('\n')
         for line_idx, line in enumerate(lines):
@@ -443,8 +671,9 @@ class DocxBuilder:
 
             # 设置代码样式
             run = para.add_run(_clean_text(line) if line else " ")  # 空行保留一个空格
-            self._set_run_font(run, Fonts.EN_CODE, Fonts.CN_CODE, FontSizes.CODE_BLOCK,
-                               color=Colors.CODE_BLOCK_TEXT)
+            self._set_run_font(run, self.fonts.EN_CODE, self.fonts.CN_CODE,
+                               self.font_sizes.CODE_BLOCK,
+                               color=self.colors.CODE_BLOCK_TEXT)
 
             # 段落格式
             pf = para.paragraph_format
@@ -454,12 +683,12 @@ class DocxBuilder:
             pf.left_indent = Cm(0.5)
 
             # 设置背景色
-            self._set_paragraph_shading(para, Colors.CODE_BLOCK_BG)
+            self._set_paragraph_shading(para, self.colors.CODE_BLOCK_BG)
 
         # 代码块后添加间距
         if lines:
             last_para = self.doc.paragraphs[-1]
-            last_para.paragraph_format.space_after = Spacing.CODE_BLOCK_AFTER
+            last_para.paragraph_format.space_after = self.spacing.CODE_BLOCK_AFTER
 
     def _set_paragraph_shading(self, paragraph, color):
         """为段落设置背景色"""
@@ -468,13 +697,11 @@ class DocxBuilder:
         )
         paragraph._element.get_or_add_pPr().append(shading)
 
-    def _handle_table(self):
+    def _handle_table(self, node):
         """处理表格"""
-        if not self._table_data:
-            return
-
-        num_rows = len(self._table_data)
-        num_cols = max(len(row) for row in self._table_data) if self._table_data else 0
+        rows = node.rows
+        num_rows = len(rows)
+        num_cols = max(len(row) for row in rows) if rows else 0
 
         if num_cols == 0:
             return
@@ -482,67 +709,39 @@ class DocxBuilder:
         table = self.doc.add_table(rows=num_rows, cols=num_cols)
         table.alignment = WD_TABLE_ALIGNMENT.CENTER
 
-        # 设置表格样式
-        table.style = self.doc.styles['Table Grid']
+        # 表格样式（边框、表头与隔行底色）和单元格内边距都在表格级设置
+        tbl = table._tbl
+        tbl.tblStyle_val = TABLE_STYLE_ID
+        tbl.tblPr.find(qn('w:tblLook')).addprevious(parse_xml(TABLE_CELL_MARGINS_XML))
 
-        for row_idx, row_data in enumerate(self._table_data):
-            row = table.rows[row_idx]
-            for col_idx, cell_content_tokens in enumerate(row_data):
-                if col_idx >= num_cols:
-                    break
-                cell = row.cells[col_idx]
-
-                # 清除默认段落
-                cell.paragraphs[0].clear()
+        for row_idx, (row, row_data) in enumerate(zip(table.rows, rows)):
+            is_header = row_idx == 0
+            for cell, cell_content in zip(row.cells, row_data):
                 para = cell.paragraphs[0]
                 para.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
                 # 渲染单元格内容
-                for ct in cell_content_tokens:
-                    if hasattr(ct, 'children') and ct.children:
-                        self._render_inline_runs(para, ct.children)
+                for ct in cell_content:
+                    if ct.inlines:
+                        self._render_inline_runs(para, ct.inlines)
                     else:
-                        content = ct.content if hasattr(ct, 'content') else str(ct)
-                        run = para.add_run(_clean_text(content))
-                        if row_idx == 0:
-                            self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY,
-                                               FontSizes.BODY, bold=True,
-                                               color=Colors.TABLE_HEADER_TEXT)
+                        run = para.add_run(_clean_text(ct.text))
+                        if is_header:
+                            self._set_run_font(run, self.fonts.EN_BODY, self.fonts.CN_BODY,
+                                               self.font_sizes.BODY, bold=True,
+                                               color=self.colors.TABLE_HEADER_TEXT)
                         else:
-                            self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY,
-                                               FontSizes.BODY, color=Colors.BODY)
-
-                # 表头样式
-                if row_idx == 0:
-                    self._set_cell_shading(cell, Colors.TABLE_HEADER_BG)
-                elif row_idx % 2 == 0:
-                    self._set_cell_shading(cell, Colors.TABLE_ALT_BG)
+                            self._set_run_font(run, self.fonts.EN_BODY, self.fonts.CN_BODY,
+                                               self.font_sizes.BODY, color=self.colors.BODY)
 
-                # 单元格内边距
-                self._set_cell_margins(cell, top=60, bottom=60, start=100, end=100)
-
-    def _set_cell_shading(self, cell, color):
-        """设置表格单元格背景颜色"""
-        shading = parse_xml(
-            f'<w:shd {nsdecls("w")} w:fill="{_rgb_hex(color)}" w:val="clear"/>'
-        )
-        cell._element.get_or_add_tcPr().append(shading)
-
-    def _set_cell_margins(self, cell, top=0, bottom=0, start=0, end=0):
-        """设置单元格内边距（单位：twips）"""
-        tc = cell._element
-        tcPr = tc.get_or_add_tcPr()
-        tcMar = parse_xml(
-            f'<w:tcMar {nsdecls("w")}>'
-            f'  <w:top w:w="{top}" w:type="dxa"/>'
-            f'  <w:bottom w:w="{bottom}" w:type="dxa"/>'
-            f'  <w:start w:w="{start}" w:type="dxa"/>'
-            f'  <w:end w:w="{end}" w:type="dxa"/>'
-            f'</w:tcMar>'
-        )
-        tcPr.append(tcMar)
+    def _handle_math_block(self, node):
+        """处理块级公式：居中的独立段落"""
+        para = self.doc.add_paragraph()
+        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        self._add_text_runs(para, convert_latex(node.latex), (False, False, False),
+                            False, None, self.colors.BODY)
 
-    def _handle_hr(self):
+    def _handle_hr(self, node):
         """处理水平线"""
         para = self.doc.add_paragraph()
         pPr = para._element.get_or_add_pPr()
@@ -558,135 +757,257 @@ class DocxBuilder:
     def _render_inline_runs(self, paragraph, children, is_heading=False,
                             heading_level=None, default_color=None):
         """
-        递归渲染行内 Token 子节点到段落中
+        渲染行内片段到段落中（先合并同格式片段，再逐段输出 run）
 
         Args:
             paragraph: 目标段落
-            children: 行内 Token 的子节点列表
+            children: doc_tree.Inline 片段序列
             is_heading: 是否是标题
             heading_level: 标题级别
             default_color: 默认文字颜色
         """
-        bold = False
-        italic = False
-        strikethrough = False
-        link_url = None
-
-        i = 0
-        while i < len(children):
-            child = children[i]
-
-            if child.type == 'text':
-                content = child.content
-                # 检查是否包含分数占位符
-                if FRAC_PATTERN.search(content):
-                    if is_heading:
-                        def style_fn(r, lvl=heading_level, it=italic):
-                            self._style_heading_run(r, lvl)
-                            if it:
-                                r.font.italic = it
-                        _add_text_with_fractions(paragraph, content, style_fn)
-                    else:
-                        color = default_color or Colors.BODY
-                        def style_fn(r, b=bold, it=italic, c=color, st=strikethrough):
-                            self._set_run_font(
-                                r, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY,
-                                bold=b, italic=it, color=c
-                            )
-                            if st:
-                                r.font.strike = True
-                        _add_text_with_fractions(paragraph, content, style_fn)
-                else:
-                    run = paragraph.add_run(_clean_text(content))
-                    if is_heading:
-                        self._style_heading_run(run, heading_level)
-                        if italic:
-                            run.font.italic = True
-                    else:
-                        color = default_color or Colors.BODY
-                        self._set_run_font(
-                            run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY,
-                            bold=bold, italic=italic, color=color
-                        )
-                        if strikethrough:
-                            run.font.strike = True
-                if link_url:
-                    self._add_hyperlink(paragraph, run, link_url)
-
-            elif child.type == 'code_inline':
-                run = paragraph.add_run(_clean_text(child.content))
-                self._set_run_font(
-                    run, Fonts.EN_CODE, Fonts.CN_CODE, FontSizes.CODE,
-                    color=Colors.CODE_TEXT
-                )
-                # 添加浅灰色背景
-                rPr = run.element.get_or_add_rPr()
-                shading = parse_xml(
-                    f'<w:shd {nsdecls("w")} w:fill="F0F0F0" w:val="clear"/>'
-                )
-                rPr.append(shading)
-
-            elif child.type == 'strong_open':
-                bold = True
-            elif child.type == 'strong_close':
-                bold = False
-
-            elif child.type == 'em_open':
-                italic = True
-            elif child.type == 'em_close':
-                italic = False
-
-            elif child.type == 's_open':
-                strikethrough = True
-            elif child.type == 's_close':
-                strikethrough = False
+        color = default_color or self.colors.BODY
+        segments = coalesce_inlines(children)
+        profiler = self.profiler
+
+        if profiler is None:
+            for kind, text, fmt, link_url in segments:
+                self._render_segment(paragraph, kind, text, fmt, link_url,
+                                     is_heading, heading_level, color)
+            return
 
-            elif child.type == 'link_open':
-                link_url = child.attrs.get('href', '') if child.attrs else ''
-            elif child.type == 'link_close':
-                link_url = None
+        for kind, text, fmt, link_url in segments:
+            started = perf_counter()
+            self._render_segment(paragraph, kind, text, fmt, link_url,
+                                 is_heading, heading_level, color)
+            if kind == SEG_TEXT:
+                if link_url:
+                    kind = 'link'
+                elif '⟦FRAC:' in text:
+                    kind = 'fraction'
+            elif kind == SEG_CODE:
+                kind = 'code_inline'
+            profiler.add_inline(kind, perf_counter() - started)
+
+    def _render_segment(self, paragraph, kind, text, fmt, link_url,
+                        is_heading, heading_level, color):
+        """输出 coalesce_inlines 合并后的一个片段"""
+        if kind == SEG_TEXT:
+            run = self._add_text_runs(paragraph, text, fmt, is_heading,
+                                      heading_level, color)
+            if link_url and run is not None:
+                self._add_hyperlink(paragraph, run, link_url)
+
+        elif kind == SEG_CODE:
+            run = paragraph.add_run(_clean_text(text))
+            self._set_run_font(
+                run, self.fonts.EN_CODE, self.fonts.CN_CODE, self.font_sizes.CODE,
+                color=self.colors.CODE_TEXT
+            )
+            # 添加浅灰色背景
+            rPr = run.element.get_or_add_rPr()
+            shading = parse_xml(
+                f'<w:shd {nsdecls("w")} w:fill="F0F0F0" w:val="clear"/>'
+            )
+            rPr.append(shading)
+
+        elif kind == SEG_IMAGE:
+            run = paragraph.add_run(_clean_text(text))
+            self._set_run_font(run, self.fonts.EN_BODY, self.fonts.CN_BODY,
+                               self.font_sizes.BODY, italic=True,
+                               color=RGBColor(0x99, 0x99, 0x99))
 
-            elif child.type == 'softbreak':
-                run = paragraph.add_run('\n')
-            elif child.type == 'hardbreak':
-                run = paragraph.add_run('\n')
+    def _add_text_runs(self, paragraph, text, fmt, is_heading, heading_level, color):
+        """
+        输出一段同格式文本，分数占位符替换为 OMML 数学分数
 
-            elif child.type == 'image':
-                # 图片只显示 alt 文字
-                alt = child.attrs.get('alt', '') if child.attrs else ''
-                src = child.attrs.get('src', '') if child.attrs else ''
-                run = paragraph.add_run(_clean_text(f"[图片: {alt or src}]"))
-                self._set_run_font(run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.BODY,
-                                   italic=True, color=RGBColor(0x99, 0x99, 0x99))
+        Returns:
+            最后添加的 run（全部为分数时为 None）
+        """
+        if '⟦FRAC:' in text:
+            parts = FRAC_PLACEHOLDER_PATTERN.split(text)
+        else:
+            parts = (text,)
 
-            i += 1
+        run = None
+        # parts 结构: [前文, 分子1, 分母1, 中间文本, 分子2, 分母2, ...]
+        for i in range(0, len(parts), 3):
+            if parts[i]:
+                run = paragraph.add_run(_clean_text(parts[i]))
+                self._style_text_run(run, fmt, is_heading, heading_level, color)
+            if i + 1 < len(parts):
+                _insert_omml_fraction(paragraph, parts[i + 1], parts[i + 2])
+        return run
+
+    def _style_text_run(self, run, fmt, is_heading, heading_level, color):
+        """按 (粗体, 斜体, 删除线) 设置正文或标题 run 的样式"""
+        bold, italic, strikethrough = fmt
+        if is_heading:
+            self._style_heading_run(run, heading_level)
+            if italic:
+                run.font.italic = True
+        else:
+            self._set_run_font(
+                run, self.fonts.EN_BODY, self.fonts.CN_BODY, self.font_sizes.BODY,
+                bold=bold, italic=italic, color=color
+            )
+            if strikethrough:
+                run.font.strike = True
 
     def _add_hyperlink(self, paragraph, run, url):
         """为 run 添加超链接样式（Word 中的视觉效果）"""
-        run.font.color.rgb = Colors.LINK
+        run.font.color.rgb = self.colors.LINK
         run.font.underline = True
         # 在后面添加 URL 注释
         url_run = paragraph.add_run(f" ({url})")
-        self._set_run_font(url_run, Fonts.EN_BODY, Fonts.CN_BODY, FontSizes.SMALL,
+        self._set_run_font(url_run, self.fonts.EN_BODY, self.fonts.CN_BODY, self.font_sizes.SMALL,
                            color=RGBColor(0x99, 0x99, 0x99))
 
-
-def convert_markdown_to_docx(markdown_text: str) -> io.BytesIO:
+    # 块级节点类型 → 处理方法
+    _BLOCK_HANDLERS = {
+        Heading: _handle_heading,
+        Paragraph: _handle_paragraph,
+        ListItem: _handle_list_item,
+        Quote: _handle_blockquote,
+        CodeBlock: _handle_code_block,
+        Table: _handle_table,
+        MathBlock: _handle_math_block,
+        Rule: _handle_hr,
+    }
+
+
+def convert_markdown_to_docx(markdown_text: str, output=None, profile=None,
+                             low_memory=False, profiler=None, deterministic=False,
+                             output_format=OUTPUT_DOCX):
     """
     将 Markdown 文本转换为 Word 文档
 
     Args:
         markdown_text: Markdown 格式的文本
+        output: 可选的目标文件路径或二进制文件对象，提供时直接写入，
+                不再经过内存缓冲
+        profile: 样式方案名称，默认为 default
+        low_memory: 低内存模式，边消费边释放中间结果，
+                    未提供 output 时返回 SpooledTemporaryFile
+        profiler: 可选的 profiling.ConversionProfiler，记录各阶段及各类块的耗时
+        deterministic: 确定性输出，相同的输入与选项总是得到逐字节相同的 .docx
+        output_format: 'docx'（默认）或 'flat-opc'：整个包写成一个 XML 文档，
+                       各部件逐个写入 output，不经过 ZIP 压缩
 
     Returns:
-        包含 .docx 文件内容的 BytesIO 对象
+        包含输出内容的 BytesIO 对象；提供 output 时返回 output
     """
     from .md_parser import parse_markdown
-    from .latex_converter import convert_latex_in_text
 
-    # 预处理：将 LaTeX 数学表达式转换为 Unicode
-    markdown_text = convert_latex_in_text(markdown_text)
+    # 公式由解析器识别为 Token，渲染时再转换，不再预处理整篇文本
+    if profiler is None:
+        tokens = parse_markdown(markdown_text)
+    else:
+        with profiler.phase('parse'):
+            tokens = parse_markdown(markdown_text)
+    builder = DocxBuilder(profile, profiler, deterministic, output_format)
+    return builder.build(tokens, output, low_memory)
+
+
+def render_volumes(tree, output, starts, profile=None, stem='文档', low_memory=False,
+                   profiler=None, deterministic=False):
+    """
+    按 split_volumes 的划分逐卷渲染，各卷 .docx 依次写入 output 中的 ZIP
+
+    每卷渲染完成后立即写入 ZIP 并释放，同一时刻只有一卷文档在内存中；
+    output 为不可回退的流（如 HTTP 响应）时也能边生成边发送。
 
-    tokens = parse_markdown(markdown_text)
-    builder = DocxBuilder()
-    return builder.build(tokens)
+    Args:
+        tree: build_tree 生成的块级节点列表
+        output: 目标文件路径或二进制文件对象
+        starts: 各卷第一个节点的下标（split_volumes 的返回值）
+        profile: 样式方案名称
+        stem: 各卷文件名的前缀，卷名为 <stem>-01.docx、<stem>-02.docx ...
+        low_memory: 低内存模式，渲染后立即释放 tree 中的节点
+        profiler: 可选的 profiling.ConversionProfiler，各卷的耗时累加
+        deterministic: 各卷使用确定性输出（ZIP 中各卷条目的时间本来就是固定的）
+
+    Returns:
+        各卷在 ZIP 中的文件名列表
+    """
+    names = []
+    ends = list(starts[1:]) + [len(tree)]
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for index, (start, end) in enumerate(zip(starts, ends), 1):
+            nodes = tree[start:end]
+            if low_memory:
+                tree[start:end] = [None] * (end - start)
+            name = VOLUME_NAME.format(stem=stem, index=index)
+            with zf.open(name, 'w') as member:
+                DocxBuilder(profile, profiler, deterministic).render(nodes, member, low_memory)
+            names.append(name)
+            # python-docx 的文档对象之间存在循环引用，lxml 树占用的内存又不计入
+            # 垃圾回收的分配计数，不主动回收时已写出的各卷会一直留在内存中
+            del nodes
+            gc.collect()
+    return names
+
+
+def convert_markdown_to_volumes(markdown_text: str, output=None, profile=None,
+                                max_paragraphs=None, max_bytes=None, stem='文档',
+                                low_memory=False, profiler=None, deterministic=False):
+    """
+    将 Markdown 文本转换为 Word 文档，超出预算时在标题处分为多卷并打包为 ZIP
+
+    Word 打开和分页数十万段落的文档非常缓慢，日志、表格导出等超长文档
+    可以按段落数或文本字节数分卷（划分规则见 doc_tree.split_volumes）。
+
+    Args:
+        markdown_text: Markdown 格式的文本
+        output: 可选的目标文件路径或二进制文件对象
+        profile: 样式方案名称，默认为 default
+        max_paragraphs: 每卷的段落数预算，None 或 0 表示不限
+        max_bytes: 每卷的文本字节数预算，None 或 0 表示不限
+        stem: 各卷文件名的前缀
+        low_memory: 低内存模式，边消费边释放中间结果，
+                    未提供 output 时输出到 SpooledTemporaryFile
+        profiler: 可选的 profiling.ConversionProfiler
+        deterministic: 确定性输出，相同的输入与选项总是得到逐字节相同的结果
+
+    Returns:
+        (输出, 卷数)：只有一卷时输出就是 .docx（与 convert_markdown_to_docx 相同），
+        否则是包含各卷 .docx 的 ZIP；未提供 output 时输出为 BytesIO
+        （低内存模式下为 SpooledTemporaryFile）
+    """
+    from .md_parser import parse_markdown
+
+    if profiler is None:
+        tree = build_tree(parse_markdown(markdown_text), release=low_memory)
+    else:
+        with profiler.phase('parse'):
+            tokens = parse_markdown(markdown_text)
+        profiler.count_tokens(tokens)
+        with profiler.phase('tree'):
+            tree = build_tree(tokens, release=low_memory)
+        del tokens
+
+    starts = split_volumes(tree, max_paragraphs, max_bytes)
+    if len(starts) == 1:
+        builder = DocxBuilder(profile, profiler, deterministic)
+        return builder.render(tree, output, low_memory), 1
+
+    buffer = output
+    if buffer is None:
+        if low_memory:
+            buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        else:
+            buffer = io.BytesIO()
+    render_volumes(tree, buffer, starts, profile, stem, low_memory, profiler, deterministic)
+    if output is None:
+        buffer.seek(0)
+    return buffer, len(starts)
+
+
+def warm_up():
+    """
+    预热转换器：完成一次极小文档的转换
+
+    用于桌面应用启动后在后台线程中提前加载 python-docx / lxml、
+    读取默认模板并初始化解析器，使用户的首次转换不再承担这些开销。
+    """
+    convert_markdown_to_docx('# warm up\n\n- item\n\n| a |\n|---|\n| b |\n')
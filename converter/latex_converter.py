@@ -87,141 +87,198 @@ SUBSCRIPT_MAP = {
 # ============================================================
 FRAC_PLACEHOLDER = '⟦FRAC:{num}:{den}⟧'
 
+# 解析占位符的正则（docx_builder 同样使用）：分子不含冒号，分子分母都不跨越 ⟦ 与 ⟧，
+# 每次尝试匹配最多扫描到下一个括号，整段文本的匹配是线性时间
+FRAC_PLACEHOLDER_PATTERN = re.compile(r'⟦FRAC:([^:⟦⟧]+):([^⟦⟧]+)⟧')
 
-def _convert_frac(match_str):
-    """将 \\frac{a}{b} 转换为分数占位符，供 docx_builder 渲染为数学公式"""
-    pattern = r'\\frac\s*\{([^{}]+)\}\s*\{([^{}]+)\}'
-    m = re.match(pattern, match_str)
-    if not m:
-        return match_str
+# ============================================================
+# 单个公式的处理上限
+# ============================================================
+# 超出任一上限的公式不做转换，原样输出 LaTeX 源码：误识别为公式的大段文本、
+# 层层嵌套的花括号只会让这一个公式保持原样，不会长时间占用工作进程
+MAX_FORMULA_LENGTH = 4000   # 字符数
+MAX_FORMULA_DEPTH = 12      # 花括号嵌套层数
+# 单个公式的转换工作量上限（累计扫描的字符数）。长度与层数受限时，每层最多完整扫描
+# 几遍公式，正常公式远低于此值，仅作兜底；按字符计数而不是计时，
+# 同样的公式在任何负载下都得到同样的结果
+MAX_FORMULA_WORK = MAX_FORMULA_LENGTH * (MAX_FORMULA_DEPTH + 1) * 4
+
+# ============================================================
+# 预编译的正则
+# ============================================================
+# 下列正则的可变部分都不能跨越花括号（或方括号），从某个位置开始的一次匹配
+# 最多扫描到下一个括号为止，不会因回溯而随输入长度平方增长
+_TEXT_COMMAND_RE = re.compile(
+    r'\\(?:text|mathrm|mathbf|mathit|textbf|textit)\s*\{([^{}]+)\}')
+_FRAC_RE = re.compile(r'\\frac\s*\{([^{}]+)\}\s*\{([^{}]+)\}')
+_SQRT_RE = re.compile(r'\\sqrt\s*(?:\[([^\[\]]+)\])?\s*\{([^{}]+)\}')
+_SUPERSCRIPT_GROUP_RE = re.compile(r'\^\{([^{}]+)\}')
+_SUPERSCRIPT_CHAR_RE = re.compile(r'\^([0-9a-zA-Z])')
+_SUBSCRIPT_GROUP_RE = re.compile(r'_\{([^{}]+)\}')
+_SUBSCRIPT_CHAR_RE = re.compile(r'_([0-9a-zA-Z])')
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_BRACE_RE = re.compile(r'[^{}]+')
+
+# 希腊字母与数学符号合并为一个正则，一次扫描完成替换；
+# 长的命令排在前面，\leq 不会被当成 \le 加上 q
+_SYMBOLS = {**GREEK_LETTERS, **MATH_SYMBOLS}
+_SYMBOL_RE = re.compile('|'.join(
+    re.escape(command) for command in sorted(_SYMBOLS, key=len, reverse=True)
+))
+
+
+class _FormulaTooComplex(Exception):
+    """单个公式的转换工作量超出 MAX_FORMULA_WORK"""
+
+
+class _WorkBudget:
+    """单个公式剩余的转换工作量（字符数）"""
+    __slots__ = ('remaining',)
+
+    def __init__(self, limit):
+        self.remaining = limit
+
+    def charge(self, amount):
+        self.remaining -= amount
+        if self.remaining < 0:
+            raise _FormulaTooComplex
+
+
+def _charge(budget, text):
+    if budget is not None:
+        budget.charge(len(text))
+
+
+def _brace_depth(text):
+    """花括号的最大嵌套层数（只遍历括号字符）"""
+    if '{' not in text:
+        return 0
+    depth = deepest = 0
+    for char in _NON_BRACE_RE.sub('', text):
+        if char == '{':
+            depth += 1
+            if depth > deepest:
+                deepest = depth
+        elif depth:
+            depth -= 1
+    return deepest
+
+
+def _flatten_fractions(text):
+    """分子分母中已转换的分数改写为 a/b：占位符不能嵌套"""
+    if '⟦FRAC:' not in text:
+        return text
+    return FRAC_PLACEHOLDER_PATTERN.sub(lambda m: f'{m.group(1)}/{m.group(2)}', text)
 
-    numerator = m.group(1).strip()
-    denominator = m.group(2).strip()
 
+def _convert_frac(match, budget=None):
+    """将 \\frac{a}{b} 转换为分数占位符，供 docx_builder 渲染为数学公式"""
     # 递归处理分子分母中的 LaTeX（但不处理分数本身）
-    numerator = _convert_latex_content(numerator)
-    denominator = _convert_latex_content(denominator)
+    numerator = _convert_latex_content(match.group(1).strip(), budget)
+    denominator = _convert_latex_content(match.group(2).strip(), budget)
 
     # 使用占位符格式，让 docx_builder 渲染为 Word 原生数学分数
-    return FRAC_PLACEHOLDER.format(num=numerator, den=denominator)
-
+    return FRAC_PLACEHOLDER.format(num=_flatten_fractions(numerator),
+                                   den=_flatten_fractions(denominator))
 
 
-def _convert_sqrt(match_str):
+def _convert_sqrt(match, budget=None):
     """将 \\sqrt{x} 转换为 √x 或 \\sqrt[n]{x} 转换为 ⁿ√x"""
-    # \sqrt[n]{x}
-    pattern_n = r'\\sqrt\s*\[([^\]]+)\]\s*\{([^{}]+)\}'
-    m = re.match(pattern_n, match_str)
-    if m:
-        n = m.group(1).strip()
-        content = _convert_latex_content(m.group(2).strip())
-        if n == '3':
-            return f"∛{content}"
-        n_super = ''.join(SUPERSCRIPT_MAP.get(c, c) for c in n)
-        return f"{n_super}√{content}"
-
-    # \sqrt{x}
-    pattern = r'\\sqrt\s*\{([^{}]+)\}'
-    m = re.match(pattern, match_str)
-    if m:
-        content = _convert_latex_content(m.group(1).strip())
+    content = _convert_latex_content(match.group(2).strip(), budget)
+    if match.group(1) is None:
         return f"√{content}"
 
-    return match_str
+    # \sqrt[n]{x}
+    n = match.group(1).strip()
+    if n == '3':
+        return f"∛{content}"
+    n_super = ''.join(SUPERSCRIPT_MAP.get(c, c) for c in n)
+    return f"{n_super}√{content}"
 
 
-def _convert_superscript(content):
+def _convert_superscript(content, budget=None):
     """将内容转换为上标 Unicode"""
-    content = _convert_latex_content(content)
+    content = _convert_latex_content(content, budget)
     return ''.join(SUPERSCRIPT_MAP.get(c, c) for c in content)
 
 
-def _convert_subscript(content):
+def _convert_subscript(content, budget=None):
     """将内容转换为下标 Unicode"""
-    content = _convert_latex_content(content)
+    content = _convert_latex_content(content, budget)
     return ''.join(SUBSCRIPT_MAP.get(c, c) for c in content)
 
 
-def _convert_latex_content(text):
-    """转换 LaTeX 内容中的符号（不包括 $ 定界符）"""
-    result = text
+def _convert_latex_content(text, budget=None):
+    """
+    转换 LaTeX 内容中的符号（不包括 $ 定界符）
+
+    每一轮替换都是线性时间；分数与根号由内向外逐层转换，轮数等于嵌套层数，
+    由 convert_latex 的层数上限约束。budget 为 _WorkBudget，每一轮扫描按字符数扣减，
+    用尽时抛出 _FormulaTooComplex。
+    """
+    _charge(budget, text)
 
     # 处理 \text{...}、\mathrm{...} 等文本命令
-    result = re.sub(r'\\(?:text|mathrm|mathbf|mathit|textbf|textit)\s*\{([^{}]+)\}',
-                    r'\1', result)
+    result = _TEXT_COMMAND_RE.sub(r'\1', text)
 
     # 处理 \frac{a}{b}
     while r'\frac' in result:
-        new_result = re.sub(r'\\frac\s*\{([^{}]+)\}\s*\{([^{}]+)\}',
-                            lambda m: _convert_frac(m.group(0)), result)
+        new_result = _FRAC_RE.sub(lambda m: _convert_frac(m, budget), result)
         if new_result == result:
             break
         result = new_result
+        _charge(budget, result)
 
     # 处理 \sqrt[n]{x} 和 \sqrt{x}
     while r'\sqrt' in result:
-        new_result = re.sub(r'\\sqrt\s*(?:\[[^\]]+\])?\s*\{[^{}]+\}',
-                            lambda m: _convert_sqrt(m.group(0)), result)
+        new_result = _SQRT_RE.sub(lambda m: _convert_sqrt(m, budget), result)
         if new_result == result:
             break
         result = new_result
+        _charge(budget, result)
 
     # 处理上标 ^{...} 和 ^x
-    result = re.sub(r'\^\{([^{}]+)\}',
-                    lambda m: _convert_superscript(m.group(1)), result)
-    result = re.sub(r'\^([0-9a-zA-Z])',
-                    lambda m: _convert_superscript(m.group(1)), result)
+    if '^' in result:
+        result = _SUPERSCRIPT_GROUP_RE.sub(
+            lambda m: _convert_superscript(m.group(1), budget), result)
+        result = _SUPERSCRIPT_CHAR_RE.sub(
+            lambda m: _convert_superscript(m.group(1), budget), result)
 
     # 处理下标 _{...} 和 _x
-    result = re.sub(r'_\{([^{}]+)\}',
-                    lambda m: _convert_subscript(m.group(1)), result)
-    result = re.sub(r'_([0-9a-zA-Z])',
-                    lambda m: _convert_subscript(m.group(1)), result)
+    if '_' in result:
+        result = _SUBSCRIPT_GROUP_RE.sub(
+            lambda m: _convert_subscript(m.group(1), budget), result)
+        result = _SUBSCRIPT_CHAR_RE.sub(
+            lambda m: _convert_subscript(m.group(1), budget), result)
 
-    # 替换希腊字母（先替换长的，避免部分匹配）
-    for latex, unicode_char in sorted(GREEK_LETTERS.items(), key=lambda x: -len(x[0])):
-        result = result.replace(latex, unicode_char)
-
-    # 替换数学符号（先替换长的）
-    for latex, unicode_char in sorted(MATH_SYMBOLS.items(), key=lambda x: -len(x[0])):
-        result = result.replace(latex, unicode_char)
+    # 替换希腊字母和数学符号
+    if '\\' in result:
+        result = _SYMBOL_RE.sub(lambda m: _SYMBOLS[m.group(0)], result)
 
     # 清理多余空格
-    result = re.sub(r'\s+', ' ', result).strip()
+    result = _WHITESPACE_RE.sub(' ', result).strip()
 
     return result
 
 
-def convert_latex_in_text(text):
+def convert_latex(expression):
     """
-    将文本中所有 LaTeX 数学表达式转换为 Unicode
+    将一个 LaTeX 数学表达式（不含 $ 定界符）转换为 Unicode
 
-    处理两种形式：
-    - 行内公式：$...$
-    - 展示公式：$$...$$
+    由渲染器在输出解析器识别出的公式 Token 时调用，分数转换为分数占位符。
+    长度超过 MAX_FORMULA_LENGTH、花括号嵌套超过 MAX_FORMULA_DEPTH
+    或转换工作量超过 MAX_FORMULA_WORK 的公式原样返回；结果只取决于公式本身。
 
     Args:
-        text: 包含 LaTeX 表达式的文本
+        expression: 公式内容
 
     Returns:
-        LaTeX 表达式被替换为 Unicode 的文本
+        转换后的文本
     """
-    if '$' not in text:
-        return text
+    if len(expression) > MAX_FORMULA_LENGTH or _brace_depth(expression) > MAX_FORMULA_DEPTH:
+        return expression
+    try:
+        return _convert_latex_content(expression, _WorkBudget(MAX_FORMULA_WORK))
+    except _FormulaTooComplex:
+        return expression
 
-    # 先处理 $$...$$ 展示公式
-    result = re.sub(
-        r'\$\$(.+?)\$\$',
-        lambda m: _convert_latex_content(m.group(1)),
-        text,
-        flags=re.DOTALL
-    )
-
-    # 再处理 $...$ 行内公式（避免匹配已处理的 $$）
-    result = re.sub(
-        r'(?<!\$)\$(?!\$)(.+?)(?<!\$)\$(?!\$)',
-        lambda m: _convert_latex_content(m.group(1)),
-        result
-    )
-
-    return result
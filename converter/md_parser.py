@@ -1,10 +1,28 @@
 """
 Markdown 解析模块
 使用 markdown-it-py 将 Markdown 文本解析为 Token 流
+
+共享的解析器可在多个线程中同时使用：每次解析都有独立的状态对象，
+规则链在创建时即编译完成，之后只读。
 """
+import re
+import threading
+
 from markdown_it import MarkdownIt
+from mdit_py_plugins.dollarmath import dollarmath_plugin
+from mdit_py_plugins.dollarmath.index import math_block_dollar
 from mdit_py_plugins.front_matter import front_matter_plugin
 
+# 裸网址：协议名（位于已累积文本的末尾）与 :// 之后直到空白或尖括号的部分；
+# 末尾的标点按 GFM 的约定不算在网址内
+BARE_URL_SCHEME_RE = re.compile(r'(?:^|[^A-Za-z0-9.+-])(https?|ftp)$', re.IGNORECASE)
+BARE_URL_REST_RE = re.compile(r'://[^\s<>]+')
+BARE_URL_TRAILING = '.,:;!?"\'*_~)'
+
+# 复用的解析器实例（首次使用时创建）
+_parser = None
+_parser_lock = threading.Lock()
+
 
 def create_parser():
     """创建并返回配置好的 Markdown 解析器"""
@@ -15,9 +33,80 @@ def create_parser():
     md.enable("strikethrough")
     # 前置元数据插件
     front_matter_plugin(md)
+    # 数学公式：$...$ 与行内 $$...$$ 生成 math_inline / math_inline_double，
+    # 独立成段的 $$...$$ 生成 math_block；代码和链接中的 $ 不受影响。
+    # 与 Pandoc 的约定一致：开始的 $ 后、结束的 $ 前不能是空白，结束的 $ 后不能是数字，
+    # 避免把 "$5 和 $10" 这样的金额当成公式
+    dollarmath_plugin(md, allow_space=False, allow_digits=False, double_inline=True)
+    # 裸网址整体作为文本，其中的 $ 不会被当成公式
+    md.inline.ruler.after('text', 'bare_url', bare_url)
+    # 展示公式不能包含空行（与 LaTeX、GitHub 一致），并且不能越出所在的列表项或引用块
+    md.block.ruler.at('math_block', bounded_math_block(math_block_dollar(allow_blank_lines=False)))
+    # 立即编译各规则链。markdown-it 在首次使用时才编译，编译过程中
+    # 其他线程可能读到尚未填充完的规则表，解析出缺少内容的 Token 流
+    for ruler in (md.core.ruler, md.block.ruler, md.inline.ruler, md.inline.ruler2):
+        ruler.getRules('')
     return md
 
 
+def bounded_math_block(rule):
+    """
+    限定展示公式规则查找结束 $$ 的范围
+
+    插件的规则从 $$ 开始的行一直向后查找结束行，直到文档末尾；
+    列表项中每一项都以 $$ 开头、却都没有结束时，每一项都要扫描之后的全部行，
+    解析时间随行数平方增长。这里在调用前先找出公式最多能延续到哪一行：
+    遇到空行或缩进小于当前容器（列表项）的行即停止，与围栏代码块的规则一致。
+    失败的查找只扫描到段落结束，之后的行由段落规则一次消费，整体为线性时间。
+    """
+    def math_block(state, startLine, endLine, silent):
+        start = state.bMarks[startLine] + state.tShift[startLine]
+        if not state.src.startswith('$$', start, state.eMarks[startLine]):
+            return False
+        line = startLine + 1
+        while (line < endLine and not state.isEmpty(line)
+               and state.sCount[line] >= state.blkIndent):
+            line += 1
+        return rule(state, startLine, line, silent)
+    return math_block
+
+
+def bare_url(state, silent):
+    """
+    将正文中的裸网址（如 http://example.com/$a$b）原样作为文本
+
+    markdown-it 的文本规则在 : 处停下，这里取回已累积文本末尾的协议名，
+    把网址的其余部分直接并入文本，之后的行内规则（公式、强调等）不会看到
+    网址中的字符。不生成链接，渲染结果与普通文本相同。
+    """
+    pos = state.pos
+    if state.src[pos] != ':' or state.linkLevel > 0:
+        return False
+    # 协议名最长 5 个字符，只需检查文本末尾的 6 个字符（含协议名之前的一个）
+    if not BARE_URL_SCHEME_RE.search(state.pending[-6:]):
+        return False
+    match = BARE_URL_REST_RE.match(state.src, pos, state.posMax)
+    if match is None:
+        return False
+    rest = match.group().rstrip(BARE_URL_TRAILING)
+    if len(rest) <= 3:
+        return False
+    if not silent:
+        state.pending += rest
+    state.pos += len(rest)
+    return True
+
+
+def get_parser():
+    """返回共享的解析器实例，避免每次转换都重新初始化规则链"""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = create_parser()
+    return _parser
+
+
 def parse_markdown(text: str) -> list:
     """
     解析 Markdown 文本，返回 Token 列表
@@ -28,6 +117,5 @@ def parse_markdown(text: str) -> list:
     Returns:
         Token 列表
     """
-    md = create_parser()
-    tokens = md.parse(text)
+    tokens = get_parser().parse(text)
     return tokens
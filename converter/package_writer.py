@@ -0,0 +1,362 @@
+"""
+.docx 打包模块
+python-docx 保存时会重新序列化并压缩每一个部件。同一模板生成的文档中，
+styles.xml、theme1.xml、fontTable.xml、settings.xml 等部件在转换过程中不会改变，
+这里预先从模板中取出它们已压缩的数据，保存时原样写入输出 ZIP，
+只有 document.xml 等会变化的部件才逐次序列化和压缩。
+
+ZIP 由本模块直接写出（本地文件头、数据、中央目录），不依赖 zipfile.ZipFile 的内部状态；
+复用的压缩数据和新压缩的数据都按顺序写入，不需要回退，输出可以是不可定位的流。
+
+确定性输出（date_time 参数）时所有 ZIP 条目使用同一个固定时间：部件顺序
+（关系图的遍历顺序）、[Content_Types].xml（按扩展名与部件名排序）以及 XML 属性顺序
+（按创建顺序序列化）本来就只取决于文档内容，相同的输入因此得到逐字节相同的 .docx。
+
+save_flat_package 输出 Flat OPC：整个包写成一个 XML 文档（Word 可直接打开），
+各部件依次写入输出流，不经过 ZIP 压缩，后续处理 XML 的工具也不必再解压。
+模板静态部件的 XML 片段同样预先生成、原样写入。
+"""
+import base64
+import io
+import os
+import struct
+import time
+import zipfile
+import zlib
+from xml.sax.saxutils import quoteattr
+
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.packuri import PACKAGE_URI, PackURI
+from docx.opc.pkgwriter import _ContentTypesItem
+
+CONTENT_TYPES_MEMBER = '[Content_Types].xml'
+PACKAGE_RELS_MEMBER = PACKAGE_URI.rels_uri.membername
+PACKAGE_RELS_PARTNAME = str(PACKAGE_URI.rels_uri)
+
+# 渲染过程中总会修改的部件（连同其关系部件）每次都重新序列化；
+# 只在部分文档中修改的部件（如有序列表写入的 numbering.xml）由调用方通过
+# save_package 的 modified 参数指明，其余情况仍复用模板中的压缩数据
+DYNAMIC_PARTS = frozenset({'/word/document.xml'})
+
+# 确定性输出使用的 ZIP 条目时间（ZIP 格式能表示的最早时间）
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Flat OPC 的包头与包尾；mso-application 处理指令让系统用 Word 打开该 XML
+FLAT_OPC_HEADER = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<?mso-application progid="Word.Document"?>\n'
+    b'<pkg:package xmlns:pkg="http://schemas.microsoft.com/office/2006/xmlPackage">'
+)
+FLAT_OPC_FOOTER = b'</pkg:package>\n'
+
+# ZIP 本地文件头、中央目录项与目录结束记录（APPNOTE 4.3.7 / 4.3.12 / 4.3.16）
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_CENTRAL_HEADER = struct.Struct('<4s4B4H3L5H2L')
+_END_RECORD = struct.Struct('<4s4H2LH')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+_END_SIGNATURE = b'PK\x05\x06'
+# 需要的解压版本 2.0（deflate），创建系统为 Unix（与 zipfile.ZipInfo 的默认值相同）
+_ZIP_VERSION = 20
+_CREATE_SYSTEM = 3
+# 新写入条目的权限（rw-------，与 ZipFile.writestr 相同）
+_EXTERNAL_ATTR = 0o600 << 16
+# 不使用 ZIP64 时大小与偏移量的上限
+_ZIP32_LIMIT = 0xFFFFFFFF
+_ZIP32_COUNT_LIMIT = 0xFFFF
+
+
+def _part_types(parts):
+    """部件名与内容类型的集合，决定 [Content_Types].xml 的内容"""
+    return frozenset((str(part.partname), part.content_type) for part in parts)
+
+
+def _rels_signature(rels):
+    """关系集合的签名，决定 .rels 部件的内容"""
+    return frozenset(
+        (rel.rId, rel.reltype, rel.target_ref, rel.is_external) for rel in rels.values()
+    )
+
+
+def _xml_body(blob):
+    """去掉 XML 声明，返回根元素开始的内容（memoryview，不复制）"""
+    start = 0
+    if blob.startswith(b'<?xml'):
+        start = blob.index(b'?>') + 2
+        while blob[start:start + 1].isspace():
+            start += 1
+    return memoryview(blob)[start:]
+
+
+def _flat_part(partname, content_type, blob):
+    """
+    一个部件的 Flat OPC 片段（字节块列表）
+
+    XML 部件去掉声明后嵌入 pkg:xmlData，其余部件（图片等）以 base64 写入 pkg:binaryData。
+    """
+    head = (f'<pkg:part pkg:name={quoteattr(partname)} '
+            f'pkg:contentType={quoteattr(content_type)}>').encode('utf-8')
+    if content_type.endswith('xml'):
+        return [head, b'<pkg:xmlData>', _xml_body(blob), b'</pkg:xmlData></pkg:part>']
+    return [head, b'<pkg:binaryData>', base64.encodebytes(blob),
+            b'</pkg:binaryData></pkg:part>']
+
+
+class PrecompressedTemplate:
+    """
+    已编译的模板：.docx 字节，其中静态部件的 ZIP 条目和压缩数据，
+    以及各部件的 Flat OPC 片段
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+        package = Document(io.BytesIO(data)).part.package
+        parts = package.parts
+        self.part_types = _part_types(parts)
+        self.pkg_rels = _rels_signature(package.rels)
+
+        dynamic = set()
+        for partname in DYNAMIC_PARTS:
+            uri = PackURI(partname)
+            dynamic.add(uri.membername)
+            dynamic.add(uri.rels_uri.membername)
+
+        # 成员名 → (ZipInfo, 压缩数据)；ZipInfo 只用于读取其公开属性
+        self.members = {}
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            for info in zf.infolist():
+                if info.filename in dynamic:
+                    continue
+                fields = _LOCAL_HEADER.unpack_from(data, info.header_offset)
+                start = info.header_offset + _LOCAL_HEADER.size + fields[-2] + fields[-1]
+                entry = zipfile.ZipInfo(info.filename, info.date_time)
+                entry.compress_type = info.compress_type
+                entry.CRC = info.CRC
+                entry.compress_size = info.compress_size
+                entry.file_size = info.file_size
+                entry.external_attr = info.external_attr
+                self.members[info.filename] = (
+                    entry, data[start:start + info.compress_size]
+                )
+
+        # 部件名 → Flat OPC 片段
+        self.flat_parts = {
+            PACKAGE_RELS_PARTNAME: b''.join(
+                _flat_part(PACKAGE_RELS_PARTNAME, CT.OPC_RELATIONSHIPS, package.rels.xml)
+            ),
+        }
+        for part in parts:
+            partname = str(part.partname)
+            if partname in DYNAMIC_PARTS:
+                continue
+            self.flat_parts[partname] = b''.join(
+                _flat_part(partname, part.content_type, part.blob)
+            )
+            if len(part.rels):
+                rels_name = str(part.partname.rels_uri)
+                self.flat_parts[rels_name] = b''.join(
+                    _flat_part(rels_name, CT.OPC_RELATIONSHIPS, part.rels.xml)
+                )
+
+
+def _dos_date_time(date_time):
+    """(年, 月, 日, 时, 分, 秒) → ZIP 条目中的 (DOS 时间, DOS 日期)"""
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11 | minute << 5 | second // 2,
+            (year - 1980) << 9 | month << 5 | day)
+
+
+class _ZipWriter:
+    """
+    顺序写出 ZIP 的最小实现：每个条目的 CRC 与大小在写入本地文件头之前已知，
+    因此不需要数据描述符，也不回退修改已写出的数据；关闭时写出中央目录
+    """
+
+    def __init__(self, write):
+        self._write = write
+        self._offset = 0
+        self._central = []
+
+    def _emit(self, data):
+        self._write(data)
+        self._offset += len(data)
+
+    def write_raw(self, name, date_time, compress_type, crc, compressed, file_size,
+                  external_attr):
+        """写入一个已压缩的条目"""
+        if max(len(compressed), file_size, self._offset) > _ZIP32_LIMIT:
+            raise zipfile.LargeZipFile('文档包超过 4 GiB，不支持 ZIP64')
+        filename = name.encode('ascii')
+        dos_time, dos_date = _dos_date_time(date_time)
+        header_offset = self._offset
+        self._emit(_LOCAL_HEADER.pack(
+            _LOCAL_SIGNATURE, _ZIP_VERSION, 0, compress_type, dos_time, dos_date,
+            crc, len(compressed), file_size, len(filename), 0,
+        ))
+        self._emit(filename)
+        self._emit(compressed)
+        self._central.append(_CENTRAL_HEADER.pack(
+            _CENTRAL_SIGNATURE, _ZIP_VERSION, _CREATE_SYSTEM, _ZIP_VERSION, 0, 0,
+            compress_type, dos_time, dos_date, crc, len(compressed), file_size,
+            len(filename), 0, 0, 0, 0, external_attr, header_offset,
+        ) + filename)
+
+    def write_template(self, template_entry, compressed, date_time=None):
+        """将模板中已压缩的条目原样写入；date_time 为 None 时保留模板中的时间"""
+        self.write_raw(
+            template_entry.filename, date_time or template_entry.date_time,
+            template_entry.compress_type, template_entry.CRC, compressed,
+            template_entry.file_size, template_entry.external_attr,
+        )
+
+    def write(self, name, data, date_time=None):
+        """压缩写入一个条目；date_time 为 None 时使用当前时间（与 ZipFile.writestr 相同）"""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        self.write_raw(
+            name, date_time or time.localtime()[:6], zipfile.ZIP_DEFLATED,
+            zlib.crc32(data), compressed, len(data), _EXTERNAL_ATTR,
+        )
+
+    def write_member(self, members, name, serialize, date_time=None):
+        """模板中有该成员时复用压缩数据，否则调用 serialize() 生成内容并压缩"""
+        cached = members.get(name)
+        if cached is not None:
+            self.write_template(*cached, date_time)
+        else:
+            self.write(name, serialize(), date_time)
+
+    def close(self):
+        """写出中央目录与目录结束记录"""
+        count = len(self._central)
+        if count > _ZIP32_COUNT_LIMIT or self._offset > _ZIP32_LIMIT:
+            raise zipfile.LargeZipFile('文档包条目过多或超过 4 GiB，不支持 ZIP64')
+        start = self._offset
+        for record in self._central:
+            self._emit(record)
+        self._emit(_END_RECORD.pack(
+            _END_SIGNATURE, 0, 0, count, count, self._offset - start, start, 0,
+        ))
+
+
+def save_package(document, output, template, modified=(), date_time=None):
+    """
+    保存 python-docx 文档，静态部件直接复用 template 中的压缩数据
+
+    部件顺序和内容与 Document.save 相同。
+
+    Args:
+        document: 由 template.data 加载并经过渲染的 Document
+        output: 目标文件路径或二进制文件对象
+        template: PrecompressedTemplate
+        modified: 本次渲染修改过的其他模板部件名（如 '/word/numbering.xml'）
+        date_time: 所有 ZIP 条目使用的修改时间（如 FIXED_DATE_TIME），
+                   None 时新写入的条目使用当前时间，复用的条目保留模板中的时间
+    """
+    package = document.part.package
+    parts = package.parts
+    for part in parts:
+        part.before_marshal()
+
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as f:
+            _write_zip(package, parts, f.write, template, modified, date_time)
+    else:
+        _write_zip(package, parts, output.write, template, modified, date_time)
+
+
+def _write_zip(package, parts, write, template, modified, date_time):
+    """按 Document.save 的部件顺序写出整个 ZIP"""
+    members = template.members
+    zw = _ZipWriter(write)
+    if _part_types(parts) == template.part_types:
+        zw.write_template(*members[CONTENT_TYPES_MEMBER], date_time)
+    else:
+        zw.write(CONTENT_TYPES_MEMBER, _ContentTypesItem.from_parts(parts).blob, date_time)
+
+    if _rels_signature(package.rels) == template.pkg_rels:
+        zw.write_template(*members[PACKAGE_RELS_MEMBER], date_time)
+    else:
+        zw.write(PACKAGE_RELS_MEMBER, package.rels.xml, date_time)
+
+    for part in parts:
+        name = part.partname.membername
+        partname = str(part.partname)
+        if partname in DYNAMIC_PARTS or partname in modified:
+            zw.write(name, part.blob, date_time)
+            if len(part.rels):
+                zw.write(part.partname.rels_uri.membername, part.rels.xml, date_time)
+            continue
+        zw.write_member(members, name, lambda: part.blob, date_time)
+        if len(part.rels):
+            zw.write_member(members, part.partname.rels_uri.membername,
+                            lambda: part.rels.xml, date_time)
+    zw.close()
+
+
+def _write_flat_member(write, cached, partname, content_type, serialize):
+    """cached 中有该部件时写入预先生成的片段，否则调用 serialize() 生成内容"""
+    fragment = cached.get(partname)
+    if fragment is not None:
+        write(fragment)
+        return
+    for chunk in _flat_part(partname, content_type, serialize()):
+        write(chunk)
+
+
+def _write_flat(document, write, template, modified):
+    package = document.part.package
+    parts = package.parts
+    for part in parts:
+        part.before_marshal()
+
+    cached = template.flat_parts
+    write(FLAT_OPC_HEADER)
+    if _rels_signature(package.rels) == template.pkg_rels:
+        write(cached[PACKAGE_RELS_PARTNAME])
+    else:
+        for chunk in _flat_part(PACKAGE_RELS_PARTNAME, CT.OPC_RELATIONSHIPS,
+                                package.rels.xml):
+            write(chunk)
+
+    for part in parts:
+        partname = str(part.partname)
+        rels_name = str(part.partname.rels_uri)
+        if partname in DYNAMIC_PARTS or partname in modified:
+            for chunk in _flat_part(partname, part.content_type, part.blob):
+                write(chunk)
+            if len(part.rels):
+                for chunk in _flat_part(rels_name, CT.OPC_RELATIONSHIPS, part.rels.xml):
+                    write(chunk)
+            continue
+        _write_flat_member(write, cached, partname, part.content_type, lambda: part.blob)
+        if len(part.rels):
+            _write_flat_member(write, cached, rels_name, CT.OPC_RELATIONSHIPS,
+                               lambda: part.rels.xml)
+    write(FLAT_OPC_FOOTER)
+
+
+def save_flat_package(document, output, template, modified=()):
+    """
+    以 Flat OPC（单个 XML 文档）保存 python-docx 文档
+
+    部件按 save_package 的顺序逐个写入 output，每个部件序列化后立即写出，
+    不构建 ZIP，也不要求 output 可回退。Flat OPC 中每个部件自带内容类型，
+    因此没有 [Content_Types].xml，也没有 ZIP 条目时间；文档属性固定时
+    相同的输入总是得到相同的字节。
+
+    Args:
+        document: 由 template.data 加载并经过渲染的 Document
+        output: 目标文件路径或二进制文件对象
+        template: PrecompressedTemplate
+        modified: 本次渲染修改过的其他模板部件名（如 '/word/numbering.xml'）
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as f:
+            _write_flat(document, f.write, template, modified)
+    else:
+        _write_flat(document, output.write, template, modified)
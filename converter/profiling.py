@@ -0,0 +1,159 @@
+"""
+转换性能分析模块
+记录每种 Token / 块 / 行内片段的数量与累计耗时，以及最慢的若干块及其源文本行号，
+用于定位某篇文档转换缓慢的原因。默认关闭，未传入分析器时渲染路径没有额外计时。
+
+    profiler = ConversionProfiler()
+    convert_markdown_to_docx(text, 'out.docx', profiler=profiler)
+    profiler.write('report.json')
+
+命令行:
+    python3 -m converter.profiling input.md [-o report.json] [--top 20]
+"""
+import heapq
+import json
+import time
+from contextlib import contextmanager
+
+# 块级节点类型 → 对应的 markdown-it Token 名称
+BLOCK_NAMES = {
+    'Heading': 'heading',
+    'Paragraph': 'paragraph',
+    'ListItem': 'list_item',
+    'Quote': 'blockquote',
+    'CodeBlock': 'code_block',
+    'Table': 'table',
+    'MathBlock': 'math_block',
+    'Rule': 'hr',
+}
+
+# 默认保留的最慢块数量
+DEFAULT_TOP = 10
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class ConversionProfiler:
+    """收集一次转换的分段耗时与按类型汇总的统计"""
+
+    def __init__(self, top=DEFAULT_TOP):
+        """
+        Args:
+            top: 报告中保留的最慢块数量
+        """
+        self.top = top
+        self.phases = {}
+        self.tokens = {}
+        self.blocks = {}
+        self.inlines = {}
+        self._slowest = []  # (耗时, 序号, 类型, 行范围) 小顶堆
+        self._sequence = 0
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个转换阶段（parse / tree / render / save）的耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count_tokens(self, tokens):
+        """统计 Token 流中各类型（含 inline 子节点）的数量"""
+        counts = self.tokens
+        for token in tokens:
+            counts[token.type] = counts.get(token.type, 0) + 1
+            if token.children:
+                for child in token.children:
+                    counts[child.type] = counts.get(child.type, 0) + 1
+
+    def add_block(self, node, seconds):
+        """记录一个块级节点的渲染耗时（包含其中行内片段的耗时）"""
+        name = BLOCK_NAMES.get(type(node).__name__, type(node).__name__)
+        entry = self.blocks.get(name)
+        if entry is None:
+            entry = self.blocks[name] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+        self._sequence += 1
+        item = (seconds, self._sequence, name, getattr(node, 'lines', None))
+        if len(self._slowest) < self.top:
+            heapq.heappush(self._slowest, item)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def add_inline(self, kind, seconds):
+        """记录一个行内片段（text / link / fraction / code_inline / image）的渲染耗时"""
+        entry = self.inlines.get(kind)
+        if entry is None:
+            entry = self.inlines[kind] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def report(self):
+        """返回可序列化为 JSON 的分析报告"""
+        def by_type(table):
+            rows = sorted(table.items(), key=lambda kv: kv[1][1], reverse=True)
+            return {name: {'count': count, 'total_ms': _ms(total)}
+                    for name, (count, total) in rows}
+
+        slowest = []
+        for seconds, _, name, lines in sorted(self._slowest, reverse=True):
+            slowest.append({
+                'type': name,
+                # 转换为从 1 开始、包含结束行的行号
+                'lines': [lines[0] + 1, lines[1]] if lines else None,
+                'ms': _ms(seconds),
+            })
+
+        return {
+            'phases_ms': {name: _ms(total) for name, total in self.phases.items()},
+            'total_ms': _ms(sum(self.phases.values())),
+            'tokens': dict(sorted(self.tokens.items(), key=lambda kv: kv[1], reverse=True)),
+            'blocks': by_type(self.blocks),
+            'inlines': by_type(self.inlines),
+            'slowest_blocks': slowest,
+        }
+
+    def write(self, path):
+        """将报告写入 JSON 文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+
+def main():
+    import argparse
+    import os
+    import tempfile
+
+    from .docx_builder import convert_markdown_to_docx
+
+    parser = argparse.ArgumentParser(description='分析单个 Markdown 文档的转换耗时')
+    parser.add_argument('input', help='Markdown 文件路径')
+    parser.add_argument('-o', '--output', help='报告 JSON 路径（默认输出到标准输出）')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='列出的最慢块数量')
+    parser.add_argument('--profile', help='样式方案名称')
+    args = parser.parse_args()
+
+    with open(args.input, encoding='utf-8') as f:
+        text = f.read()
+
+    profiler = ConversionProfiler(top=args.top)
+    fd, docx_path = tempfile.mkstemp(suffix='.docx')
+    os.close(fd)
+    try:
+        convert_markdown_to_docx(text, docx_path, profile=args.profile, profiler=profiler)
+    finally:
+        os.remove(docx_path)
+
+    if args.output:
+        profiler.write(args.output)
+    else:
+        print(json.dumps(profiler.report(), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,8 @@
 Word 文档样式定义模块
 定义字体、字号、颜色等样式常量
 """
+import threading
+
 from docx.shared import Pt, Cm, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
@@ -104,3 +106,120 @@ class PageLayout:
     BOTTOM_MARGIN = Cm(2.54)
     LEFT_MARGIN = Cm(3.18)
     RIGHT_MARGIN = Cm(3.18)
+
+
+# ============================================================
+# 样式方案（Profile）
+# ============================================================
+# 配置文件路径（JSON），未设置时只有内置的 default 方案
+PROFILES_ENV = 'MDFORWORD_STYLE_PROFILES'
+DEFAULT_PROFILE = 'default'
+
+
+class StyleProfile:
+    """
+    一套命名的样式方案
+
+    各分组沿用上面的常量类；配置中的覆盖项以子类属性的形式叠加，
+    因此渲染代码可以像使用 Fonts / Colors 一样访问 profile.fonts / profile.colors。
+    """
+
+    def __init__(self, name, fonts=Fonts, font_sizes=FontSizes, colors=Colors,
+                 spacing=Spacing, page_layout=PageLayout):
+        self.name = name
+        self.fonts = fonts
+        self.font_sizes = font_sizes
+        self.colors = colors
+        self.spacing = spacing
+        self.page_layout = page_layout
+
+    @classmethod
+    def from_config(cls, name, config):
+        """
+        从配置字典创建样式方案，未出现的项沿用默认值
+
+        配置示例（字号、间距单位为磅，页边距单位为厘米，颜色为十六进制）:
+            {
+                "fonts": {"CN_BODY": "宋体", "EN_BODY": "Arial"},
+                "font_sizes": {"BODY": 10.5, "H1": 20},
+                "colors": {"HEADING": "003366"},
+                "spacing": {"BODY_AFTER": 4, "LINE_SPACING": 1.5},
+                "page_layout": {"LEFT_MARGIN": 2.5}
+            }
+        """
+        font_sizes = _override(FontSizes, config.get('font_sizes'), lambda k, v: Pt(v))
+        if config.get('font_sizes'):
+            font_sizes.HEADING_MAP = {
+                level: getattr(font_sizes, f'H{level}') for level in range(1, 7)
+            }
+        return cls(
+            name,
+            fonts=_override(Fonts, config.get('fonts'), lambda k, v: str(v)),
+            font_sizes=font_sizes,
+            colors=_override(Colors, config.get('colors'), lambda k, v: RGBColor.from_string(v)),
+            spacing=_override(Spacing, config.get('spacing'), _spacing_value),
+            page_layout=_override(PageLayout, config.get('page_layout'), lambda k, v: Cm(v)),
+        )
+
+
+def _spacing_value(key, value):
+    """行距为倍数，其余间距为磅"""
+    return float(value) if key == 'LINE_SPACING' else Pt(value)
+
+
+def _override(base, values, convert):
+    """以 base 为父类创建带覆盖值的新常量类"""
+    if not values:
+        return base
+    attrs = {}
+    for key, value in values.items():
+        if not hasattr(base, key):
+            raise ValueError(f'未知的样式项: {base.__name__}.{key}')
+        attrs[key] = convert(key, value)
+    return type(base.__name__, (base,), attrs)
+
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+
+def load_profiles(path=None):
+    """
+    加载样式方案配置
+
+    Args:
+        path: JSON 配置文件路径；默认读取环境变量 MDFORWORD_STYLE_PROFILES
+
+    Returns:
+        {方案名: StyleProfile} 字典，总是包含 default
+    """
+    import json
+    import os
+
+    profiles = {DEFAULT_PROFILE: StyleProfile(DEFAULT_PROFILE)}
+    path = path or os.environ.get(PROFILES_ENV)
+    if path:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        for name, profile_config in config.items():
+            profiles[name] = StyleProfile.from_config(name, profile_config)
+    return profiles
+
+
+def get_profile(name=None):
+    """按名称获取样式方案（首次调用时加载配置），不存在时抛出 KeyError"""
+    global _profiles
+    if _profiles is None:
+        with _profiles_lock:
+            if _profiles is None:
+                _profiles = load_profiles()
+    profile = _profiles.get(name or DEFAULT_PROFILE)
+    if profile is None:
+        raise KeyError(f'未知的样式方案: {name}')
+    return profile
+
+
+def profile_names():
+    """返回所有可用的样式方案名称"""
+    get_profile()
+    return list(_profiles)
@@ -3,10 +3,38 @@ MD → Word 桌面应用
 使用 pywebview 封装 Flask Web 应用为 macOS 原生窗口
 """
 import threading
+import socket
+import time
 import sys
 import os
 import shutil
 
+# 进程启动时刻，用于启动耗时追踪
+_START_TIME = time.perf_counter()
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 5001
+SERVER_URL = f'http://{SERVER_HOST}:{SERVER_PORT}'
+
+# 服务就绪前显示的占位页面（不依赖 Flask，窗口可立即出现）
+SPLASH_HTML = """
+<html><body style="margin:0;display:flex;align-items:center;justify-content:center;
+height:100vh;font-family:-apple-system,sans-serif;color:#888;background:#0f0f1a">
+<div>正在启动 MD → Word …</div>
+</body></html>
+"""
+
+
+def _trace(event):
+    """
+    输出启动阶段耗时（设置环境变量 MDFORWORD_STARTUP_TRACE=1 时启用）
+    格式: [startup] <事件> <毫秒>，供 benchmarks/startup.py 解析
+    """
+    if os.environ.get('MDFORWORD_STARTUP_TRACE'):
+        elapsed = (time.perf_counter() - _START_TIME) * 1000
+        sys.stderr.write(f'[startup] {event} {elapsed:.1f}\n')
+        sys.stderr.flush()
+
 
 def _get_resource_path():
     """获取资源文件路径（兼容打包和开发模式）"""
@@ -23,28 +51,24 @@ def _get_resource_path():
 class Api:
     """暴露给 JavaScript 的 Python API"""
 
-    def __init__(self, window_ref, temp_dir):
+    def __init__(self, window_ref, store):
         self._window = window_ref
-        self._temp_dir = temp_dir
+        self._store = store
 
-    def save_file(self, download_id, filename):
+    def _ask_save_path(self, filename):
         """
-        弹出 macOS 原生保存对话框，让用户选择保存位置
-        由 JavaScript 调用: window.pywebview.api.save_file(id, name)
+        弹出 macOS 原生保存对话框
+
+        Returns:
+            (目标路径, 错误信息) — 成功时错误信息为 None
         """
         import webview
 
         # 获取窗口引用
         window = webview.windows[0] if webview.windows else None
         if not window:
-            return {'success': False, 'error': '窗口未找到'}
+            return None, '窗口未找到'
 
-        # 临时文件路径
-        temp_path = os.path.join(self._temp_dir, f'{download_id}.docx')
-        if not os.path.exists(temp_path):
-            return {'success': False, 'error': '文件不存在或已过期'}
-
-        # 弹出原生保存文件对话框
         try:
             save_path = window.create_file_dialog(
                 webview.SAVE_DIALOG,
@@ -53,54 +77,107 @@ class Api:
                 file_types=('Word 文档 (*.docx)',),
             )
         except Exception as e:
-            return {'success': False, 'error': f'对话框错误: {str(e)}'}
-
-        if save_path:
-            # save_path 可能是字符串或元组
-            target = save_path if isinstance(save_path, str) else save_path[0]
-            if not target.endswith('.docx'):
-                target += '.docx'
-            try:
-                shutil.copy2(temp_path, target)
-                # 清理临时文件
-                os.remove(temp_path)
-                return {'success': True, 'path': target}
-            except Exception as e:
-                return {'success': False, 'error': f'保存失败: {str(e)}'}
-        else:
-            return {'success': False, 'error': '用户取消保存'}
+            return None, f'对话框错误: {str(e)}'
 
+        if not save_path:
+            return None, '用户取消保存'
 
-def main():
-    resource_dir = _get_resource_path()
+        # save_path 可能是字符串或元组
+        target = save_path if isinstance(save_path, str) else save_path[0]
+        if not target.endswith('.docx'):
+            target += '.docx'
+        return target, None
 
-    # 设置 Flask 模板和静态文件路径
-    template_dir = os.path.join(resource_dir, 'templates')
-    static_dir = os.path.join(resource_dir, 'static')
+    def save_file(self, download_id, filename):
+        """
+        弹出 macOS 原生保存对话框，让用户选择保存位置
+        由 JavaScript 调用: window.pywebview.api.save_file(id, name)
+        """
+        if self._store.stat(download_id) is None:
+            return {'success': False, 'error': '文件不存在或已过期'}
 
-    # 切换工作目录到资源目录
-    os.chdir(resource_dir)
+        target, error = self._ask_save_path(filename)
+        if error:
+            return {'success': False, 'error': error}
 
-    # 导入并配置 Flask app
-    from app import app
-    app.template_folder = template_dir
-    app.static_folder = static_dir
+        try:
+            from artifact_store import atomic_writer
+            source = self._store.open(download_id)
+            if source is None:
+                return {'success': False, 'error': '文件不存在或已过期'}
+            with source, atomic_writer(target) as f:
+                shutil.copyfileobj(source, f)
+            # 清理转换结果
+            self._store.delete(download_id)
+            return {'success': True, 'path': target}
+        except Exception as e:
+            return {'success': False, 'error': f'保存失败: {str(e)}'}
+
+    def convert_and_save(self, markdown_text, filename):
+        """
+        在进程内直接转换并写入用户选择的位置
+        不经过本地 HTTP、JSON 序列化和临时文件
+        由 JavaScript 调用: window.pywebview.api.convert_and_save(md, name)
+        """
+        if not markdown_text or not markdown_text.strip():
+            return {'success': False, 'error': 'Markdown 文本不能为空'}
+
+        from app import sanitize_filename
+        target, error = self._ask_save_path(sanitize_filename(filename or '文档'))
+        if error:
+            return {'success': False, 'error': error}
+
+        try:
+            from artifact_store import atomic_writer
+            from converter.docx_builder import convert_markdown_to_docx
+            # 先写入同目录的临时文件再替换，转换中途失败时不会损坏已有的同名文件
+            with atomic_writer(target) as f:
+                convert_markdown_to_docx(markdown_text, f)
+            return {'success': True, 'path': target}
+        except Exception as e:
+            return {'success': False, 'error': f'转换失败: {str(e)}'}
 
-    import webview
-    import tempfile
 
-    # 临时文件目录
-    temp_dir = os.path.join(tempfile.gettempdir(), 'mdforword')
-    os.makedirs(temp_dir, exist_ok=True)
+def _wait_for_server(host, port, timeout=30.0):
+    """轮询等待 Flask 端口可连接"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+
+def _warm_up_converter():
+    """在后台线程中导入转换器并完成一次预热转换"""
+    try:
+        from converter.docx_builder import warm_up
+        warm_up()
+        _trace('converter_warm')
+    except Exception as e:
+        sys.stderr.write(f'转换器预热失败: {e}\n')
+
+
+def _bootstrap(window, resource_dir):
+    """
+    窗口出现后执行的启动流程（由 webview.start 在后台线程中调用）
+    - 并行预热转换器（python-docx、lxml、markdown-it）
+    - 启动 Flask 服务，就绪后将窗口切换到应用页面
+    """
+    threading.Thread(target=_warm_up_converter, daemon=True).start()
 
-    # 创建暴露给 JS 的 API
-    api = Api(window_ref=None, temp_dir=temp_dir)
+    # 导入并配置 Flask app
+    from app import app
+    app.template_folder = os.path.join(resource_dir, 'templates')
+    app.static_folder = os.path.join(resource_dir, 'static')
 
     def start_flask():
         """在后台线程中启动 Flask 服务器"""
         app.run(
-            host='127.0.0.1',
-            port=5001,
+            host=SERVER_HOST,
+            port=SERVER_PORT,
             debug=False,
             use_reloader=False,
         )
@@ -109,19 +186,39 @@ def main():
     flask_thread = threading.Thread(target=start_flask, daemon=True)
     flask_thread.start()
 
-    # 创建原生 macOS 窗口
+    if _wait_for_server(SERVER_HOST, SERVER_PORT):
+        _trace('server_ready')
+        window.load_url(SERVER_URL)
+    else:
+        window.load_html('<p style="font-family:sans-serif">服务启动失败，请重启应用</p>')
+
+
+def main():
+    resource_dir = _get_resource_path()
+
+    # 切换工作目录到资源目录
+    os.chdir(resource_dir)
+
+    import webview
+    from artifact_store import create_store
+
+    # 创建暴露给 JS 的 API（与 Web 服务使用同样配置的结果存储）
+    api = Api(window_ref=None, store=create_store())
+
+    # 创建原生 macOS 窗口 — 先显示占位页，Flask 与转换器在后台加载
     window = webview.create_window(
         title='MD → Word',
-        url='http://127.0.0.1:5001',
+        html=SPLASH_HTML,
         width=1200,
         height=800,
         min_size=(800, 600),
         confirm_close=False,
         js_api=api,
     )
+    window.events.shown += lambda: _trace('window_shown')
 
     # 启动 WebView（macOS 使用原生 WebKit）
-    webview.start()
+    webview.start(_bootstrap, (window, resource_dir))
 
     # 窗口关闭后退出
     sys.exit(0)
@@ -10,7 +10,8 @@ from setuptools import setup
 APP = ['run_app.py']
 DATA_FILES = [
     ('templates', ['templates/index.html']),
-    ('static', ['static/script.js', 'static/style.css']),
+    ('static', ['static/script.js', 'static/preview-render.js',
+                'static/preview-worker.js', 'static/style.css']),
 ]
 OPTIONS = {
     'argv_emulation': False,
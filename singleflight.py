@@ -0,0 +1,300 @@
+"""
+相同转换的合并（single-flight）
+多人同时转换同一份文档时，内容与选项都相同的并发请求只执行一次转换，
+后到的请求等待这次转换结束并共享它的结果（同一个 download_id）。
+
+- 同一进程内：线程（Flask）或协程（ASGI）挂到进行中的调用上等待
+- 同一主机的多个工作进程之间：每个 key 一个锁文件（flock），持有锁的进程负责转换，
+  其他进程等锁释放后读取它写下的结果；不支持 flock 的平台只在进程内合并
+
+只合并“正在进行”的转换，转换结束后到达的请求会重新转换，不是结果缓存。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def conversion_key(markdown_text, profile=None, options=None):
+    """由输入内容、样式方案与其他影响输出的选项（可 JSON 序列化的字典）计算合并用的 key"""
+    digest = hashlib.sha256()
+    digest.update((profile or '').encode('utf-8'))
+    digest.update(b'\0')
+    if options:
+        digest.update(json.dumps(options, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\0')
+    digest.update(markdown_text.encode('utf-8', errors='surrogatepass'))
+    return digest.hexdigest()
+
+
+class HostCoalescer:
+    """同一主机上多个进程之间的合并：<key>.lock 用于互斥，<key>.json 保存结果"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def claim(self, key):
+        """
+        取得 key 的构建权，其他进程正在构建时阻塞等待
+
+        Returns:
+            (fd, None): 由本进程构建，完成后调用 publish 和 release
+            (None, 结果): 已合并到其他进程在等待期间完成的构建
+        """
+        since = time.time()
+        path = self._path(key, '.lock')
+        waited = False
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # 其他进程正在转换同一文档：等它结束
+                    waited = True
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                if self._is_current(fd, path):
+                    break
+            except BaseException:
+                os.close(fd)
+                raise
+            # purge 在打开与加锁之间删除了锁文件：锁住的文件已不在目录中，
+            # 其他进程会创建新的锁文件，重新打开后再加锁
+            os.close(fd)
+
+        if not waited:
+            return fd, None
+        result = self._read(key, since)
+        if result is None:
+            # 对方转换失败：由本进程重新转换
+            return fd, None
+        self.release(fd)
+        return None, result
+
+    @staticmethod
+    def _is_current(fd, path):
+        """fd 是否仍是 path 指向的文件（没有被删除或替换）"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        fst = os.fstat(fd)
+        return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+    def _read(self, key, since):
+        """读取 since 之后完成的构建结果，没有时返回 None"""
+        try:
+            with open(self._path(key, '.json'), encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if record.get('finished', 0) < since:
+            return None
+        return record.get('result')
+
+    def publish(self, key, result):
+        """写入构建结果（须在持有锁时调用）"""
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{key}.', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'finished': time.time(), 'result': result}, f)
+            os.replace(tmp_path, self._path(key, '.json'))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def release(self, fd):
+        """释放构建权（关闭文件描述符即释放 flock）"""
+        os.close(fd)
+
+    def purge(self, older_than):
+        """删除修改时间早于 older_than 的结果与空闲锁文件"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) >= older_than:
+                    continue
+                if not name.endswith('.lock'):
+                    os.remove(path)
+                    continue
+                # 只删除当前没有进程持有的锁；在删除前已打开该文件的进程
+                # 加锁后发现文件已不在目录中，会重新打开（见 claim）
+                fd = os.open(path, os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.remove(path)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+
+class _Call:
+    """进程内一次进行中的调用"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    合并相同 key 的并发调用
+
+    do() 供线程使用，do_async() 供事件循环中的协程使用；两者的统计信息共用。
+    """
+
+    def __init__(self, host_dir=None):
+        """
+        Args:
+            host_dir: 跨进程合并使用的锁目录，为 None 或平台不支持 flock 时只在进程内合并
+        """
+        self.host = HostCoalescer(host_dir) if host_dir and fcntl is not None else None
+        self._lock = threading.Lock()
+        self._calls = {}   # key → _Call（线程）
+        self._tasks = {}   # key → asyncio.Task（协程）
+        self._builds = 0
+        self._coalesced = 0
+        self._coalesced_host = 0
+        self._waiting = 0
+
+    def metrics(self):
+        """返回统计信息：实际转换次数、合并的等待者数量、当前进行中与等待中的数量"""
+        with self._lock:
+            return {
+                'builds': self._builds,
+                'coalesced': self._coalesced,
+                'coalesced_cross_process': self._coalesced_host,
+                'in_flight': len(self._calls) + len(self._tasks),
+                'waiting': self._waiting,
+            }
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def _run(self, key, func):
+        """执行一次构建（先尝试合并到其他进程的构建），返回 (结果, 是否共享)"""
+        fd = None
+        if self.host is not None:
+            fd, result = self.host.claim(key)
+            if fd is None:
+                self._count('_coalesced_host')
+                return result, True
+        try:
+            self._count('_builds')
+            result = func()
+            if fd is not None:
+                self.host.publish(key, result)
+        finally:
+            if fd is not None:
+                self.host.release(fd)
+        return result, False
+
+    def do(self, key, func):
+        """
+        执行 func()，相同 key 的调用正在进行时等待并共享其结果
+
+        func 的返回值在跨进程合并时会写成 JSON，须可序列化。
+
+        Returns:
+            (结果, 是否共享了其他调用的结果)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self._coalesced += 1
+                self._waiting += 1
+
+        if not leader:
+            call.done.wait()
+            self._count('_waiting', -1)
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._run(key, func)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, shared
+
+    async def _run_async(self, key, func):
+        """_run 的协程版本：等锁在线程中进行，func 返回 awaitable"""
+        fd = None
+        if self.host is not None:
+            loop = asyncio.get_running_loop()
+            fd, result = await loop.run_in_executor(None, self.host.claim, key)
+            if fd is None:
+                self._count('_coalesced_host')
+                return result, True
+        try:
+            self._count('_builds')
+            result = await func()
+            if fd is not None:
+                await loop.run_in_executor(None, self.host.publish, key, result)
+        finally:
+            if fd is not None:
+                self.host.release(fd)
+        return result, False
+
+    def _task_done(self, key, task):
+        self._tasks.pop(key, None)
+        # 所有等待者都已取消时，避免“异常未被获取”的警告
+        if not task.cancelled():
+            task.exception()
+
+    async def do_async(self, key, func):
+        """
+        do() 的协程版本：func 为返回 awaitable 的可调用对象
+
+        构建在独立的任务中进行，发起它的请求断开也不会中断其他等待者。
+        """
+        task = self._tasks.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(self._run_async(key, func))
+            with self._lock:
+                self._tasks[key] = task
+            task.add_done_callback(lambda t: self._task_done(key, t))
+        else:
+            with self._lock:
+                self._coalesced += 1
+                self._waiting += 1
+        try:
+            result, shared = await asyncio.shield(task)
+        finally:
+            if not leader:
+                self._count('_waiting', -1)
+        return result, shared or not leader
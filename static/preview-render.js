@@ -0,0 +1,282 @@
+/**
+ * MD → Word  |  Preview Renderer
+ * Markdown → HTML 预览渲染，主页面和预览 Web Worker 共用（不依赖 DOM）
+ */
+
+// ============================================================
+// LaTeX 数学表达式转 Unicode（前端预览用）
+// ============================================================
+const GREEK_MAP = {
+    '\\\\alpha': 'α', '\\\\beta': 'β', '\\\\gamma': 'γ', '\\\\delta': 'δ',
+    '\\\\epsilon': 'ε', '\\\\varepsilon': 'ε', '\\\\zeta': 'ζ', '\\\\eta': 'η',
+    '\\\\theta': 'θ', '\\\\iota': 'ι', '\\\\kappa': 'κ', '\\\\lambda': 'λ',
+    '\\\\mu': 'μ', '\\\\nu': 'ν', '\\\\xi': 'ξ', '\\\\pi': 'π',
+    '\\\\rho': 'ρ', '\\\\sigma': 'σ', '\\\\tau': 'τ', '\\\\upsilon': 'υ',
+    '\\\\phi': 'φ', '\\\\chi': 'χ', '\\\\psi': 'ψ', '\\\\omega': 'ω',
+    '\\\\Gamma': 'Γ', '\\\\Delta': 'Δ', '\\\\Theta': 'Θ', '\\\\Lambda': 'Λ',
+    '\\\\Xi': 'Ξ', '\\\\Pi': 'Π', '\\\\Sigma': 'Σ', '\\\\Phi': 'Φ',
+    '\\\\Psi': 'Ψ', '\\\\Omega': 'Ω',
+};
+
+const MATH_SYM_MAP = {
+    '\\\\times': '×', '\\\\div': '÷', '\\\\pm': '±', '\\\\mp': '∓',
+    '\\\\cdot': '·', '\\\\leq': '≤', '\\\\le': '≤', '\\\\geq': '≥', '\\\\ge': '≥',
+    '\\\\neq': '≠', '\\\\ne': '≠', '\\\\approx': '≈', '\\\\equiv': '≡',
+    '\\\\infty': '∞', '\\\\partial': '∂', '\\\\nabla': '∇',
+    '\\\\sum': '∑', '\\\\prod': '∏', '\\\\int': '∫',
+    '\\\\forall': '∀', '\\\\exists': '∃', '\\\\in': '∈', '\\\\notin': '∉',
+    '\\\\subset': '⊂', '\\\\supset': '⊃', '\\\\cup': '∪', '\\\\cap': '∩',
+    '\\\\emptyset': '∅', '\\\\Rightarrow': '⇒', '\\\\Leftarrow': '⇐',
+    '\\\\rightarrow': '→', '\\\\leftarrow': '←', '\\\\to': '→',
+    '\\\\ldots': '…', '\\\\cdots': '⋯', '\\\\sqrt': '√',
+    '\\\\left': '', '\\\\right': '', '\\\\quad': ' ', '\\\\qquad': '  ',
+    '\\\\,': ' ', '\\\\;': ' ', '\\\\!': '',
+};
+
+const UNICODE_FRACS = {
+    '1/2': '½', '1/3': '⅓', '2/3': '⅔', '1/4': '¼', '3/4': '¾',
+    '1/5': '⅕', '2/5': '⅖', '3/5': '⅗', '4/5': '⅘',
+    '1/6': '⅙', '5/6': '⅚', '1/7': '⅐', '1/8': '⅛',
+    '3/8': '⅜', '5/8': '⅝', '7/8': '⅞', '1/9': '⅑', '1/10': '⅒',
+};
+
+const SUP_MAP = { '0': '⁰', '1': '¹', '2': '²', '3': '³', '4': '⁴', '5': '⁵', '6': '⁶', '7': '⁷', '8': '⁸', '9': '⁹', '+': '⁺', '-': '⁻', 'n': 'ⁿ', 'i': 'ⁱ', 'x': 'ˣ' };
+const SUB_MAP = { '0': '₀', '1': '₁', '2': '₂', '3': '₃', '4': '₄', '5': '₅', '6': '₆', '7': '₇', '8': '₈', '9': '₉', '+': '₊', '-': '₋', 'a': 'ₐ', 'e': 'ₑ', 'i': 'ᵢ', 'n': 'ₙ', 'x': 'ₓ' };
+
+function convertLatexContent(s) {
+    // \text{...}, \mathrm{...}
+    s = s.replace(/\\(?:text|mathrm|mathbf|mathit)\s*\{([^{}]+)\}/g, '$1');
+    // \frac{a}{b} → HTML fraction display
+    s = s.replace(/\\frac\s*\{([^{}]+)\}\s*\{([^{}]+)\}/g, (_, n, d) => {
+        return `<span class="math-frac"><span class="frac-num">${n.trim()}</span><span class="frac-den">${d.trim()}</span></span>`;
+    });
+    // \sqrt{x}
+    s = s.replace(/\\sqrt\s*\{([^{}]+)\}/g, '√$1');
+    // ^{...} superscript
+    s = s.replace(/\^\{([^{}]+)\}/g, (_, c) => [...c].map(ch => SUP_MAP[ch] || ch).join(''));
+    s = s.replace(/\^([0-9a-zA-Z])/g, (_, c) => SUP_MAP[c] || `^${c}`);
+    // _{...} subscript
+    s = s.replace(/_\{([^{}]+)\}/g, (_, c) => [...c].map(ch => SUB_MAP[ch] || ch).join(''));
+    s = s.replace(/_([0-9a-zA-Z])/g, (_, c) => SUB_MAP[c] || `_${c}`);
+    // Greek letters (sorted by length desc)
+    for (const [tex, uni] of Object.entries(GREEK_MAP).sort((a, b) => b[0].length - a[0].length)) {
+        s = s.replaceAll(tex.replace(/\\\\/g, '\\'), uni);
+    }
+    // Math symbols (sorted by length desc)
+    for (const [tex, uni] of Object.entries(MATH_SYM_MAP).sort((a, b) => b[0].length - a[0].length)) {
+        s = s.replaceAll(tex.replace(/\\\\/g, '\\'), uni);
+    }
+    return s.replace(/\s+/g, ' ').trim();
+}
+
+function convertLatex(text) {
+    if (!text.includes('$')) return text;
+    // $$...$$ display math
+    text = text.replace(/\$\$(.+?)\$\$/gs, (_, c) => convertLatexContent(c));
+    // $...$ inline math
+    text = text.replace(/(?<!\$)\$(?!\$)(.+?)(?<!\$)\$(?!\$)/g, (_, c) => convertLatexContent(c));
+    return text;
+}
+
+// ============================================================
+// 简单的 Markdown → HTML 渲染（用于预览）
+// ============================================================
+function renderMarkdown(md) {
+    if (!md.trim()) return '';
+
+    let html = md;
+
+    // 转义 HTML 特殊字符
+    html = html.replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;');
+
+    // 代码块（必须先于 LaTeX 处理，防止代码块内容被转换）
+    const codeBlocks = [];
+    html = html.replace(/```(\w*)\n([\s\S]*?)```/g, (match, lang, code) => {
+        const placeholder = `⟦CODE_BLOCK_${codeBlocks.length}⟧`;
+        codeBlocks.push(`<pre><code class="language-${lang}">${code.trim()}</code></pre>`);
+        return placeholder;
+    });
+
+    // 行内代码保护
+    const inlineCodes = [];
+    html = html.replace(/`([^`]+)`/g, (match, code) => {
+        const placeholder = `⟦INLINE_CODE_${inlineCodes.length}⟧`;
+        inlineCodes.push(`<code>${code}</code>`);
+        return placeholder;
+    });
+
+    // LaTeX 数学表达式转换（在 HTML 转义之后，避免 HTML 标签被转义）
+    html = convertLatex(html);
+
+    // 恢复代码块
+    codeBlocks.forEach((block, i) => {
+        html = html.replace(`⟦CODE_BLOCK_${i}⟧`, block);
+    });
+
+
+    // 表格
+    html = html.replace(/^\|(.+)\|\s*\n\|[-| :]+\|\s*\n((?:\|.+\|\s*\n?)*)/gm, (match, header, body) => {
+        const headers = header.split('|').map(h => h.trim()).filter(h => h);
+        const rows = body.trim().split('\n').map(row =>
+            row.split('|').map(c => c.trim()).filter(c => c)
+        );
+
+        let table = '<table><thead><tr>';
+        headers.forEach(h => { table += `<th>${h}</th>`; });
+        table += '</tr></thead><tbody>';
+        rows.forEach(row => {
+            table += '<tr>';
+            row.forEach(cell => { table += `<td>${cell}</td>`; });
+            table += '</tr>';
+        });
+        table += '</tbody></table>';
+        return table;
+    });
+
+    // 标题
+    html = html.replace(/^######\s+(.+)$/gm, '<h6>$1</h6>');
+    html = html.replace(/^#####\s+(.+)$/gm, '<h5>$1</h5>');
+    html = html.replace(/^####\s+(.+)$/gm, '<h4>$1</h4>');
+    html = html.replace(/^###\s+(.+)$/gm, '<h3>$1</h3>');
+    html = html.replace(/^##\s+(.+)$/gm, '<h2>$1</h2>');
+    html = html.replace(/^#\s+(.+)$/gm, '<h1>$1</h1>');
+
+    // 水平线
+    html = html.replace(/^---+$/gm, '<hr>');
+
+    // 引用
+    html = html.replace(/^&gt;\s+(.+)$/gm, '<blockquote>$1</blockquote>');
+
+    // 合并连续的 blockquote
+    html = html.replace(/<\/blockquote>\n<blockquote>/g, '<br>');
+
+    // 无序列表（支持 * 和 - 两种前缀）
+    // 必须在粗体/斜体处理之前，避免 * 被误匹配
+    html = html.replace(/^(\s*)[\*\-]\s+(.+)$/gm, (match, indent, content) => {
+        const level = Math.floor(indent.length / 2);
+        const bullets = ['•', '○', '■', '◦', '▪'];
+        const bullet = bullets[Math.min(level, bullets.length - 1)];
+        const marginLeft = level * 24;
+        return `<li class="ul-item" style="margin-left:${marginLeft}px"><span class="bullet">${bullet}</span> ${content}</li>`;
+    });
+
+    // 有序列表 — 保留原始数字编号
+    html = html.replace(/^(\s*)(\d+)\.\s+(.+)$/gm, (match, indent, num, content) => {
+        const level = Math.floor(indent.length / 2);
+        const marginLeft = level * 24;
+        return `<li class="ol-item" style="margin-left:${marginLeft}px"><span class="ol-num">${num}.</span> ${content}</li>`;
+    });
+
+    // 包裹连续的 li 为 ul
+    html = html.replace(/((?:<li[^>]*>.*<\/li>\n?)+)/g, '<ul class="md-list">$1</ul>');
+
+    // 恢复行内代码
+    inlineCodes.forEach((code, i) => {
+        html = html.replace(`⟦INLINE_CODE_${i}⟧`, code);
+    });
+
+    // 粗体和斜体（在列表处理之后，避免和 * 列表标记冲突）
+    html = html.replace(/\*\*\*(.+?)\*\*\*/g, '<strong><em>$1</em></strong>');
+    html = html.replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>');
+    html = html.replace(/\*(.+?)\*/g, '<em>$1</em>');
+
+    // 删除线
+    html = html.replace(/~~(.+?)~~/g, '<del>$1</del>');
+
+    // 链接
+    html = html.replace(/\[([^\]]+)\]\(([^)]+)\)/g, '<a href="$2" target="_blank" rel="noopener">$1</a>');
+
+    // 段落：将剩余的非空行包裹为 <p>
+    html = html.replace(/^(?!<[a-z]|$)(.+)$/gm, '<p>$1</p>');
+
+    // 清理多余的空行
+    html = html.replace(/\n{3,}/g, '\n\n');
+
+    return html;
+}
+
+
+// ============================================================
+// 分块与增量更新
+// ============================================================
+
+/**
+ * 按空行把 Markdown 拆分为互相独立的块（代码块和 $$ 公式内的空行不拆分）
+ * 预览按块渲染，编辑时只有改动所在的块需要重新渲染
+ */
+function splitBlocks(md) {
+    const lines = md.split('\n');
+    const blocks = [];
+    let current = [];
+    let inFence = false;
+    let inMath = false;
+
+    for (const line of lines) {
+        const trimmed = line.trim();
+        if (trimmed.startsWith('```')) {
+            inFence = !inFence;
+        } else if (!inFence && trimmed.includes('$$') && trimmed.split('$$').length % 2 === 0) {
+            inMath = !inMath;
+        }
+
+        if (!trimmed && !inFence && !inMath) {
+            if (current.length) {
+                blocks.push(current.join('\n'));
+                current = [];
+            }
+            continue;
+        }
+        current.push(line);
+    }
+    if (current.length) blocks.push(current.join('\n'));
+
+    return { blocks, lineCount: lines.length };
+}
+
+/**
+ * 预览模型：记住上一次的块列表，每次更新只渲染变化的部分
+ *
+ * update() 返回补丁 { start, deleteCount, blocks, total, lineCount }：
+ * 从第 start 块起删除 deleteCount 块，再插入 blocks（{ html, lines }），
+ * total 为更新后的块总数
+ */
+class PreviewModel {
+    constructor() {
+        this.blocks = [];
+    }
+
+    update(md) {
+        const { blocks, lineCount } = splitBlocks(md);
+        const prev = this.blocks;
+
+        // 公共前缀
+        let start = 0;
+        const limit = Math.min(prev.length, blocks.length);
+        while (start < limit && prev[start] === blocks[start]) start++;
+
+        // 公共后缀
+        let prevEnd = prev.length;
+        let nextEnd = blocks.length;
+        while (prevEnd > start && nextEnd > start && prev[prevEnd - 1] === blocks[nextEnd - 1]) {
+            prevEnd--;
+            nextEnd--;
+        }
+
+        const changed = [];
+        for (let i = start; i < nextEnd; i++) {
+            const source = blocks[i];
+            changed.push({ html: renderMarkdown(source), lines: source.split('\n').length });
+        }
+
+        this.blocks = blocks;
+        return {
+            start,
+            deleteCount: prevEnd - start,
+            blocks: changed,
+            total: blocks.length,
+            lineCount,
+        };
+    }
+}
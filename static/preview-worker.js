@@ -0,0 +1,12 @@
+/**
+ * MD → Word  |  Preview Worker
+ * 在后台线程中分块并渲染预览，只把变化的块发回主线程
+ */
+// 页面通过 ?render= 传入带内容哈希的渲染脚本地址，未传入时使用同目录下的原文件
+importScripts(new URLSearchParams(self.location.search).get('render') || 'preview-render.js');
+
+const model = new PreviewModel();
+
+self.onmessage = (e) => {
+    self.postMessage(model.update(e.data));
+};
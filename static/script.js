@@ -98,222 +98,135 @@ const convert = async (markdown) => {
 `;
 
 // ============================================================
-// LaTeX 数学表达式转 Unicode（前端预览用）
+// 更新预览
 // ============================================================
-const GREEK_MAP = {
-    '\\\\alpha': 'α', '\\\\beta': 'β', '\\\\gamma': 'γ', '\\\\delta': 'δ',
-    '\\\\epsilon': 'ε', '\\\\varepsilon': 'ε', '\\\\zeta': 'ζ', '\\\\eta': 'η',
-    '\\\\theta': 'θ', '\\\\iota': 'ι', '\\\\kappa': 'κ', '\\\\lambda': 'λ',
-    '\\\\mu': 'μ', '\\\\nu': 'ν', '\\\\xi': 'ξ', '\\\\pi': 'π',
-    '\\\\rho': 'ρ', '\\\\sigma': 'σ', '\\\\tau': 'τ', '\\\\upsilon': 'υ',
-    '\\\\phi': 'φ', '\\\\chi': 'χ', '\\\\psi': 'ψ', '\\\\omega': 'ω',
-    '\\\\Gamma': 'Γ', '\\\\Delta': 'Δ', '\\\\Theta': 'Θ', '\\\\Lambda': 'Λ',
-    '\\\\Xi': 'Ξ', '\\\\Pi': 'Π', '\\\\Sigma': 'Σ', '\\\\Phi': 'Φ',
-    '\\\\Psi': 'Ψ', '\\\\Omega': 'Ω',
-};
-
-const MATH_SYM_MAP = {
-    '\\\\times': '×', '\\\\div': '÷', '\\\\pm': '±', '\\\\mp': '∓',
-    '\\\\cdot': '·', '\\\\leq': '≤', '\\\\le': '≤', '\\\\geq': '≥', '\\\\ge': '≥',
-    '\\\\neq': '≠', '\\\\ne': '≠', '\\\\approx': '≈', '\\\\equiv': '≡',
-    '\\\\infty': '∞', '\\\\partial': '∂', '\\\\nabla': '∇',
-    '\\\\sum': '∑', '\\\\prod': '∏', '\\\\int': '∫',
-    '\\\\forall': '∀', '\\\\exists': '∃', '\\\\in': '∈', '\\\\notin': '∉',
-    '\\\\subset': '⊂', '\\\\supset': '⊃', '\\\\cup': '∪', '\\\\cap': '∩',
-    '\\\\emptyset': '∅', '\\\\Rightarrow': '⇒', '\\\\Leftarrow': '⇐',
-    '\\\\rightarrow': '→', '\\\\leftarrow': '←', '\\\\to': '→',
-    '\\\\ldots': '…', '\\\\cdots': '⋯', '\\\\sqrt': '√',
-    '\\\\left': '', '\\\\right': '', '\\\\quad': ' ', '\\\\qquad': '  ',
-    '\\\\,': ' ', '\\\\;': ' ', '\\\\!': '',
-};
+// 预览在 Web Worker 中分块渲染，主线程只把变化的块打补丁到 DOM；
+// 块数较多时，离开可视区域的块先以占位高度插入，滚动到附近时才填充内容
+const PREVIEW_PLACEHOLDER = `
+            <div class="preview-placeholder">
+                <svg width="48" height="48" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.5" opacity="0.3">
+                    <path d="M14 2H6a2 2 0 00-2 2v16a2 2 0 002 2h12a2 2 0 002-2V8z"/>
+                    <polyline points="14,2 14,8 20,8"/>
+                    <line x1="16" y1="13" x2="8" y2="13"/>
+                    <line x1="16" y1="17" x2="8" y2="17"/>
+                </svg>
+                <p>在左侧输入 Markdown 文本<br>这里将显示实时预览</p>
+            </div>`;
 
-const UNICODE_FRACS = {
-    '1/2': '½', '1/3': '⅓', '2/3': '⅔', '1/4': '¼', '3/4': '¾',
-    '1/5': '⅕', '2/5': '⅖', '3/5': '⅗', '4/5': '⅘',
-    '1/6': '⅙', '5/6': '⅚', '1/7': '⅐', '1/8': '⅛',
-    '3/8': '⅜', '5/8': '⅝', '7/8': '⅞', '1/9': '⅑', '1/10': '⅒',
-};
+// 超过该块数时启用可视区域外的延迟填充
+const LAZY_BLOCK_THRESHOLD = 200;
 
-const SUP_MAP = { '0': '⁰', '1': '¹', '2': '²', '3': '³', '4': '⁴', '5': '⁵', '6': '⁶', '7': '⁷', '8': '⁸', '9': '⁹', '+': '⁺', '-': '⁻', 'n': 'ⁿ', 'i': 'ⁱ', 'x': 'ˣ' };
-const SUB_MAP = { '0': '₀', '1': '₁', '2': '₂', '3': '₃', '4': '₄', '5': '₅', '6': '₆', '7': '₇', '8': '₈', '9': '₉', '+': '₊', '-': '₋', 'a': 'ₐ', 'e': 'ₑ', 'i': 'ᵢ', 'n': 'ₙ', 'x': 'ₓ' };
+let previewTimer = null;
+let previewWorker = null;
+let previewModel = null;     // 无法使用 Worker 时在主线程渲染
+let previewBusy = false;     // Worker 正在处理上一次的文本
+let previewPending = false;  // 处理期间文本又有变化
+
+const pendingBlocks = new WeakMap();  // 尚未填充的块元素 → HTML
+const blockObserver = 'IntersectionObserver' in window
+    ? new IntersectionObserver(fillVisibleBlocks, { root: previewContent, rootMargin: '800px 0px' })
+    : null;
+
+function fillBlock(el) {
+    const html = pendingBlocks.get(el);
+    if (html === undefined) return;
+    el.innerHTML = html;
+    el.style.minHeight = '';
+    pendingBlocks.delete(el);
+    blockObserver.unobserve(el);
+}
 
-function convertLatexContent(s) {
-    // \text{...}, \mathrm{...}
-    s = s.replace(/\\(?:text|mathrm|mathbf|mathit)\s*\{([^{}]+)\}/g, '$1');
-    // \frac{a}{b} → HTML fraction display
-    s = s.replace(/\\frac\s*\{([^{}]+)\}\s*\{([^{}]+)\}/g, (_, n, d) => {
-        return `<span class="math-frac"><span class="frac-num">${n.trim()}</span><span class="frac-den">${d.trim()}</span></span>`;
+function fillVisibleBlocks(entries) {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) fillBlock(entry.target);
     });
-    // \sqrt{x}
-    s = s.replace(/\\sqrt\s*\{([^{}]+)\}/g, '√$1');
-    // ^{...} superscript
-    s = s.replace(/\^\{([^{}]+)\}/g, (_, c) => [...c].map(ch => SUP_MAP[ch] || ch).join(''));
-    s = s.replace(/\^([0-9a-zA-Z])/g, (_, c) => SUP_MAP[c] || `^${c}`);
-    // _{...} subscript
-    s = s.replace(/_\{([^{}]+)\}/g, (_, c) => [...c].map(ch => SUB_MAP[ch] || ch).join(''));
-    s = s.replace(/_([0-9a-zA-Z])/g, (_, c) => SUB_MAP[c] || `_${c}`);
-    // Greek letters (sorted by length desc)
-    for (const [tex, uni] of Object.entries(GREEK_MAP).sort((a, b) => b[0].length - a[0].length)) {
-        s = s.replaceAll(tex.replace(/\\\\/g, '\\'), uni);
-    }
-    // Math symbols (sorted by length desc)
-    for (const [tex, uni] of Object.entries(MATH_SYM_MAP).sort((a, b) => b[0].length - a[0].length)) {
-        s = s.replaceAll(tex.replace(/\\\\/g, '\\'), uni);
-    }
-    return s.replace(/\s+/g, ' ').trim();
 }
 
-function convertLatex(text) {
-    if (!text.includes('$')) return text;
-    // $$...$$ display math
-    text = text.replace(/\$\$(.+?)\$\$/gs, (_, c) => convertLatexContent(c));
-    // $...$ inline math
-    text = text.replace(/(?<!\$)\$(?!\$)(.+?)(?<!\$)\$(?!\$)/g, (_, c) => convertLatexContent(c));
-    return text;
+// 填充所有尚未渲染的块（全选复制前调用）
+function flushPreview() {
+    if (!blockObserver) return;
+    for (const el of previewContent.children) fillBlock(el);
 }
 
-// ============================================================
-// 简单的 Markdown → HTML 渲染（用于预览）
-// ============================================================
-function renderMarkdown(md) {
-    if (!md.trim()) return '';
-
-    let html = md;
-
-    // 转义 HTML 特殊字符
-    html = html.replace(/&/g, '&amp;')
-        .replace(/</g, '&lt;')
-        .replace(/>/g, '&gt;');
-
-    // 代码块（必须先于 LaTeX 处理，防止代码块内容被转换）
-    const codeBlocks = [];
-    html = html.replace(/```(\w*)\n([\s\S]*?)```/g, (match, lang, code) => {
-        const placeholder = `⟦CODE_BLOCK_${codeBlocks.length}⟧`;
-        codeBlocks.push(`<pre><code class="language-${lang}">${code.trim()}</code></pre>`);
-        return placeholder;
-    });
-
-    // 行内代码保护
-    const inlineCodes = [];
-    html = html.replace(/`([^`]+)`/g, (match, code) => {
-        const placeholder = `⟦INLINE_CODE_${inlineCodes.length}⟧`;
-        inlineCodes.push(`<code>${code}</code>`);
-        return placeholder;
-    });
-
-    // LaTeX 数学表达式转换（在 HTML 转义之后，避免 HTML 标签被转义）
-    html = convertLatex(html);
-
-    // 恢复代码块
-    codeBlocks.forEach((block, i) => {
-        html = html.replace(`⟦CODE_BLOCK_${i}⟧`, block);
-    });
-
-
-    // 表格
-    html = html.replace(/^\|(.+)\|\s*\n\|[-| :]+\|\s*\n((?:\|.+\|\s*\n?)*)/gm, (match, header, body) => {
-        const headers = header.split('|').map(h => h.trim()).filter(h => h);
-        const rows = body.trim().split('\n').map(row =>
-            row.split('|').map(c => c.trim()).filter(c => c)
-        );
-
-        let table = '<table><thead><tr>';
-        headers.forEach(h => { table += `<th>${h}</th>`; });
-        table += '</tr></thead><tbody>';
-        rows.forEach(row => {
-            table += '<tr>';
-            row.forEach(cell => { table += `<td>${cell}</td>`; });
-            table += '</tr>';
-        });
-        table += '</tbody></table>';
-        return table;
-    });
+function applyPreviewPatch(patch) {
+    lineCount.textContent = `${patch.lineCount} 行`;
 
-    // 标题
-    html = html.replace(/^######\s+(.+)$/gm, '<h6>$1</h6>');
-    html = html.replace(/^#####\s+(.+)$/gm, '<h5>$1</h5>');
-    html = html.replace(/^####\s+(.+)$/gm, '<h4>$1</h4>');
-    html = html.replace(/^###\s+(.+)$/gm, '<h3>$1</h3>');
-    html = html.replace(/^##\s+(.+)$/gm, '<h2>$1</h2>');
-    html = html.replace(/^#\s+(.+)$/gm, '<h1>$1</h1>');
-
-    // 水平线
-    html = html.replace(/^---+$/gm, '<hr>');
-
-    // 引用
-    html = html.replace(/^&gt;\s+(.+)$/gm, '<blockquote>$1</blockquote>');
-
-    // 合并连续的 blockquote
-    html = html.replace(/<\/blockquote>\n<blockquote>/g, '<br>');
-
-    // 无序列表（支持 * 和 - 两种前缀）
-    // 必须在粗体/斜体处理之前，避免 * 被误匹配
-    html = html.replace(/^(\s*)[\*\-]\s+(.+)$/gm, (match, indent, content) => {
-        const level = Math.floor(indent.length / 2);
-        const bullets = ['•', '○', '■', '◦', '▪'];
-        const bullet = bullets[Math.min(level, bullets.length - 1)];
-        const marginLeft = level * 24;
-        return `<li class="ul-item" style="margin-left:${marginLeft}px"><span class="bullet">${bullet}</span> ${content}</li>`;
-    });
-
-    // 有序列表 — 保留原始数字编号
-    html = html.replace(/^(\s*)(\d+)\.\s+(.+)$/gm, (match, indent, num, content) => {
-        const level = Math.floor(indent.length / 2);
-        const marginLeft = level * 24;
-        return `<li class="ol-item" style="margin-left:${marginLeft}px"><span class="ol-num">${num}.</span> ${content}</li>`;
-    });
+    if (patch.total === 0) {
+        previewContent.innerHTML = PREVIEW_PLACEHOLDER;
+        return;
+    }
+    if (previewContent.querySelector('.preview-placeholder')) {
+        previewContent.textContent = '';
+    }
 
-    // 包裹连续的 li 为 ul
-    html = html.replace(/((?:<li[^>]*>.*<\/li>\n?)+)/g, '<ul class="md-list">$1</ul>');
+    const children = previewContent.children;
+    for (let i = 0; i < patch.deleteCount; i++) {
+        const el = children[patch.start];
+        if (blockObserver) blockObserver.unobserve(el);
+        el.remove();
+    }
 
-    // 恢复行内代码
-    inlineCodes.forEach((code, i) => {
-        html = html.replace(`⟦INLINE_CODE_${i}⟧`, code);
+    const lazy = blockObserver && patch.total > LAZY_BLOCK_THRESHOLD;
+    const fragment = document.createDocumentFragment();
+    patch.blocks.forEach(block => {
+        const el = document.createElement('div');
+        el.className = 'md-block';
+        if (lazy) {
+            el.style.minHeight = `${block.lines * 1.7}em`;
+            pendingBlocks.set(el, block.html);
+            blockObserver.observe(el);
+        } else {
+            el.innerHTML = block.html;
+        }
+        fragment.appendChild(el);
     });
-
-    // 粗体和斜体（在列表处理之后，避免和 * 列表标记冲突）
-    html = html.replace(/\*\*\*(.+?)\*\*\*/g, '<strong><em>$1</em></strong>');
-    html = html.replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>');
-    html = html.replace(/\*(.+?)\*/g, '<em>$1</em>');
-
-    // 删除线
-    html = html.replace(/~~(.+?)~~/g, '<del>$1</del>');
-
-    // 链接
-    html = html.replace(/\[([^\]]+)\]\(([^)]+)\)/g, '<a href="$2" target="_blank" rel="noopener">$1</a>');
-
-    // 段落：将剩余的非空行包裹为 <p>
-    html = html.replace(/^(?!<[a-z]|$)(.+)$/gm, '<p>$1</p>');
-
-    // 清理多余的空行
-    html = html.replace(/\n{3,}/g, '\n\n');
-
-    return html;
+    previewContent.insertBefore(fragment, children[patch.start] || null);
 }
 
-// ============================================================
-// 更新预览
-// ============================================================
-let previewTimer = null;
+function startPreviewWorker() {
+    try {
+        // 使用页面提供的带内容哈希的地址，可被浏览器长期缓存
+        const { previewWorker: workerUrl, previewRender: renderUrl } = document.body.dataset;
+        previewWorker = new Worker(workerUrl
+            ? `${workerUrl}?render=${encodeURIComponent(renderUrl)}`
+            : '/static/preview-worker.js');
+    } catch (err) {
+        previewModel = new PreviewModel();
+        return;
+    }
+    previewWorker.onmessage = (e) => {
+        previewBusy = false;
+        applyPreviewPatch(e.data);
+        if (previewPending) {
+            previewPending = false;
+            updatePreview();
+        }
+    };
+    previewWorker.onerror = () => {
+        // Worker 不可用时退回主线程渲染，并从空白状态重建预览
+        previewWorker.terminate();
+        previewWorker = null;
+        previewBusy = false;
+        previewModel = new PreviewModel();
+        previewContent.textContent = '';
+        updatePreview();
+    };
+}
 
 function updatePreview() {
     const md = markdownInput.value;
 
-    if (!md.trim()) {
-        previewContent.innerHTML = `
-            <div class="preview-placeholder">
-                <svg width="48" height="48" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.5" opacity="0.3">
-                    <path d="M14 2H6a2 2 0 00-2 2v16a2 2 0 002 2h12a2 2 0 002-2V8z"/>
-                    <polyline points="14,2 14,8 20,8"/>
-                    <line x1="16" y1="13" x2="8" y2="13"/>
-                    <line x1="16" y1="17" x2="8" y2="17"/>
-                </svg>
-                <p>在左侧输入 Markdown 文本<br>这里将显示实时预览</p>
-            </div>`;
+    if (!previewWorker) {
+        applyPreviewPatch(previewModel.update(md));
         return;
     }
-
-    previewContent.innerHTML = renderMarkdown(md);
+    // 同一时间只有一份文本在 Worker 中处理，期间的修改合并到下一次
+    if (previewBusy) {
+        previewPending = true;
+        return;
+    }
+    previewBusy = true;
+    previewWorker.postMessage(md);
 }
 
 function debouncedPreview() {
@@ -321,13 +234,18 @@ function debouncedPreview() {
     previewTimer = setTimeout(updatePreview, 150);
 }
 
+if (window.Worker) {
+    startPreviewWorker();
+} else {
+    previewModel = new PreviewModel();
+}
+
 // ============================================================
 // 更新统计
 // ============================================================
+// 字符数直接读取；行数由预览分块时顺带统计，避免每次按键都扫描全文
 function updateStats() {
-    const text = markdownInput.value;
-    charCount.textContent = `${text.length} 字符`;
-    lineCount.textContent = `${text.split('\n').length} 行`;
+    charCount.textContent = `${markdownInput.value.length} 字符`;
 }
 
 // ============================================================
@@ -379,6 +297,7 @@ btnClear.addEventListener('click', () => {
 const btnSelectAllPreview = document.getElementById('btnSelectAllPreview');
 if (btnSelectAllPreview) {
     btnSelectAllPreview.addEventListener('click', () => {
+        flushPreview();
         const previewContentWrapper = document.getElementById('previewContent');
         if (!previewContentWrapper || !previewContentWrapper.textContent.trim()) {
             showToast('预览区为空', 'info');
@@ -418,6 +337,18 @@ if (savedTheme) {
     document.documentElement.setAttribute('data-theme', savedTheme);
 }
 
+// 桌面应用保存结果提示
+function handleDesktopSaveResult(saveResult) {
+    if (saveResult && saveResult.success) {
+        showToast(`✅ 文件已保存到: ${saveResult.path}`, 'success');
+    } else {
+        const errMsg = (saveResult && saveResult.error) || '保存取消';
+        if (errMsg !== '用户取消保存') {
+            showToast(`⚠️ ${errMsg}`, 'error');
+        }
+    }
+}
+
 // 转换按钮
 btnConvert.addEventListener('click', async () => {
     const md = markdownInput.value.trim();
@@ -432,6 +363,13 @@ btnConvert.addEventListener('click', async () => {
     btnConvert.disabled = true;
 
     try {
+        // 桌面应用 → 进程内转换并直接写入原生保存对话框选择的位置
+        if (window.pywebview && window.pywebview.api && window.pywebview.api.convert_and_save) {
+            const saveResult = await window.pywebview.api.convert_and_save(md, name);
+            handleDesktopSaveResult(saveResult);
+            return;
+        }
+
         const response = await fetch('/convert', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
@@ -454,14 +392,7 @@ btnConvert.addEventListener('click', async () => {
                 result.download_id,
                 result.filename
             );
-            if (saveResult && saveResult.success) {
-                showToast(`✅ 文件已保存到: ${saveResult.path}`, 'success');
-            } else {
-                const errMsg = (saveResult && saveResult.error) || '保存取消';
-                if (errMsg !== '用户取消保存') {
-                    showToast(`⚠️ ${errMsg}`, 'error');
-                }
-            }
+            handleDesktopSaveResult(saveResult);
         } else {
             // 普通浏览器 → 通过隐藏 iframe 触发下载
             const downloadName = encodeURIComponent(result.filename);
@@ -603,3 +534,4 @@ document.addEventListener('keydown', (e) => {
 // 初始化
 // ============================================================
 updateStats();
+updatePreview();
@@ -0,0 +1,170 @@
+"""
+静态资源发布模块
+启动时读取 static/ 下的所有文件，计算内容哈希并预先压缩，由 Flask 与 ASGI 服务共用：
+
+- 页面引用带内容哈希的地址（如 /static/style.3f2a9c1b7d4e.css），内容变化后地址随之变化，
+  因此可以让浏览器和代理缓存一年（immutable），再次访问时不发任何请求
+- 文本类资源预先生成 gzip 与 brotli（安装了 brotli 包时）版本，按请求的 Accept-Encoding 选择
+- 不带哈希的原地址仍然可用（Web Worker 等脚本内的引用），使用 ETag 协商缓存
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+
+# 哈希长度（十六进制字符数）
+HASH_LENGTH = 12
+
+# 预先压缩的文件类型；小于 MIN_COMPRESS_SIZE 的文件压缩后收益不大，不压缩
+COMPRESSIBLE = frozenset({'.css', '.js', '.html', '.svg', '.json', '.txt', '.map'})
+MIN_COMPRESS_SIZE = 512
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+
+# 同等 q 值时的编码优先级
+ENCODING_PREFERENCE = ('br', 'gzip', 'identity')
+
+
+def _brotli_compress(data):
+    """brotli 为可选依赖，未安装时返回 None"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+def hashed_name(name, digest):
+    """style.css → style.<哈希>.css"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{digest}{ext}'
+
+
+def parse_accept_encoding(header):
+    """解析 Accept-Encoding，返回 {编码: q 值}"""
+    weights = {}
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def choose_encoding(header, available):
+    """在 available 中选出客户端可接受、q 值最高的编码，都不接受时返回 identity"""
+    weights = parse_accept_encoding(header)
+    default = weights.get('*', 0.0)
+    best = 'identity'
+    best_q = 0.0
+    for coding in ENCODING_PREFERENCE:
+        if coding not in available or coding == 'identity':
+            continue
+        q = weights.get(coding, default)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _strip_weak(tag):
+    """去掉 ETag 的弱校验前缀 W/"""
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+class Asset:
+    """一个静态文件：内容哈希、类型以及各编码版本的字节"""
+    __slots__ = ('name', 'digest', 'content_type', 'variants')
+
+    def __init__(self, name, data):
+        self.name = name
+        self.digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in (
+                'application/javascript', 'application/json', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+
+        self.variants = {'identity': data}
+        if os.path.splitext(name)[1] in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+            # mtime=0：同样的内容总是得到同样的压缩结果
+            self.variants['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            compressed = _brotli_compress(data)
+            if compressed is not None:
+                self.variants['br'] = compressed
+
+    @property
+    def hashed_name(self):
+        return hashed_name(self.name, self.digest)
+
+
+class StaticAssets:
+    """static 目录的资源清单"""
+
+    def __init__(self, directory, url_prefix='/static/'):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self._assets = {}   # 相对路径 → Asset
+        self._hashed = {}   # 带哈希的相对路径 → Asset
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    asset = Asset(name, f.read())
+                self._assets[name] = asset
+                self._hashed[asset.hashed_name] = asset
+
+    def url(self, name):
+        """页面中引用资源的地址（带内容哈希）；不存在的文件返回原地址"""
+        asset = self._assets.get(name)
+        return self.url_prefix + (asset.hashed_name if asset is not None else name)
+
+    def serve(self, path, accept_encoding=None, if_none_match=None):
+        """
+        生成响应内容，与具体 Web 框架无关
+
+        Args:
+            path: /static/ 之后的相对路径
+            accept_encoding: 请求的 Accept-Encoding 头
+            if_none_match: 请求的 If-None-Match 头
+
+        Returns:
+            (状态码, 响应头字典, 响应体)；文件不存在时返回 None
+        """
+        asset = self._hashed.get(path)
+        immutable = asset is not None
+        if asset is None:
+            asset = self._assets.get(path)
+            if asset is None:
+                return None
+
+        encoding = choose_encoding(accept_encoding, asset.variants)
+        body = asset.variants[encoding]
+        etag = f'"{asset.digest}-{encoding}"'
+        headers = {
+            'Content-Type': asset.content_type,
+            'Cache-Control': CACHE_IMMUTABLE if immutable else CACHE_REVALIDATE,
+            'ETag': etag,
+        }
+        if len(asset.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        if if_none_match and (if_none_match.strip() == '*' or etag in (
+                _strip_weak(tag.strip()) for tag in if_none_match.split(','))):
+            return 304, headers, b''
+        headers['Content-Length'] = str(len(body))
+        return 200, headers, body
@@ -0,0 +1,33 @@
+"""
+库接口回归测试：bytes 分块在多字节字符中间切开时仍能正确解码
+"""
+import asyncio
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from converter.api import _read_source, convert, convert_async
+
+TEXT = '# 标题\n\n中文段落'
+# 第 4 个字节落在“标”的 UTF-8 编码中间
+CHUNKS = [TEXT.encode('utf-8')[:4], TEXT.encode('utf-8')[4:]]
+
+
+def test_read_source_split_cjk_character():
+    assert _read_source(iter(CHUNKS)) == TEXT
+
+
+def test_convert_split_cjk_character():
+    stats = convert(iter(CHUNKS), io.BytesIO())
+    assert stats.input_chars == len(TEXT)
+
+
+def test_convert_async_split_cjk_character():
+    async def body():
+        for chunk in CHUNKS:
+            yield chunk
+
+    stats = asyncio.run(convert_async(body(), io.BytesIO()))
+    assert stats.input_chars == len(TEXT)
@@ -0,0 +1,37 @@
+"""
+Markdown 解析回归测试：裸网址中的 $ 不作为公式
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from converter.md_parser import parse_markdown
+
+
+def _inline(text):
+    """返回首个段落的行内 Token（类型, 内容）列表"""
+    return [(t.type, t.content) for t in parse_markdown(text)[1].children]
+
+
+def test_dollar_in_bare_url_is_text():
+    assert _inline('http://x.com/$abc$def') == [('text', 'http://x.com/$abc$def')]
+
+
+def test_math_around_bare_url():
+    assert _inline('$a$ 见 https://x.com/$b$c 与 $d$') == [
+        ('math_inline', 'a'),
+        ('text', ' 见 https://x.com/$b$c 与 '),
+        ('math_inline', 'd'),
+    ]
+
+
+def test_trailing_punctuation_after_bare_url():
+    assert _inline('(https://x.com/a). $y$') == [
+        ('text', '(https://x.com/a). '),
+        ('math_inline', 'y'),
+    ]
+
+
+def test_dollar_after_colon_without_url_is_math():
+    assert _inline('abc:$x$') == [('text', 'abc:'), ('math_inline', 'x')]
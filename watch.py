@@ -0,0 +1,361 @@
+"""
+Markdown to Word 监视模式
+持续监视目录中的 .md 文件，内容变化后自动重新生成对应的 .docx
+
+- Linux 使用 inotify，其他平台或 inotify 不可用时退回定时扫描
+- 连续保存会合并为一次转换（防抖），只转换内容哈希发生变化的文件
+- 批量变化交给进程池并行转换
+- 输出先写入同目录的临时文件再重命名，Word 不会打开写了一半的文件
+
+使用方法:
+    python3 watch.py notes/                      # .docx 与 .md 放在同一目录
+    python3 watch.py notes/ -o build/ --workers 4
+    python3 watch.py notes/ --poll --interval 2 --profile corporate
+"""
+import argparse
+import hashlib
+import os
+import select
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from artifact_store import atomic_writer
+
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+
+# 最后一次变化后等待多久再开始转换（秒）
+DEFAULT_DEBOUNCE = 0.3
+# 定时扫描的间隔（秒）
+DEFAULT_INTERVAL = 1.0
+
+
+def _log(message):
+    print(f'[watch] {message}', flush=True)
+
+
+def _is_markdown(path):
+    return path.endswith(MARKDOWN_SUFFIXES) and not os.path.basename(path).startswith('.')
+
+
+def scan_markdown(root):
+    """列出 root 下所有 Markdown 文件（跳过隐藏目录）"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if _is_markdown(path):
+                found.append(path)
+    return found
+
+
+class PollingWatcher:
+    """定时扫描目录，比较文件的修改时间和大小"""
+
+    def __init__(self, root, interval=DEFAULT_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self._signatures = self._scan()
+
+    def _scan(self):
+        signatures = {}
+        for path in scan_markdown(self.root):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            signatures[path] = (st.st_mtime_ns, st.st_size)
+        return signatures
+
+    def wait(self, timeout):
+        """等待最多 timeout 秒（None 表示一个扫描间隔），返回发生变化的路径集合"""
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        current = self._scan()
+        previous = self._signatures
+        self._signatures = current
+        changed = {p for p, sig in current.items() if previous.get(p) != sig}
+        changed.update(p for p in previous if p not in current)
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """基于 Linux inotify 的监视器（通过 ctypes 调用 libc，无额外依赖）"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, root):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+        self._fd = fd
+        self._root = root
+        self._dirs = {}  # watch descriptor → 目录
+        self._add_tree(root)
+
+    def _add_dir(self, path):
+        import ctypes
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'无法监视目录: {path}')
+        self._dirs[wd] = path
+
+    def _add_tree(self, root):
+        """监视 root 及其所有非隐藏子目录，返回其中已有的 Markdown 文件"""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            self._add_dir(dirpath)
+            found.extend(os.path.join(dirpath, n) for n in filenames)
+        return found
+
+    def _remove_tree(self, path):
+        """移出监视范围的目录：撤销它及其子目录的监视"""
+        prefix = path + os.sep
+        for wd, directory in list(self._dirs.items()):
+            if directory == path or directory.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def _rescan(self):
+        """
+        事件队列溢出后全量重新扫描：补上期间新建目录的监视（已监视的目录
+        inotify_add_watch 返回原来的描述符），并把所有文件视为可能变化，
+        由内容哈希决定哪些需要转换
+        """
+        _log('inotify 事件队列溢出，重新扫描全部文件')
+        return set(self._add_tree(self._root))
+
+    def wait(self, timeout):
+        """等待最多 timeout 秒（None 表示一直等待），返回发生变化的路径集合"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + name_len].rstrip(b'\0')
+            offset += name_len
+            if mask & self.IN_Q_OVERFLOW:
+                changed.update(self._rescan())
+                continue
+            if mask & self.IN_IGNORED:
+                # 目录被删除（或已撤销监视），内核不再发送它的事件
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & self.IN_ISDIR:
+                # 新建或移入的子目录：加入监视，并把其中已有的文件视为变化
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and not name.startswith(b'.'):
+                    try:
+                        changed.update(self._add_tree(path))
+                    except OSError:
+                        pass
+                elif mask & self.IN_MOVED_FROM:
+                    self._remove_tree(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def create_watcher(root, poll=False, interval=DEFAULT_INTERVAL):
+    """优先使用 inotify，不可用时退回定时扫描"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            _log(f'inotify 不可用（{e}），改用定时扫描')
+    return PollingWatcher(root, interval)
+
+
+def _convert_file(text, target, profile):
+    """
+    转换一个文件并原子写入 target，返回耗时（毫秒）；可在进程池中执行
+
+    输出文件的权限与直接新建的文件相同（0o666 按 umask 屏蔽）
+    """
+    from converter.docx_builder import convert_markdown_to_docx
+
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with atomic_writer(target, durable=True) as f:
+        convert_markdown_to_docx(text, f, profile=profile)
+    return (time.perf_counter() - started) * 1000
+
+
+class MarkdownWatcher:
+    """维护源文件内容哈希，并把变化的文件转换为 .docx"""
+
+    def __init__(self, source_dir, output_dir=None, profile=None, workers=None):
+        self.source_dir = os.path.abspath(source_dir)
+        self.output_dir = os.path.abspath(output_dir) if output_dir else self.source_dir
+        self.profile = profile
+        self.workers = workers or os.cpu_count() or 1
+        self._hashes = {}
+        self._pool = None
+
+    def target_for(self, source):
+        """源文件对应的输出路径（保留相对目录结构）"""
+        relative = os.path.relpath(source, self.source_dir)
+        return os.path.join(self.output_dir, os.path.splitext(relative)[0] + '.docx')
+
+    def _load(self, source):
+        """读取源文件，返回 (文本, 哈希)；文件已不存在时返回 (None, None)"""
+        try:
+            with open(source, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None, None
+        return data.decode('utf-8', errors='replace'), hashlib.sha256(data).hexdigest()
+
+    def initial_sync(self):
+        """启动时转换缺少输出或输出早于源文件的 .md"""
+        stale = []
+        for source in scan_markdown(self.source_dir):
+            target = self.target_for(source)
+            try:
+                up_to_date = os.path.getmtime(target) >= os.path.getmtime(source)
+            except OSError:
+                up_to_date = False
+            if up_to_date:
+                self._hashes[source] = self._load(source)[1]
+            else:
+                stale.append(source)
+        self.process(stale)
+
+    def process(self, paths):
+        """转换内容发生变化的文件，返回实际转换的数量"""
+        jobs = []
+        for source in sorted(paths):
+            if not _is_markdown(source):
+                continue
+            text, digest = self._load(source)
+            if digest is None:
+                self._hashes.pop(source, None)
+                continue
+            if digest == self._hashes.get(source):
+                continue
+            jobs.append((source, text, digest))
+
+        if len(jobs) == 1:
+            source, text, digest = jobs[0]
+            try:
+                self._done(source, digest, _convert_file(
+                    text, self.target_for(source), self.profile))
+            except Exception as e:
+                _log(f'转换失败: {source}: {e}')
+        elif jobs:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            futures = {
+                self._pool.submit(_convert_file, text, self.target_for(source),
+                                  self.profile): (source, digest)
+                for source, text, digest in jobs
+            }
+            for future in as_completed(futures):
+                source, digest = futures[future]
+                try:
+                    self._done(source, digest, future.result())
+                except Exception as e:
+                    _log(f'转换失败: {source}: {e}')
+        return len(jobs)
+
+    def _done(self, source, digest, elapsed_ms):
+        self._hashes[source] = digest
+        _log(f'{os.path.relpath(source, self.source_dir)} → '
+             f'{os.path.relpath(self.target_for(source), self.output_dir)} '
+             f'({elapsed_ms:.0f} ms)')
+
+    def run(self, watcher, debounce=DEFAULT_DEBOUNCE):
+        """监视循环：变化停止 debounce 秒后统一处理"""
+        pending = set()
+        last_change = 0.0
+        while True:
+            changed = watcher.wait(debounce if pending else None)
+            if changed:
+                pending.update(changed)
+                last_change = time.monotonic()
+                continue
+            if pending and time.monotonic() - last_change >= debounce:
+                batch, pending = pending, set()
+                self.process(batch)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监视目录并自动将 Markdown 转换为 Word')
+    parser.add_argument('source', help='要监视的目录')
+    parser.add_argument('-o', '--output', help='输出目录（默认与源文件相同）')
+    parser.add_argument('--profile', help='样式方案名称')
+    parser.add_argument('--workers', type=int, default=0, help='批量转换的进程数（默认 CPU 核心数）')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help='最后一次变化后等待的秒数')
+    parser.add_argument('--poll', action='store_true', help='强制使用定时扫描')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help='定时扫描的间隔（秒）')
+    parser.add_argument('--once', action='store_true', help='只同步一次后退出')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source):
+        sys.exit(f'目录不存在: {args.source}')
+    if args.profile:
+        from converter.styles import profile_names
+        if args.profile not in profile_names():
+            sys.exit(f'未知的样式方案: {args.profile}')
+
+    md_watcher = MarkdownWatcher(args.source, args.output, args.profile, args.workers)
+    watcher = None
+    try:
+        # 先建立监视再同步：同步期间（大目录可能很久）发生的修改也会被监视器记录
+        if not args.once:
+            watcher = create_watcher(md_watcher.source_dir, args.poll, args.interval)
+        md_watcher.initial_sync()
+        if args.once:
+            return
+        _log(f'正在监视 {md_watcher.source_dir}（{type(watcher).__name__}），按 Ctrl+C 退出')
+        md_watcher.run(watcher, args.debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.close()
+        md_watcher.close()
+
+
+if __name__ == '__main__':
+    main()